@@ -2,9 +2,30 @@
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
+from OpenGL.GL.statecache import *  # Drops redundant glColor/glLight/glMaterial... calls
+from OpenGL.GL import statecache
+from OpenGL.GL import shaders
+from OpenGL.GL import framebufferobjects
+from OpenGL.GL.ARB import get_program_binary
+from OpenGL import error
+from OpenGL import callcounts
+from OpenGL.arrays import vbo
+import functools
 import time
 import math
 import random
+import struct
+import sys
+import atexit
+import argparse
+import concurrent.futures
+import copy
+import hashlib
+import os
+import multiprocessing
+from multiprocessing import shared_memory
+import json
+import numpy as np
 
 # --- Constants ---
 WINDOW_WIDTH = 1000
@@ -44,9 +65,14 @@ NEPTUNE_ORBIT_RADIUS = 530.0
 ASTEROID_BELT_INNER_RADIUS = 220.0
 ASTEROID_BELT_OUTER_RADIUS = 280.0
 NUM_ASTEROIDS = 250 # Increased for denser belt
+ASTEROID_DRAW_FRACTION = 1.0 # Share of the belt drawn (the belt is in random order, so a prefix thins it evenly)
 ASTEROID_MIN_SIZE = 0.5
 ASTEROID_MAX_SIZE = 2.5
 ASTEROID_BELT_HEIGHT = 15.0 # Max deviation from ecliptic
+ASTEROID_POINT_ATTENUATION = [1.0, 0.0, 1.0] # Constant, linear, quadratic: sprite size falls off as 1/distance like the geometry
+ASTEROID_POINT_MIN_PIXELS = 1.0 # Far asteroids stay visible
+ASTEROID_POINT_MAX_PIXELS = 32.0 # Asteroids grazing the camera don't fill the screen
+POINT_NO_ATTENUATION = [1.0, 0.0, 0.0] # GL default point distance attenuation
 
 # Starfield Parameters
 NUM_STARS = 300
@@ -67,27 +93,26 @@ JUPITER_ORBIT_SPEED = 0.0020
 SATURN_ORBIT_SPEED = 0.0015
 URANUS_ORBIT_SPEED = 0.0010
 NEPTUNE_ORBIT_SPEED = 0.0008
-ASTEROID_ORBIT_SPEED = 0.001 # Base speed for asteroid rotation
+ASTEROID_ORBIT_SPEED = 0.001 # Mean motion at the inner belt edge (falls off as a^-1.5)
+ASTEROID_MAX_ECCENTRICITY = 0.05 # Keeps the belt between Mars and Jupiter
 
 # Planet Self-Rotation Speeds (Degrees per frame)
 EARTH_ROTATION_SPEED = 0.5 # Example: Earth rotates faster
 
 # --- Scene Objects ---
-stars = []
-asteroids = []
+stars = np.zeros((0, 3), dtype=np.float32)  # (N, 3) star positions
+asteroids = {}  # Asteroid belt as parallel arrays, see initialize_asteroids()
+planet_orbits = {}  # Planets and moons as parallel orbit arrays, see initialize_orbits()
 ring_quadric = None # For Saturn's rings
 
 # --- Simulation State ---
-mercury_orbit_angle = 0.0
-venus_orbit_angle = 0.0
-earth_orbit_angle = 0.0
-mars_orbit_angle = 0.0
-jupiter_orbit_angle = 0.0
-saturn_orbit_angle = 0.0
-uranus_orbit_angle = 0.0
-neptune_orbit_angle = 0.0
-moon_orbit_angle = 0.0 # Add with other orbit angles
 earth_rotation_angle = 0.0 # Separate from orbit angle
+earth_rotation_epoch = 0.0 # Earth's rotation angle at orbit time 0 for the current rotation speed
+
+# Solar system clock: every Keplerian body is evaluated directly from orbit_time
+orbit_time = 0.0 # Mean-motion ticks elapsed (advances by GRAVITY_FACTOR * time_warp per tick)
+TIME_WARP_LEVELS = [0.0, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 100.0, 1000.0] # Selectable with [ and ]
+time_warp = 1.0 # Orbit clock speed-up (the integrated rocket and N-body bodies keep real time)
 
 # --- Moon Parameters ---
 # Earth (already done)
@@ -146,19 +171,108 @@ TRITON_ORBIT_RADIUS = 35.0
 TRITON_ORBIT_SPEED = 0.018
 TRITON_MATERIAL = [0.6, 0.7, 0.8, 1.0] # Frozen nitrogen
 
-# Moon orbit angles
-phobos_orbit_angle = 0.0
-deimos_orbit_angle = 0.0
-io_orbit_angle = 0.0
-europa_orbit_angle = 0.0
-ganymede_orbit_angle = 0.0
-callisto_orbit_angle = 0.0
-titan_orbit_angle = 0.0
-titania_orbit_angle = 0.0
-triton_orbit_angle = 0.0
+# --- Keplerian Orbits ---
+# name: parent, semi-major axis, eccentricity, inclination, argument of periapsis,
+# ascending node, mean anomaly at start (angles in degrees), mean motion (radians per tick)
+# Parents must be the Sun (None) or a planet listed earlier.
+ORBITAL_ELEMENTS = [
+    ("mercury", None, MERCURY_ORBIT_RADIUS, 0.206, 7.00, 29.1, 48.3, 174.8, MERCURY_ORBIT_SPEED),
+    ("venus", None, VENUS_ORBIT_RADIUS, 0.007, 3.39, 54.9, 76.7, 50.1, VENUS_ORBIT_SPEED),
+    ("earth", None, EARTH_ORBIT_RADIUS, 0.017, 0.00, 114.2, 348.7, 357.5, EARTH_ORBIT_SPEED),
+    ("mars", None, MARS_ORBIT_RADIUS, 0.093, 1.85, 286.5, 49.6, 19.4, MARS_ORBIT_SPEED),
+    ("jupiter", None, JUPITER_ORBIT_RADIUS, 0.049, 1.30, 273.9, 100.5, 20.0, JUPITER_ORBIT_SPEED),
+    ("saturn", None, SATURN_ORBIT_RADIUS, 0.057, 2.49, 339.4, 113.7, 317.0, SATURN_ORBIT_SPEED),
+    ("uranus", None, URANUS_ORBIT_RADIUS, 0.046, 0.77, 96.9, 74.0, 142.2, URANUS_ORBIT_SPEED),
+    ("neptune", None, NEPTUNE_ORBIT_RADIUS, 0.009, 1.77, 273.2, 131.8, 256.2, NEPTUNE_ORBIT_SPEED),
+    ("moon", "earth", MOON_ORBIT_RADIUS, 0.055, 5.14, 318.2, 125.1, 135.3, MOON_ORBIT_SPEED),
+    ("phobos", "mars", PHOBOS_ORBIT_RADIUS, 0.015, 1.08, 150.1, 164.9, 0.0, PHOBOS_ORBIT_SPEED),
+    ("deimos", "mars", DEIMOS_ORBIT_RADIUS, 0.001, 1.79, 260.7, 339.6, 0.0, DEIMOS_ORBIT_SPEED),
+    ("io", "jupiter", IO_ORBIT_RADIUS, 0.004, 0.05, 84.1, 43.9, 0.0, IO_ORBIT_SPEED),
+    ("europa", "jupiter", EUROPA_ORBIT_RADIUS, 0.009, 0.47, 88.9, 219.1, 0.0, EUROPA_ORBIT_SPEED),
+    ("ganymede", "jupiter", GANYMEDE_ORBIT_RADIUS, 0.001, 0.20, 192.4, 63.6, 0.0, GANYMEDE_ORBIT_SPEED),
+    ("callisto", "jupiter", CALLISTO_ORBIT_RADIUS, 0.007, 0.19, 52.6, 298.8, 0.0, CALLISTO_ORBIT_SPEED),
+    ("titan", "saturn", TITAN_ORBIT_RADIUS, 0.029, 0.35, 180.5, 28.1, 0.0, TITAN_ORBIT_SPEED),
+    ("titania", "uranus", TITANIA_ORBIT_RADIUS, 0.001, 0.34, 284.4, 167.6, 0.0, TITANIA_ORBIT_SPEED),
+    ("triton", "neptune", TRITON_ORBIT_RADIUS, 0.000, 156.9, 344.0, 177.6, 0.0, TRITON_ORBIT_SPEED),  # Retrograde
+]
+BODY_INDEX = {elements[0]: i for i, elements in enumerate(ORBITAL_ELEMENTS)}
+KEPLER_ITERATIONS = 3  # Fixed Newton steps, enough for e < 0.3 and a constant cost per tick
+ORBIT_LINE_SEGMENTS = 100  # Points per planet orbit line
+
+# --- Event Search ---
+BODY_RADII = np.array([  # Drawn radius of every body, in ORBITAL_ELEMENTS order
+    MERCURY_RADIUS, VENUS_RADIUS, EARTH_RADIUS, MARS_RADIUS, JUPITER_RADIUS, SATURN_RADIUS, URANUS_RADIUS,
+    NEPTUNE_RADIUS, MOON_RADIUS, PHOBOS_RADIUS, DEIMOS_RADIUS, IO_RADIUS, EUROPA_RADIUS, GANYMEDE_RADIUS,
+    CALLISTO_RADIUS, TITAN_RADIUS, TITANIA_RADIUS, TRITON_RADIUS,
+])
+BODY_NAMES = [elements[0] for elements in ORBITAL_ELEMENTS]
+EVENT_KINDS = ["alignment", "transit", "closest_approach"]
+EVENT_SAMPLES_PER_TURN = 32  # Samples per turn of the fastest angle involved (events closer than this may merge)
+EVENT_BLOCK_SAMPLES = 8192  # Sample times evaluated per vectorized block
+EVENT_TIME_TOLERANCE = 1e-6  # Root refinement stops once no root moves more than this (orbit ticks)
+EVENT_ROOT_ITERATIONS = 30  # Upper bound on root refinement steps (Illinois usually needs under 10)
+EVENT_ROCKET_PATH_TICKS = 3600  # How far --events flies the rocket ahead for closest approaches
+
+# --- Motion Trails ---
+KEY_TOGGLE_TRAILS = b't'  # Show/hide fading trails behind the planets, moons and rocket (solar system mode)
+TRAIL_LENGTH = 240  # Positions kept per body
+TRAIL_SAMPLE_TICKS = 2  # Ticks between recorded positions
+TRAIL_SAMPLE_PERIOD = 1 << 20  # Sample numbers wrap here on the GPU (float32 keeps them exact)
+TRAIL_PLANET_COLOR = [0.4, 0.6, 1.0]
+TRAIL_MOON_COLOR = [0.6, 0.6, 0.6]
+TRAIL_ROCKET_COLOR = [1.0, 0.6, 0.2]
+TRAIL_COLORS = np.array([TRAIL_PLANET_COLOR if parent is None else TRAIL_MOON_COLOR
+                         for _, parent, *_ in ORBITAL_ELEMENTS] + [TRAIL_ROCKET_COLOR], dtype=np.float32)
+TRAIL_VERTEX_FLOATS = 7  # x, y, z, r, g, b, sample number
+TRAIL_VERTEX_STRIDE = TRAIL_VERTEX_FLOATS * 4
+show_trails = False
+trails = {}  # Position history, see reset_trails()
+trail_buffer = None  # GPU copy of the trail segments and how far it is uploaded (render side only)
+
+# --- Ephemeris Tables ---
+EPHEMERIS_MAGIC = b"G10E"
+EPHEMERIS_VERSION = 1
+EPHEMERIS_METHODS = ["hermite", "chebyshev"]
+EPHEMERIS_STEP = 4.0  # Orbit ticks between Hermite samples (Io, the fastest body, turns every ~160 ticks)
+EPHEMERIS_SEGMENT = 64.0  # Orbit ticks covered by each Chebyshev segment
+EPHEMERIS_DEGREE = 12  # Chebyshev polynomial degree per segment
+EPHEMERIS_SPAN = 100000.0  # Orbit ticks tabulated by --ephemeris when building a new table
+ephemeris = None  # Table used for body lookups when it covers the time (see load_ephemeris)
+
+# --- Picking ---
+# Clicks render object IDs as flat colours into a PICK_SIZE square framebuffer around the cursor
+PICK_SIZE = 5  # Pixels read back per click (odd, so the cursor is the centre pixel)
+PICK_SPHERE_SLICES = 12  # Coarser spheres are plenty for the ID pass
+PICK_SPHERE_STACKS = 8
+PICK_ASTEROID_MIN_PIXELS = 3.0  # Far asteroids stay clickable
+PICK_SUN = 1  # 0 is the background
+PICK_BODIES = 2  # Planets and moons, in ORBITAL_ELEMENTS order
+PICK_ROCKET = PICK_BODIES + len(BODY_NAMES)
+PICK_ASTEROIDS = PICK_ROCKET + 1  # Asteroid i is PICK_ASTEROIDS + i (24-bit IDs)
+FOCUS_NONE = 0xFFFF  # Focus event code that clears the camera focus
+pick_framebuffer = None  # Offscreen ID target and the cached asteroid ID colours (render side only)
+selected_object = None  # (kind, index) of the last clicked object
+
+# --- N-body Gravity ---
+# GM in scene units^3 / tick^2. The Sun's is chosen so the asteroid belt's
+# Keplerian motion carries straight over when N-body mode is switched on.
+NBODY_SUN_GM = ASTEROID_ORBIT_SPEED ** 2 * ASTEROID_BELT_INNER_RADIUS ** 3
+NBODY_PLANET_MASS_RATIOS = {  # Planet mass / Sun mass
+    "mercury": 1.66e-7, "venus": 2.45e-6, "earth": 3.04e-6, "mars": 3.23e-7,
+    "jupiter": 9.55e-4, "saturn": 2.86e-4, "uranus": 4.37e-5, "neptune": 5.15e-5,
+}
+NBODY_BELT_GM = 1e-4  # Whole asteroid belt, shared out by asteroid volume
+NBODY_SOFTENING = 2.0  # Plummer softening length (keeps close passes finite)
+NBODY_THETA = 0.5  # Barnes-Hut opening angle (cell radii / distance)
+NBODY_LEAF_PARTICLES = 4  # Aim for at most this many asteroids per leaf cell
+NBODY_MAX_TREE_LEVELS = 8  # Octree depth cap (the belt is flat, so cells fill up about 4x per level)
+NBODY_DIRECT_CHUNK = 1 << 20  # Particle pairs per batch in the near-field direct sums
+KEY_TOGGLE_NBODY = b'n'  # Toggle N-body gravity (solar system mode)
+nbody_mode = False  # Integrate asteroids and moons under gravity instead of on rails
+nbody = {}  # Velocities/accelerations for N-body mode, see start_nbody()
 
 # Sun glow parameters
-SUN_GLOW_LAYERS = 5
+SUN_GLOW_LAYERS = 5 # Up to len(SUN_GLOW_COLORS)
 SUN_GLOW_RADIUS = SUN_RADIUS * 1.5
 SUN_GLOW_COLORS = [
     [1.0, 0.9, 0.7, 0.8], # Inner glow (bright)
@@ -179,9 +293,28 @@ ROCKET_LENGTH = 12.0 # Length of the rocket
 ROCKET_RADIUS = 2.5 # Radius of the rocket body
 ROCKET_THRUST_LENGTH = 5.0 # Length of the rocket thrust flame
 ROCKET_ORBIT_RADIUS = 170.0 # Default orbit radius (between Earth and Mars)
-ROCKET_ORBIT_SPEED = 0.003 # Default orbit speed
 ROCKET_ROTATION_SPEED = 3.0 # Rotation speed of the rocket (degrees per frame)
 
+# Rocket Dynamics (adaptive Dormand-Prince 5(4) integration, times in ticks)
+ROCKET_RELATIVE_TOLERANCE = 1e-8 # Local error allowed per step, relative to the state
+ROCKET_ABSOLUTE_TOLERANCE = 1e-8 # and in absolute scene units (per tick for velocities)
+ROCKET_MIN_STEP = 1e-3 # Smallest step the controller may take
+ROCKET_SAFETY = 0.9 # Step size controller safety factor
+ROCKET_MIN_SCALE = 0.2 # Limits on how fast the step may shrink
+ROCKET_MAX_SCALE = 5.0 # and grow from one step to the next
+ROCKET_SOFTENING = 0.1 # Keeps the pull finite if the rocket flies through a body
+DP_NODES = [0.0, 1/5, 3/10, 4/5, 8/9, 1.0, 1.0]
+DP_COUPLINGS = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+    [35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84],
+]
+DP_ERROR_WEIGHTS = [71/57600, 0.0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40] # 5th minus 4th order weights
+
 # Camera Constants
 FIRST_PERSON_OFFSET = [0.0, 2.0, 0.0] # Offset from rocket position for first-person view
 THIRD_PERSON_DISTANCE = 20.0 # Distance behind rocket for third-person view
@@ -193,19 +326,21 @@ KEY_FIRST_PERSON = b'1'
 KEY_THIRD_PERSON = b'2'
 KEY_CRASH_CAMERA = b'3'
 KEY_START_CRASH = b'c' # Trigger crash sequence
+KEY_CYCLE_FOCUS = b'f' # Cycle the body the first/third-person cameras keep in frame
 
 # Rocket State Variables
 rocket_position = [0.0, 0.0, ROCKET_ORBIT_RADIUS] # Initial position
-rocket_velocity = [0.0, 0.0, 0.0] # Initial velocity
+rocket_velocity = [-math.sqrt(NBODY_SUN_GM / ROCKET_ORBIT_RADIUS), 0.0, 0.0] # Circular orbit around the Sun
 rocket_orientation = [0.0, 1.0, 0.0] # Up vector (y-axis)
 rocket_heading = [1.0, 0.0, 0.0] # Forward vector (initially along x-axis)
-rocket_orbit_angle = 0.0 # Current orbit angle
 rocket_rotation_angle = 0.0 # Rotation angle of rocket model
+rocket_step_size = 1.0 # Step the integrator will try next (carried over between ticks)
+rocket_integrator_stats = {"steps": 0, "rejected": 0, "evaluations": 0, "error": 0.0} # Last tick's work
 
 # Crash Animation Variables
 is_crashing = False # Is rocket currently in crash sequence?
 crash_start_time = 0 # Time when crash sequence started
-crash_duration = 5.0 # Duration of crash sequence in seconds
+crash_duration = 5.0 # Roughly how long the dive into the Sun takes (sets the thrust)
 crash_target = [0.0, 0.0, 0.0] # Target position for crash (the Sun)
 crash_start_position = [0.0, 0.0, 0.0] # Starting position when crash initiated
 crash_camera_distance = 40.0 # Distance for crash camera view
@@ -215,6 +350,7 @@ crash_tumble_factor = 5.0 # How much rocket tumbles during crash
 
 # Camera State Variables
 current_camera_mode = CAMERA_MODE_FREE # Start with free camera mode
+camera_focus = None # Body index the rocket cameras frame (None: look along the heading)
 free_camera_pos = [0.0, 40.0, ROCKET_ORBIT_RADIUS + 60.0] # Same as original
 free_camera_target = [0.0, 0.0, 0.0] # Looking at the Sun initially
 free_camera_up = [0.0, 1.0, 0.0] # Y is up
@@ -226,6 +362,7 @@ camera_up = [0.0, 1.0, 0.0] # Y is up
 
 CAMERA_MOVE_SPEED = 10.0
 CAMERA_ZOOM_SPEED = 10.0
+viewport_height = WINDOW_HEIGHT # Pixel height of the 3D viewport (scales point sprites)
 
 # --- Lighting ---
 sun_light_position = [0.0, 0.0, 0.0, 1.0] # Positioned at the Sun (origin)
@@ -252,7 +389,9 @@ MAT_NEPTUNE = [0.3, 0.5, 0.9, 1.0] # Deeper blue
 scene_mode = 0  # 0 for solar system, 1 for rocket gameplay
 
 # Rocket state for gameplay
-rocket_pos = [0.0, 20.0, 175.0]  # Initial position
+ROCKET_GAME_START = [0.0, 20.0, 175.0]  # Where every rocket-mode flight starts
+ROCKET_MAX_HEALTH = 10
+rocket_pos = ROCKET_GAME_START[:]  # Initial position
 rocket_speed = 1  # Speed of the rocket
 movement = 0.5
 rocket_movement = {"w": False, "s": False, "a": False, "d": False, "q": True, "e": False}  # Movement state
@@ -272,6 +411,7 @@ MAX_REPAIR_ITEMS = 3  # Maximum simultaneous repair items
 REPAIR_SPAWN_INTERVAL = 2.0
 last_repair_spawn = 0  # Time of last repair item spawn
 REPAIR_ITEM_RADIUS = 10.0
+REPAIR_PARTICLES = 20  # Floating particles around each repair item
 REPAIR_ITEM_COLOR = [0.0, 1.0, 0.0]  # Green
 REPAIR_HUD_COLOR = [0.2, 0.8, 0.2]  # Green
 
@@ -281,12 +421,25 @@ mission_complete = False  # Flag to indicate mission completion
 mission_planet_pos = None  # Position of the mission planet
 MISSION_PLANET_RADIUS = 50.0  # Radius of the mission planet
 MISSION_PLANET_DISTANCE = 2000.0  # Distance in front of the rocket
+MISSION_PLANET_DELAY = 120  # Seconds of flight before the mission planet appears
 
 # Obstacles
 meteors = []  # List to store meteor positions
-MAX_METEORS = 80  # Maximum number of meteors
-METEOR_SPAWN_DISTANCE = 2000  # Distance ahead of the rocket to spawn meteors
 METEOR_RADIUS = 25.0  # Radius of meteors
+
+# Meteor streaming: the field is cut into seed-addressable chunks along -z
+METEOR_CHUNK_LENGTH = 500.0  # Depth of one chunk along the flight path
+METEORS_PER_CHUNK = 22  # Meteors spread over the whole field width
+LANE_METEORS_PER_CHUNK = 3  # Extra meteors near the launch axis, so the flight path is never empty
+METEOR_FIELD_HALF_WIDTH = 1000.0  # Field extent in x and y around the launch axis
+METEOR_LANE_HALF_WIDTH = 50.0
+METEOR_FIELD_START_Z = -25.0  # Absolute z where the field begins (200 ahead of the launch position)
+METEOR_CHUNKS_AHEAD = 4  # Chunks loaded ahead of the rocket's chunk
+METEOR_CHUNKS_BEHIND = 1  # Chunks kept behind it (still visible from the chase camera)
+METEOR_CHUNKS_PREFETCH = 2  # Chunks generated in the background beyond the loaded ones
+meteor_chunks_loaded = None  # [first, last] chunk index whose meteors are in 'meteors'
+meteor_chunk_futures = {}  # chunk index -> pending background generation
+meteor_chunk_executor = None  # Background thread generating chunks, started on first use
 rocket_health = 10  # Rocket's health points
 game_over = False  # Game over state
 
@@ -296,8 +449,277 @@ MAX_STARS = 60  # Maximum number of stars in front of the rocket
 STAR_SPAWN_DISTANCE = 200  # Distance in front of the rocket to spawn stars
 STAR_DESPAWN_DISTANCE = 10  # Distance behind the rocket to despawn stars
 
+# Floating origin for rocket mode
+ORIGIN_REBASE_DISTANCE = 5000.0  # Shift the world back once the rocket is this far from the origin
+world_origin = [0.0, 0.0, 0.0]  # Absolute position of the current rocket-mode origin (absolute = local + origin)
+
+# --- Deterministic Simulation ---
+SEED_MASK = (1 << 64) - 1  # NumPy seed sequences take non-negative integers
+SIM_SEED = 10  # Master seed for every simulation RNG (override with --seed)
+SIM_TICK_SECONDS = 1.0 / 60.0  # Simulated seconds per simulation tick
+MAX_TICKS_PER_IDLE = 5  # Cap on catch-up ticks so a slow frame can't spiral
+sim_tick = 0  # Number of simulation ticks run so far
+sim_time_accumulator = 0.0  # Real time not yet consumed by whole ticks
+last_idle_time = None  # Wall clock time of the previous idle() call
+
+# One RNG per subsystem so e.g. extra meteor spawns don't shift the repair items
+# (meteor chunks derive their own generators from the seed and chunk index)
+star_rng = random.Random()
+asteroid_rng = random.Random()
+repair_rng = random.Random()
+
+# Input recording (binary, keyed to simulation ticks)
+RECORD_MAGIC = b"G10R"
+RECORD_VERSION = 1
+RECORD_HEADER = struct.Struct("<4sHIf")  # magic, version, seed, tick seconds
+RECORD_EVENT = struct.Struct("<IHB")  # tick, key code, flags
+EVENT_FLAG_DOWN = 1  # Key press (otherwise release)
+EVENT_FLAG_SPECIAL = 2  # GLUT special key (arrows etc.)
+EVENT_FLAG_END = 4  # End of session marker
+EVENT_FLAG_FOCUS = 8  # Camera focus picked with the mouse (code: body index or FOCUS_NONE)
+input_recorder = None  # Open file while recording
+
+# Every global that together makes up the simulation state (see capture_state)
+SNAPSHOT_GLOBALS = [
+    "stars", "asteroids", "planet_orbits", "earth_rotation_angle", "earth_rotation_epoch",
+    "orbit_time", "time_warp", "nbody_mode", "nbody",
+    "GRAVITY_FACTOR", "EARTH_ROTATION_SPEED",
+    "rocket_position", "rocket_velocity", "rocket_orientation", "rocket_heading",
+    "rocket_rotation_angle", "rocket_step_size",
+    "is_crashing", "crash_start_time", "crash_start_position", "crash_progress",
+    "current_camera_mode", "camera_focus", "camera_pos", "camera_target", "camera_up",
+    "scene_mode", "rocket_pos", "rocket_movement", "camera_pos_mode_1", "camera_target_mode_1",
+    "repair_mode", "broken_parts", "repair_timer", "repair_progress", "last_repair_spawn",
+    "mission_start_time", "mission_complete", "mission_planet_pos",
+    "meteors", "meteor_chunks_loaded", "rocket_health", "game_over", "stars_mode_1", "world_origin",
+    "sim_tick", "SIM_TICK_SECONDS", "SIM_SEED", "show_trails", "trails",
+]
+SNAPSHOT_RNGS = ["star_rng", "asteroid_rng", "repair_rng"]
+
+# Binary scene snapshot files (see save_snapshot)
+SNAPSHOT_MAGIC = b"G10S"
+SNAPSHOT_VERSION = 8  # 2: Keplerian orbit arrays, 3: integrated rocket flight, 4: meteor chunks, 5: orbit clock,
+                      # 6: motion trails, 7: camera focus, 8: master seed (keys the meteor chunks)
+SNAPSHOT_PREAMBLE = struct.Struct("<4sHI")  # magic, version, JSON header length
+SNAPSHOT_ALIGNMENT = 64  # Array blocks start on 64-byte boundaries
+SNAPSHOT_POINT_LISTS = ["meteors", "stars_mode_1", "broken_parts"]  # Small [x, y, z] lists
+SNAPSHOT_ARRAY_DICTS = ["asteroids", "planet_orbits", "nbody", "trails"]  # Dicts of parallel NumPy arrays
+snapshot_path = "scene.snap"  # Where the 'k' key saves the scene
+
+# --- Text Rendering ---
+TEXT_FONTS = [GLUT_BITMAP_HELVETICA_18, GLUT_BITMAP_HELVETICA_12]  # Fonts the HUD uses
+TEXT_FIRST_CHAR = 32  # Printable ASCII range baked into each atlas
+TEXT_LAST_CHAR = 126
+TEXT_ATLAS_COLUMNS = 16  # Glyph cells per atlas row
+TEXT_FALLBACK_HEIGHT = 24  # Line height when glutBitmapHeight is unavailable
+text_atlases = {}  # font -> glyph atlas (texture + metrics), per GL context
+text_slots = {}  # (x, y, font) -> layout of the last string drawn there
+
+# --- Rocket Meshes ---
+ROCKET_MESH_STRIDE = 9 * 4  # Interleaved float32 position, normal, color
+rocket_meshes = {}  # scene_mode -> uploaded mesh, built on first draw per GL context
+
+# --- Shader Pipeline ---
+SHADER_CACHE_DIR = ".shader_cache"  # Linked program binaries, keyed by driver and source
+SHADER_CACHE_MAGIC = b"G10P"
+SHADER_CACHE_HEADER = struct.Struct("<4sI")  # magic, program binary format
+EARTH_DAY_COLOR = [0.2, 0.4, 0.8]  # Ocean blue
+EARTH_NIGHT_COLOR = [0.05, 0.05, 0.1]  # Dark blue
+EARTH_TWILIGHT_WIDTH = 0.15  # Width of the day/night blend (cosine of the sun angle)
+use_shaders = True  # False keeps the fixed-function path (--no-shaders)
+shader_programs = {}  # name -> linked program and uniform locations (None if unavailable), per GL context
+
+# Shared vertex stage: lighting happens per fragment in eye space, where
+# setup_lighting() leaves the sun's GL_LIGHT0 position
+SHADER_VERTEX_SOURCE = """
+#version 120
+varying vec3 eye_position;
+varying vec3 eye_normal;
+void main() {
+    vec4 position = gl_ModelViewMatrix * gl_Vertex;
+    eye_position = position.xyz;
+    eye_normal = gl_NormalMatrix * gl_Normal;
+    gl_FrontColor = gl_Color;
+    gl_Position = gl_ProjectionMatrix * position;
+}
+"""
+
+# Blinn-Phong sun light on the current colour (planets, moons, rocket)
+SHADER_LIT_SOURCE = """
+#version 120
+varying vec3 eye_position;
+varying vec3 eye_normal;
+void main() {
+    vec3 normal = normalize(gl_FrontFacing ? eye_normal : -eye_normal);
+    vec3 to_light = normalize(gl_LightSource[0].position.xyz - eye_position);
+    vec3 half_vector = normalize(to_light - normalize(eye_position));
+    float diffuse = max(dot(normal, to_light), 0.0);
+    float specular = diffuse > 0.0 ? pow(max(dot(normal, half_vector), 0.0), gl_FrontMaterial.shininess) : 0.0;
+    vec3 color = gl_Color.rgb * (gl_LightSource[0].ambient.rgb + diffuse * gl_LightSource[0].diffuse.rgb)
+        + specular * gl_LightSource[0].specular.rgb * gl_FrontMaterial.specular.rgb;
+    gl_FragColor = vec4(color, gl_Color.a);
+}
+"""
+
+# Earth: lit day side fading into the night colour across the terminator
+SHADER_EARTH_SOURCE = """
+#version 120
+uniform vec3 day_color;
+uniform vec3 night_color;
+uniform float twilight_width;
+varying vec3 eye_position;
+varying vec3 eye_normal;
+void main() {
+    vec3 normal = normalize(eye_normal);
+    vec3 to_light = normalize(gl_LightSource[0].position.xyz - eye_position);
+    float facing = dot(normal, to_light);
+    vec3 day = day_color * (gl_LightSource[0].ambient.rgb + max(facing, 0.0) * gl_LightSource[0].diffuse.rgb);
+    gl_FragColor = vec4(mix(night_color, day, smoothstep(-twilight_width, twilight_width, facing)), 1.0);
+}
+"""
+
+# Asteroid sprites: the glPointParameter distance attenuation applied to each
+# asteroid's own size, drawn as shaded discs
+SHADER_ASTEROID_VERTEX_SOURCE = """
+#version 120
+uniform float point_scale;
+attribute float size;
+void main() {
+    vec4 position = gl_ModelViewMatrix * gl_Vertex;
+    float distance = length(position.xyz);
+    float attenuation = inversesqrt(gl_Point.distanceConstantAttenuation
+        + gl_Point.distanceLinearAttenuation * distance
+        + gl_Point.distanceQuadraticAttenuation * distance * distance);
+    gl_PointSize = clamp(size * point_scale * attenuation, gl_Point.sizeMin, gl_Point.sizeMax);
+    gl_FrontColor = gl_Color;
+    gl_Position = gl_ProjectionMatrix * position;
+}
+"""
+
+SHADER_ASTEROID_FRAGMENT_SOURCE = """
+#version 120
+void main() {
+    vec2 offset = gl_PointCoord * 2.0 - 1.0;
+    float radius_squared = dot(offset, offset);
+    if (radius_squared > 1.0)
+        discard;
+    gl_FragColor = vec4(gl_Color.rgb * (1.0 - 0.5 * radius_squared), gl_Color.a);
+}
+"""
+
+SHADER_TRAIL_VERTEX_SOURCE = """
+#version 120
+uniform float newest_sample;
+uniform float sample_period;
+uniform float trail_length;
+attribute float sample_number;
+void main() {
+    float age = mod(newest_sample - sample_number, sample_period);
+    gl_FrontColor = vec4(gl_Color.rgb, gl_Color.a * clamp(1.0 - age / trail_length, 0.0, 1.0));
+    gl_Position = ftransform();
+}
+"""
+
+SHADER_TRAIL_FRAGMENT_SOURCE = """
+#version 120
+void main() {
+    gl_FragColor = gl_Color;
+}
+"""
+
+SHADER_SOURCES = {  # Program name -> (vertex source, fragment source, uniform names, attribute names)
+    "lit": (SHADER_VERTEX_SOURCE, SHADER_LIT_SOURCE, [], []),
+    "earth": (SHADER_VERTEX_SOURCE, SHADER_EARTH_SOURCE, ["day_color", "night_color", "twilight_width"], []),
+    "asteroids": (SHADER_ASTEROID_VERTEX_SOURCE, SHADER_ASTEROID_FRAGMENT_SOURCE, ["point_scale"], ["size"]),
+    "trails": (SHADER_TRAIL_VERTEX_SOURCE, SHADER_TRAIL_FRAGMENT_SOURCE,
+               ["newest_sample", "sample_period", "trail_length"], ["sample_number"]),
+}
+current_shader_program = 0  # Program bound by use_shader_program()
+
+# --- Video Export ---
+EXPORT_SHARD_FRAMES = 30  # Frames rendered per worker job
+EXPORT_TICKS_PER_FRAME = 1  # Simulation ticks between exported frames
+offscreen_context = None  # (context, buffer) kept alive while rendering offscreen
+
+# --- Simulation Worker ---
+# Per-tick arrays the worker publishes through shared memory; the rest of the
+# render state is small and travels with the frame announcement, the point
+# lists only in frames where they changed (meteors change on chunk loads and hits)
+FRAME_ARRAYS = [("asteroids", "positions"), ("planet_orbits", "offsets"), ("planet_orbits", "positions"),
+                ("trails", "positions"), ("trails", "samples")]
+FRAME_GLOBALS = [name for name in SNAPSHOT_GLOBALS if name not in ("stars", "asteroids", "planet_orbits", "nbody", "trails")
+                 and name not in SNAPSHOT_POINT_LISTS]
+FRAME_GLOBALS += ["rocket_integrator_stats"]
+FRAME_SLOTS = 2  # Double buffering: the worker fills one slot while the other is read
+simulation_worker = None  # Process, pipe and shared frame slots while the simulation runs off the GLUT thread
+
+# --- Batched Episodes ---
+EPISODE_ACTIONS = ["w", "s", "a", "d", "q", "e"]  # Action columns, named like the rocket_movement keys
+EPISODE_TICKS = 12000  # Default episode length (the mission planet appears after 7200 ticks)
+EPISODE_SHARD_SIZE = 256  # Episodes per worker job when sharding across processes
+POLICY_HOLD_TICKS = 60  # How long the random policy keeps each steering choice
+
+# --- Rocket Environment ---
+ENV_ACTIONS = ["q", "qw", "qs", "qa", "qd"]  # Discrete actions: the movement keys each one holds
+ENV_ACTION_KEYS = np.array([[key in keys for key in EPISODE_ACTIONS] for keys in ENV_ACTIONS])
+ENV_NEAREST_METEORS = 8  # Meteors reported per observation, nearest first
+ENV_SENSOR_RANGE = 250.0  # Meteors and repair parts farther than this are not observed (also the index cell size)
+ENV_CELL_BITS = 14  # Bits per cell coordinate in the spatial index keys (they wrap; only nearby cells are compared)
+ENV_NEIGHBOR_CELLS = np.array([(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1)])
+ENV_OBSERVATION_FIELDS = [  # (name, width) of the slices of a state observation, in order
+    ("meteors", ENV_NEAREST_METEORS * 4),  # Offset / ENV_SENSOR_RANGE and a present flag per meteor
+    ("health", 1),  # Health / ROCKET_MAX_HEALTH
+    ("repair", 3),  # Repair mode flag, share of REPAIR_TIME left, share of REPAIR_ITEMS_NEEDED collected
+    ("repair_items", MAX_REPAIR_ITEMS * 4),  # Offset / ENV_SENSOR_RANGE and a present flag per part
+    ("planet", 4),  # Offset / MISSION_PLANET_DISTANCE and a present flag
+    ("mission_clock", 1),  # Share of MISSION_PLANET_DELAY elapsed (capped at 1)
+]
+ENV_OBSERVATION_SIZE = sum(width for _, width in ENV_OBSERVATION_FIELDS)
+ENV_REWARDS = {  # Reward per tick survived and per event
+    "tick": 0.01, "meteor_hit": -1.0, "repair_item": 0.5, "repair": 2.0, "mission": 100.0, "game_over": -10.0,
+}
+ENV_FRAME_SIZE = (160, 128)  # Width and height of rendered frame observations
+ENV_RENDER_GLOBALS = [  # Live-game state borrowed while rendering an episode's frame
+    "scene_mode", "rocket_pos", "meteors", "broken_parts", "mission_planet_pos", "stars_mode_1",
+    "rocket_health", "game_over", "mission_complete", "repair_mode", "repair_timer", "repair_progress",
+    "sim_tick", "frame_pacer", "last_gl_stats",
+]
+
+# --- Frame Pacing ---
+TARGET_FPS = 60  # Frames per second to pace rendering to (0 = redraw as fast as possible)
+QUALITY_SCALES = [1.0, 0.75, 0.55, 0.4, 0.25]  # Governor levels, best first: scale applied to every quality knob
+QUALITY_KNOB_MINIMUMS = {  # Quality knobs (module constants) and the least the governor may turn them down to
+    "SPHERE_SLICES": 8, "SPHERE_STACKS": 6, "ASTEROID_DRAW_FRACTION": 0.1, "REPAIR_PARTICLES": 4, "SUN_GLOW_LAYERS": 1,
+}
+QUALITY_DROP_LOAD = 0.9  # Drop a level when frame work stays above this share of the frame budget
+QUALITY_RAISE_LOAD = 0.5  # Raise a level when it stays below this share (the gap stops oscillation)
+QUALITY_DROP_FRAMES = 15  # Consecutive over-budget frames before dropping a level
+QUALITY_RAISE_FRAMES = 180  # Consecutive comfortable frames before raising a level
+FRAME_TIME_SMOOTHING = 0.1  # Weight of the newest frame in the averaged frame times
+frame_pacer = None  # Budget, timing averages and governor state while frames are paced
+
+# GL call statistics of the previous frame (only with PYOPENGL_CALL_COUNTING=1)
+last_gl_stats = None
+GL_STATS_TOP_SECTIONS = 3  # How many draw functions to list in the HUD
+last_elided_calls = 0  # State calls the GL state cache dropped last frame
+
 # --- Helper Functions ---
 
+def gl_section(draw_function):
+    """Attributes a draw function's GL calls to its name (PYOPENGL_CALL_COUNTING=1)."""
+    if not callcounts.ACTIVE:
+        return draw_function
+    name = draw_function.__name__
+    
+    @functools.wraps(draw_function)
+    def counted(*args, **kwargs):
+        previous = callcounts.setSection(name)
+        try:
+            return draw_function(*args, **kwargs)
+        finally:
+            callcounts.setSection(previous)
+    return counted
+
 def normalize(v):
     """Normalize a vector to unit length."""
     length = math.sqrt(sum(x*x for x in v))
@@ -329,89 +751,1168 @@ def length(v):
     """Calculate the length of a vector."""
     return math.sqrt(sum(x*x for x in v))
 
+# --- Deterministic Simulation Functions ---
+
+def seed_simulation(seed):
+    """Seeds every subsystem RNG from one master seed."""
+    global SIM_SEED
+    SIM_SEED = seed
+    # String seeds are hashed with SHA-512, so they are stable across runs
+    star_rng.seed(f"{seed}:stars")
+    asteroid_rng.seed(f"{seed}:asteroids")
+    repair_rng.seed(f"{seed}:repair")
+    meteor_chunk_futures.clear()  # Generated from the previous seed
+
+def get_sim_time():
+    """Returns the simulation clock in seconds (derived from the tick count)."""
+    return sim_tick * SIM_TICK_SECONDS
+
+def start_recording(path):
+    """Starts recording input events to a binary file."""
+    global input_recorder
+    input_recorder = open(path, "wb")
+    input_recorder.write(RECORD_HEADER.pack(RECORD_MAGIC, RECORD_VERSION, SIM_SEED, SIM_TICK_SECONDS))
+    print(f"Recording input to {path}")
+
+def record_input_event(code, flags):
+    """Appends one input event at the current simulation tick."""
+    if input_recorder is not None:
+        input_recorder.write(RECORD_EVENT.pack(sim_tick, code, flags))
+
+def stop_recording():
+    """Writes the end marker and closes the recording file."""
+    global input_recorder
+    if input_recorder is not None:
+        record_input_event(0, EVENT_FLAG_END)
+        input_recorder.close()
+        input_recorder = None
+
+def load_recording(path):
+    """Reads a recording. Returns (seed, tick_seconds, events, end_tick)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, seed, tick_seconds = RECORD_HEADER.unpack_from(data, 0)
+    if magic != RECORD_MAGIC or version != RECORD_VERSION:
+        raise ValueError(f"{path} is not a version {RECORD_VERSION} input recording")
+    events = list(RECORD_EVENT.iter_unpack(data[RECORD_HEADER.size:]))
+    end_tick = events[-1][0] if events else 0
+    return seed, tick_seconds, events, end_tick
+
+def dispatch_input_event(code, flags):
+    """Feeds a recorded event through the same handlers as live input."""
+    if flags & EVENT_FLAG_END:
+        return
+    if flags & EVENT_FLAG_FOCUS:
+        apply_camera_focus(code)
+    elif flags & EVENT_FLAG_SPECIAL:
+        apply_special_key(code)
+    elif flags & EVENT_FLAG_DOWN:
+        apply_key_down(bytes([code]))
+    else:
+        apply_key_up(bytes([code]))
+
+def run_ticks(count, events=(), next_event=0):
+    """Runs count simulation ticks, applying recorded events on their tick.
+
+    Returns the index of the first event not yet applied.
+    """
+    end_tick = sim_tick + count
+    while sim_tick < end_tick:
+        # Apply every event recorded for this tick before stepping it
+        while next_event < len(events) and events[next_event][0] <= sim_tick:
+            dispatch_input_event(events[next_event][1], events[next_event][2])
+            next_event += 1
+        update_simulation()
+    return next_event
+
+def capture_state():
+    """Returns a deep copy of every piece of simulation state (picklable)."""
+    state = {name: copy.deepcopy(globals()[name]) for name in SNAPSHOT_GLOBALS}
+    state["rng_states"] = {name: globals()[name].getstate() for name in SNAPSHOT_RNGS}
+    return state
+
+def restore_state(state):
+    """Restores simulation state captured by capture_state()."""
+    for name in SNAPSHOT_GLOBALS:
+        globals()[name] = copy.deepcopy(state[name])
+    for name, rng_state in state["rng_states"].items():
+        globals()[name].setstate(rng_state)
+    meteor_chunk_futures.clear()  # May hold chunks of another seed
+
+# --- Scene Snapshot Functions ---
+
+def align_offset(offset):
+    """Rounds a file offset up to the snapshot block alignment."""
+    return (offset + SNAPSHOT_ALIGNMENT - 1) // SNAPSHOT_ALIGNMENT * SNAPSHOT_ALIGNMENT
+
+def snapshot_arrays():
+    """Collects the large scene arrays as name -> contiguous NumPy block."""
+    arrays = {"stars": stars}
+    for name in SNAPSHOT_ARRAY_DICTS:
+        for key, values in globals()[name].items():
+            arrays[name + "." + key] = values
+    for name in SNAPSHOT_POINT_LISTS:
+        arrays[name] = np.asarray(globals()[name], dtype=np.float64).reshape(-1, 3)
+    return {name: np.ascontiguousarray(values) for name, values in arrays.items()}
+
+def save_snapshot(path):
+    """Writes the whole simulation state to a versioned binary snapshot.
+
+    Layout: preamble (magic, version, header length), a JSON header with
+    the scalar state and an index of array blocks, then every array as a
+    raw aligned block so load_snapshot() can memory-map it.
+    """
+    arrays = snapshot_arrays()
+    index = {}
+    offset = 0
+    for name, values in arrays.items():
+        index[name] = {"dtype": values.dtype.str, "shape": list(values.shape), "offset": offset}
+        offset = align_offset(offset + values.nbytes)
+    
+    skip = {"stars"} | set(SNAPSHOT_ARRAY_DICTS) | set(SNAPSHOT_POINT_LISTS)
+    header = json.dumps({
+        "state": {name: globals()[name] for name in SNAPSHOT_GLOBALS if name not in skip},
+        "rng_states": {name: globals()[name].getstate() for name in SNAPSHOT_RNGS},
+        "arrays": index,
+    }).encode("utf-8")
+    data_start = align_offset(SNAPSHOT_PREAMBLE.size + len(header))
+    
+    with open(path, "wb") as f:
+        f.write(SNAPSHOT_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header)))
+        f.write(header)
+        for name, values in arrays.items():
+            f.seek(data_start + index[name]["offset"])
+            f.write(values.tobytes())
+    print(f"Saved snapshot to {path}")
+
+def load_snapshot(path):
+    """Restores a snapshot, memory-mapping its arrays instead of reading them.
+
+    Arrays are mapped copy-on-write, so the simulation can update them
+    without touching the file and untouched pages are never copied.
+    """
+    global stars
+    with open(path, "rb") as f:
+        magic, version, header_length = SNAPSHOT_PREAMBLE.unpack(f.read(SNAPSHOT_PREAMBLE.size))
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} scene snapshot")
+        header = json.loads(f.read(header_length).decode("utf-8"))
+    data_start = align_offset(SNAPSHOT_PREAMBLE.size + header_length)
+    
+    arrays = {}
+    for name, info in header["arrays"].items():
+        dtype = np.dtype(info["dtype"])
+        shape = tuple(info["shape"])
+        if 0 in shape:
+            arrays[name] = np.zeros(shape, dtype=dtype)  # numpy can't map empty blocks
+        else:
+            arrays[name] = np.memmap(path, dtype=dtype, mode="c", offset=data_start + info["offset"], shape=shape)
+    
+    for name, value in header["state"].items():
+        globals()[name] = value
+    for name, (rng_version, internal, gauss) in header["rng_states"].items():
+        globals()[name].setstate((rng_version, tuple(internal), gauss))
+    meteor_chunk_futures.clear()  # May hold chunks of another seed
+    stars = arrays["stars"]
+    for dict_name in SNAPSHOT_ARRAY_DICTS:
+        prefix = dict_name + "."
+        globals()[dict_name] = {name[len(prefix):]: values for name, values in arrays.items() if name.startswith(prefix)}
+    for name in SNAPSHOT_POINT_LISTS:
+        globals()[name] = arrays[name].tolist()
+    print(f"Loaded snapshot from {path} ({len(asteroids['positions'])} asteroids)")
+
+def replay_session(path):
+    """Re-runs a recorded session headlessly at maximum speed."""
+    global SIM_TICK_SECONDS
+    seed, SIM_TICK_SECONDS, events, end_tick = load_recording(path)
+    seed_simulation(seed)
+    initialize_stars()
+    initialize_asteroids()
+    initialize_orbits()
+
+    start = time.perf_counter()
+    run_ticks(end_tick, events)
+    elapsed = time.perf_counter() - start
+
+    print(f"Replayed {end_tick} ticks in {elapsed:.3f}s "
+          f"({end_tick / max(elapsed, 1e-9):.0f} ticks/s)")
+    print(f"Final state: health={rocket_health} game_over={game_over} "
+          f"mission_complete={mission_complete} rocket_pos={absolute_rocket_position()}")
+    return elapsed
+
+# --- Orbital Mechanics Functions ---
+
+def orbit_axes(semi_major_axes, eccentricities, inclinations, periapses, nodes):
+    """Returns each orbit's perifocal axes in scene coordinates, scaled by its semi-axes.
+
+    A body at eccentric anomaly E sits at p * (cos E - e) + q * sin E.
+    Angles are in radians; the ecliptic is the scene's Y=0 plane and
+    north is +Y, so with all angles zero an orbit matches the old
+    glRotatef(angle, 0, 1, 0) / glTranslatef(radius, 0, 0) circles.
+    """
+    cos_w, sin_w = np.cos(periapses), np.sin(periapses)
+    cos_n, sin_n = np.cos(nodes), np.sin(nodes)
+    cos_i, sin_i = np.cos(inclinations), np.sin(inclinations)
+    # Ecliptic (x, y, z north) maps to scene (x, z, -y)
+    p = np.stack([cos_n * cos_w - sin_n * sin_w * cos_i,
+                  sin_w * sin_i,
+                  -(sin_n * cos_w + cos_n * sin_w * cos_i)], axis=1)
+    q = np.stack([-cos_n * sin_w - sin_n * cos_w * cos_i,
+                  cos_w * sin_i,
+                  sin_n * sin_w - cos_n * cos_w * cos_i], axis=1)
+    semi_minor_axes = semi_major_axes * np.sqrt(1.0 - eccentricities ** 2)
+    return p * semi_major_axes[:, None], q * semi_minor_axes[:, None]
+
+def solve_kepler(mean_anomalies, eccentricities, iterations=KEPLER_ITERATIONS):
+    """Solves Kepler's equation M = E - e sin E for every orbit at once.
+
+    Starts from E = M + e sin M and runs a fixed number of Newton steps
+    over the whole array, so the cost only depends on the body count.
+    Works in the eccentricities' dtype (float32 is much faster for big belts).
+    """
+    mean_anomalies = mean_anomalies.astype(eccentricities.dtype, copy=False)
+    eccentric = mean_anomalies + eccentricities * np.sin(mean_anomalies)
+    for _ in range(iterations):
+        eccentric -= ((eccentric - eccentricities * np.sin(eccentric) - mean_anomalies)
+                      / (1.0 - eccentricities * np.cos(eccentric)))
+    return eccentric
+
+def orbit_positions(orbits, out=None):
+    """Returns (N, 3) positions (relative to the parent) for an orbit array dict."""
+    eccentric = solve_kepler(orbits["mean_anomalies"], orbits["eccentricities"])
+    out = np.multiply(orbits["p_axes"], (np.cos(eccentric) - orbits["eccentricities"])[:, None], out=out)
+    out += orbits["q_axes"] * np.sin(eccentric)[:, None]
+    return out
+
+def orbit_velocities(orbits):
+    """Returns (N, 3) velocities (scene units per tick, relative to the parent)."""
+    eccentricities = orbits["eccentricities"]
+    eccentric = solve_kepler(orbits["mean_anomalies"], eccentricities)
+    rates = orbits["motions"] / (1.0 - eccentricities * np.cos(eccentric))  # dE/dtick
+    return (orbits["q_axes"] * (rates * np.cos(eccentric))[:, None]
+            - orbits["p_axes"] * (rates * np.sin(eccentric))[:, None])
+
+def orbit_anomalies(orbits, time, out=None):
+    """Mean anomalies at orbit clock time, straight from the epoch anomalies.
+
+    Nothing accumulates from tick to tick, so any time is reached with
+    the same O(bodies) cost and the same rounding.
+    """
+    out = np.multiply(orbits["motions"], time, out=out)
+    out += orbits["epoch_anomalies"]
+    # fmod is far cheaper than np.mod; negative anomalies (seeking back) are fine for Kepler's equation
+    return np.fmod(out, 2 * math.pi, out=out)
+
+def update_planet_positions():
+    """Recomputes planet and moon positions from their current mean anomalies."""
+    offsets = orbit_positions(planet_orbits, out=planet_orbits["offsets"])
+    parents = planet_orbits["parents"]
+    moons = parents >= 0
+    planet_orbits["positions"][:] = offsets
+    planet_orbits["positions"][moons] += offsets[parents[moons]]
+
+def set_orbit_time(time):
+    """Moves every Keplerian body and the Earth's spin to orbit clock time."""
+    global orbit_time, earth_rotation_angle
+    orbit_time = time
+    earth_rotation_angle = (earth_rotation_epoch + EARTH_ROTATION_SPEED * time) % 360.0
+    orbit_anomalies(planet_orbits, time, out=planet_orbits["mean_anomalies"])
+    update_planet_positions()
+    if not nbody_mode:  # Free-falling asteroids aren't on their orbits
+        orbit_anomalies(asteroids, time, out=asteroids["mean_anomalies"])
+        orbit_positions(asteroids, out=asteroids["positions"])
+
+def seek_time(time):
+    """Jumps the solar system to any orbit time, however far away.
+
+    N-body motion has no closed form, so the bodies return to their
+    Keplerian orbits first. The rocket and the tick counter are untouched.
+    """
+    if nbody_mode:
+        stop_nbody()
+    set_orbit_time(time)
+    reset_trails()  # Don't draw a streak across the jump
+
+def state_at(time):
+    """Closed-form solar system state at orbit clock time, without touching the live state.
+
+    Returns mean anomalies and positions (planets and moons relative to
+    the Sun, moons also relative to their planet) plus the Earth's spin.
+    """
+    planets = dict(planet_orbits, mean_anomalies=orbit_anomalies(planet_orbits, time))
+    belt = dict(asteroids, mean_anomalies=orbit_anomalies(asteroids, time))
+    offsets = orbit_positions(planets)
+    positions = offsets.copy()
+    parents = planets["parents"]
+    moons = parents >= 0
+    positions[moons] += offsets[parents[moons]]
+    return {
+        "time": time,
+        "planet_anomalies": planets["mean_anomalies"],
+        "planet_offsets": offsets,
+        "planet_positions": positions,
+        "asteroid_anomalies": belt["mean_anomalies"],
+        "asteroid_positions": orbit_positions(belt).astype(np.float32),
+        "earth_rotation_angle": (earth_rotation_epoch + EARTH_ROTATION_SPEED * time) % 360.0,
+    }
+
+def initialize_orbits():
+    """Builds the planet/moon orbit arrays from ORBITAL_ELEMENTS."""
+    global planet_orbits
+    columns = list(zip(*[elements[1:] for elements in ORBITAL_ELEMENTS]))
+    parents = np.array([-1 if parent is None else BODY_INDEX[parent] for parent in columns[0]], dtype=np.int32)
+    semi_major_axes, eccentricities = np.array(columns[1]), np.array(columns[2])
+    inclinations, periapses, nodes, anomalies = (np.radians(column) for column in columns[3:7])
+    p_axes, q_axes = orbit_axes(semi_major_axes, eccentricities, inclinations, periapses, nodes)
+    
+    # Closed orbit lines for the planets (moons are too small to need them)
+    planets = parents < 0
+    eccentric = np.linspace(0.0, 2 * math.pi, ORBIT_LINE_SEGMENTS, endpoint=False)
+    lines = (p_axes[planets, None, :] * (np.cos(eccentric)[None, :] - eccentricities[planets, None])[:, :, None]
+             + q_axes[planets, None, :] * np.sin(eccentric)[None, :, None])
+    
+    planet_orbits = {
+        "parents": parents,
+        "eccentricities": eccentricities,
+        "mean_anomalies": anomalies.copy(),
+        "epoch_anomalies": anomalies,  # At orbit time 0
+        "motions": np.array(columns[7]),
+        "p_axes": p_axes,
+        "q_axes": q_axes,
+        "offsets": np.zeros((len(parents), 3)),  # Relative to the parent body
+        "positions": np.zeros((len(parents), 3)),  # Relative to the Sun
+        "orbit_lines": lines.reshape(-1, 3).astype(np.float32),
+    }
+    update_planet_positions()
+    reset_trails()
+
+# --- Event Search Functions ---
+
+def orbit_states(times, bodies=None, velocities=True):
+    """Closed-form planet and moon states at many orbit times at once.
+
+    bodies -- body indices, (B,) or (1, B) at every time or (T, B) per
+        time (default: all bodies)
+    Returns (T, B, 3) positions relative to the Sun and velocities in
+    scene units per orbit tick (None with velocities=False).
+    """
+    orbits = planet_orbits
+    times = np.asarray(times, dtype=np.float64)
+    bodies = np.arange(len(orbits["parents"])) if bodies is None else np.asarray(bodies)
+    parents = orbits["parents"][bodies]
+    hosts = np.where(parents >= 0, parents, bodies)  # Planets stand in for their own missing parent
+    if bodies.ndim == 1 or len(bodies) == 1:
+        # Same bodies at every time: evaluate each body (and moon's planet) once
+        needed, lookup = np.unique(np.concatenate((bodies.ravel(), hosts.ravel())), return_inverse=True)
+        own, host = np.split(lookup, 2)
+        needed = needed[None, :]
+    else:
+        needed = np.concatenate((bodies, hosts), axis=1)
+        own, host = np.split(np.arange(needed.shape[1]), 2)
+    eccentricities = orbits["eccentricities"][needed]
+    anomalies = np.fmod(orbits["motions"][needed] * times[:, None] + orbits["epoch_anomalies"][needed], 2 * math.pi)
+    eccentric = solve_kepler(anomalies, eccentricities)
+    cosines, sines = np.cos(eccentric), np.sin(eccentric)
+    p_axes, q_axes = orbits["p_axes"][needed], orbits["q_axes"][needed]
+    moons = (parents >= 0).reshape(-1, own.size)[..., None]
+    
+    def heliocentric(relative):
+        if not moons.any():
+            return relative[:, own]
+        return relative[:, own] + np.where(moons, relative[:, host], 0.0)
+    
+    positions = heliocentric(p_axes * (cosines - eccentricities)[..., None] + q_axes * sines[..., None])
+    if not velocities:
+        return positions, None
+    rates = orbits["motions"][needed] / (1.0 - eccentricities * cosines)  # dE/dtick
+    return positions, heliocentric(q_axes * (rates * cosines)[..., None] - p_axes * (rates * sines)[..., None])
+
+def bracket_roots(function, columns, start, end, step):
+    """Finds every sign change of a set of event functions over [start, end].
+
+    function(times, columns) evaluates the events in the (T, K) column
+    array at each time. All events are sampled every step in vectorized
+    blocks; the brackets found are then refined together by the Illinois
+    method, evaluating just their own column. Returns the root times,
+    their columns and whether each value rises through zero there.
+    """
+    brackets = []
+    block_start = start
+    while block_start < end:
+        count = min(EVENT_BLOCK_SAMPLES, int(math.ceil((end - block_start) / step)))
+        times = block_start + step * np.arange(count + 1)
+        times[-1] = min(times[-1], end)
+        values = function(times, columns[None, :])
+        positive = values > 0.0
+        rows, found = np.nonzero(positive[:-1] != positive[1:])
+        brackets.append((times[rows], times[rows + 1], values[rows, found], values[rows + 1, found], found))
+        block_start = times[-1]
+    if not brackets:
+        return np.zeros(0), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+    low, high, low_values, high_values, found = (np.concatenate(parts) for parts in zip(*brackets))
+    rising = high_values > 0.0
+    kept = np.zeros(len(low), dtype=np.int8)  # End the last iteration kept: 1 low, -1 high
+    roots = high.copy()
+    for _ in range(EVENT_ROOT_ITERATIONS):
+        previous = roots
+        roots = high - high_values * (high - low) / (high_values - low_values)
+        values = function(roots, columns[found][:, None])[:, 0]
+        replace_high = (values > 0.0) == rising
+        # Illinois: halve the value at an end kept twice in a row, so it can't stall there
+        low_values = np.where(replace_high & (kept == 1), 0.5 * low_values, low_values)
+        high_values = np.where(~replace_high & (kept == -1), 0.5 * high_values, high_values)
+        high = np.where(replace_high, roots, high)
+        high_values = np.where(replace_high, values, high_values)
+        low = np.where(replace_high, low, roots)
+        low_values = np.where(replace_high, low_values, values)
+        kept = np.where(replace_high, 1, -1).astype(np.int8)
+        if np.all(np.abs(roots - previous) < EVENT_TIME_TOLERANCE):
+            break
+    return roots, columns[found], rising
+
+def find_alignments(start, end):
+    """Conjunctions and oppositions of every pair of planets, in heliocentric longitude."""
+    planets = np.flatnonzero(planet_orbits["parents"] < 0)
+    first, second = (planets[indices] for indices in np.triu_indices(len(planets), 1))
+    
+    def pair_positions(times, columns):
+        positions = orbit_states(times, np.concatenate((first[columns], second[columns]), axis=1), False)[0]
+        return np.split(positions, 2, axis=1)
+    
+    def longitude_offsets(times, columns):
+        # Sign of the sine of the longitude difference in the ecliptic (scene X/Z) plane
+        a, b = pair_positions(times, columns)
+        return a[..., 2] * b[..., 0] - a[..., 0] * b[..., 2]
+    
+    step = 2 * math.pi / (planet_orbits["motions"][planets].max() * EVENT_SAMPLES_PER_TURN)
+    times, pairs, _ = bracket_roots(longitude_offsets, np.arange(len(first)), start, end, step)
+    a, b = pair_positions(times, pairs[:, None])
+    same_side = np.einsum("ij,ij->i", a[:, 0], b[:, 0]) > 0.0
+    return [{"time": float(time), "kind": "conjunction" if together else "opposition",
+             "bodies": (BODY_NAMES[first[pair]], BODY_NAMES[second[pair]])}
+            for time, pair, together in zip(times, pairs, same_side)]
+
+def find_transits(start, end):
+    """Moons crossing in front of (transit) or behind (occultation) their planet's disc, seen from the Sun."""
+    moons = np.flatnonzero(planet_orbits["parents"] >= 0)
+    hosts = planet_orbits["parents"][moons]
+    
+    def moon_offsets(times, columns):
+        positions = orbit_states(times, np.concatenate((moons[columns], hosts[columns]), axis=1), False)[0]
+        planets = positions[:, columns.shape[1]:]
+        offsets = positions[:, :columns.shape[1]] - planets
+        along = np.einsum("tkj,tkj->tk", offsets, planets) / np.linalg.norm(planets, axis=2)
+        return offsets, along
+    
+    def disc_offsets(times, columns):
+        # Negative while the moon is inside the planet's disc as seen from the Sun
+        offsets, along = moon_offsets(times, columns)
+        return np.einsum("tkj,tkj->tk", offsets, offsets) - along * along - BODY_RADII[hosts[columns]] ** 2
+    
+    step = 2 * math.pi / (planet_orbits["motions"][moons].max() * EVENT_SAMPLES_PER_TURN)
+    times, columns, rising = bracket_roots(disc_offsets, np.arange(len(moons)), start, end, step)
+    sunward = moon_offsets(times, columns[:, None])[1][:, 0] < 0.0
+    return [{"time": float(time), "kind": ("transit" if front else "occultation") + ("_end" if leaving else "_start"),
+             "bodies": (BODY_NAMES[moons[column]], BODY_NAMES[hosts[column]])}
+            for time, column, front, leaving in zip(times, columns, sunward, rising)]
+
+def record_rocket_path(ticks):
+    """Flies the solar-system rocket ticks ahead (as update_simulation() would) and puts everything back.
+
+    Returns {"times": orbit times, "positions": rocket positions}, one
+    row per tick including the current one.
+    """
+    state = capture_state()
+    times = [orbit_time]
+    positions = [rocket_position[:]]
+    try:
+        for _ in range(ticks):
+            update_simulation()
+            times.append(orbit_time)
+            positions.append(rocket_position[:])
+    finally:
+        restore_state(state)
+    return {"times": np.array(times), "positions": np.array(positions)}
+
+def find_closest_approaches(path):
+    """The rocket's closest approaches to the Sun and every planet and moon along a path.
+
+    path -- record_rocket_path() output. The rocket is interpolated
+    between ticks with cubic Hermite segments, the bodies are evaluated
+    in closed form; minima are where the range rate turns positive.
+    """
+    times, positions = path["times"], path["positions"]
+    slopes = np.gradient(positions, axis=0)  # Per path tick
+    last = len(times) - 2
+    bodies = np.arange(len(BODY_NAMES) + 1) - 1  # -1 is the Sun
+    
+    def relative_states(ticks, columns):
+        index = np.minimum(ticks.astype(np.int64), last)
+        u = (ticks - index)[:, None]
+        u2, u3 = u * u, u * u * u
+        p0, p1, m0, m1 = positions[index], positions[index + 1], slopes[index], slopes[index + 1]
+        rocket = ((2 * u3 - 3 * u2 + 1) * p0 + (u3 - 2 * u2 + u) * m0
+                  + (-2 * u3 + 3 * u2) * p1 + (u3 - u2) * m1)
+        rocket_velocity = ((6 * u2 - 6 * u) * p0 + (3 * u2 - 4 * u + 1) * m0
+                           + (-6 * u2 + 6 * u) * p1 + (3 * u2 - 2 * u) * m1)
+        time_rates = times[index + 1] - times[index]  # Orbit ticks per path tick
+        sun = (bodies[columns] < 0)[..., None]
+        body_positions, body_velocities = orbit_states(times[index] + time_rates * u[:, 0],
+                                                       np.maximum(bodies[columns], 0))
+        offsets = rocket[:, None] - np.where(sun, 0.0, body_positions)
+        velocities = rocket_velocity[:, None] - np.where(sun, 0.0, body_velocities * time_rates[:, None, None])
+        return offsets, velocities
+    
+    def range_rates(ticks, columns):
+        offsets, velocities = relative_states(ticks, columns)
+        return np.einsum("tbj,tbj->tb", offsets, velocities)
+    
+    if last < 0:
+        return []
+    ticks, columns, rising = bracket_roots(range_rates, np.arange(len(bodies)), 0.0, float(last + 1), 1.0)
+    ticks, columns = ticks[rising], columns[rising]
+    distances = np.linalg.norm(relative_states(ticks, columns[:, None])[0][:, 0], axis=1)
+    index = np.minimum(ticks.astype(np.int64), last)
+    orbit_times = times[index] + (times[index + 1] - times[index]) * (ticks - index)
+    names = ["sun"] + BODY_NAMES
+    return [{"time": float(time), "kind": "closest_approach", "bodies": ("rocket", names[column]),
+             "tick": float(tick), "distance": float(distance)}
+            for time, tick, column, distance in zip(orbit_times, ticks, columns, distances)]
+
+def find_events(start, end, kinds=EVENT_KINDS, rocket_path=None):
+    """Every event between orbit times start and end, sorted by time.
+
+    kinds -- any of EVENT_KINDS; closest approaches need a rocket_path
+        (see record_rocket_path()) and cover that path
+    Each event is a dict with "time", "kind" and "bodies" (closest
+    approaches also carry "tick" along the path and "distance").
+    """
+    events = []
+    if "alignment" in kinds:
+        events += find_alignments(start, end)
+    if "transit" in kinds:
+        events += find_transits(start, end)
+    if "closest_approach" in kinds and rocket_path is not None:
+        events += find_closest_approaches(rocket_path)
+    return sorted(events, key=lambda event: event["time"])
+
+def format_event(event):
+    """One line describing an event, for printing."""
+    text = f"t={event['time']:.3f} {event['kind']} {' '.join(event['bodies'])}"
+    if "distance" in event:
+        text += f" distance={event['distance']:.2f}"
+    return text
+
+# --- Ephemeris Functions ---
+
+def chebyshev_fit_matrix(degree):
+    """Maps values at the degree + 1 Chebyshev nodes to the coefficients of their interpolant."""
+    count = degree + 1
+    angles = math.pi * (np.arange(count) + 0.5) / count
+    matrix = 2.0 / count * np.cos(np.outer(np.arange(count), angles))
+    matrix[0] *= 0.5
+    return matrix, np.cos(angles)
+
+def build_ephemeris(start, end, method="hermite", step=None, degree=EPHEMERIS_DEGREE):
+    """Tabulates every planet and moon over [start, end] orbit ticks, once.
+
+    hermite -- float32 positions and velocities every step ticks
+        (default EPHEMERIS_STEP), interpolated by cubic Hermite
+    chebyshev -- float32 Chebyshev coefficients of the given degree for
+        segments of step ticks (default EPHEMERIS_SEGMENT)
+    The bodies are sampled with orbit_states() in vectorized blocks.
+    """
+    if method not in EPHEMERIS_METHODS:
+        raise ValueError(f"Unknown ephemeris method: {method}")
+    bodies = np.arange(len(planet_orbits["parents"]))
+    if method == "hermite":
+        step = step or EPHEMERIS_STEP
+        count = int(math.ceil((end - start) / step)) + 1
+        table = {"positions": np.empty((count, len(bodies), 3), dtype=np.float32),
+                 "velocities": np.empty((count, len(bodies), 3), dtype=np.float32)}
+        for first in range(0, count, EVENT_BLOCK_SAMPLES):
+            rows = slice(first, min(count, first + EVENT_BLOCK_SAMPLES))
+            positions, velocities = orbit_states(start + step * np.arange(rows.start, rows.stop), bodies)
+            table["positions"][rows] = positions
+            table["velocities"][rows] = velocities
+        end = start + step * (count - 1)
+    else:
+        step = step or EPHEMERIS_SEGMENT
+        count = max(1, int(math.ceil((end - start) / step)))
+        matrix, nodes = chebyshev_fit_matrix(degree)
+        table = {"coefficients": np.empty((count, degree + 1, len(bodies), 3), dtype=np.float32)}
+        segments_per_block = max(1, EVENT_BLOCK_SAMPLES // (degree + 1))
+        for first in range(0, count, segments_per_block):
+            rows = slice(first, min(count, first + segments_per_block))
+            segment_starts = start + step * np.arange(rows.start, rows.stop)
+            times = segment_starts[:, None] + 0.5 * step * (nodes + 1.0)[None, :]
+            positions, _ = orbit_states(times.ravel(), bodies, velocities=False)
+            positions = positions.reshape(len(segment_starts), degree + 1, len(bodies), 3)
+            table["coefficients"][rows] = np.einsum("jk,skbc->sjbc", matrix, positions)
+        end = start + step * count
+    table.update({"method": method, "start": float(start), "end": float(end), "step": float(step),
+                  "count": count, "bodies": bodies.astype(np.int32)})
+    return table
+
+def ephemeris_positions(table, times, bodies=None):
+    """Interpolated float32 (T, B, 3) positions relative to the Sun from an ephemeris table.
+
+    Every lookup gathers the surrounding table rows and combines them in
+    one pass of float32 array math (a batched matrix product for the
+    Chebyshev basis), however many times and bodies are asked for at once.
+    bodies are indices into the table's bodies (default: all of them).
+    """
+    times = np.atleast_1d(np.asarray(times, dtype=np.float64))
+    if times.size and (times.min() < table["start"] or times.max() > table["end"]):
+        raise ValueError(f"Times outside the ephemeris table [{table['start']}, {table['end']}]")
+    
+    def gather(values, rows):
+        # Whole rows are one contiguous copy each; a body subset needs a second index
+        return values[rows] if bodies is None else values[rows[:, None], np.asarray(bodies)[None, :]]
+    
+    scaled = (times - table["start"]) / table["step"]
+    if table["method"] == "hermite":
+        rows = np.minimum(scaled.astype(np.int64), table["count"] - 2)
+        s = (scaled - rows).astype(np.float32)[:, None, None]
+        s2, s3 = s * s, s * s * s
+        step = np.float32(table["step"])
+        positions, velocities = table["positions"], table["velocities"]
+        out = gather(positions, rows) * (2.0 * s3 - 3.0 * s2 + 1.0)
+        out += gather(velocities, rows) * ((s3 - 2.0 * s2 + s) * step)
+        out += gather(positions, rows + 1) * (3.0 * s2 - 2.0 * s3)
+        out += gather(velocities, rows + 1) * ((s3 - s2) * step)
+        return out
+    rows = np.minimum(scaled.astype(np.int64), table["count"] - 1)
+    x = (2.0 * (scaled - rows) - 1.0).astype(np.float32)
+    coefficients = table["coefficients"]  # (segments, degree + 1, bodies, 3)
+    terms = coefficients.shape[1]
+    if bodies is None:
+        coefficients = coefficients[rows]
+    else:
+        coefficients = coefficients[rows[:, None, None], np.arange(terms)[None, :, None], np.asarray(bodies)[None, None, :]]
+    basis = np.empty((len(times), 1, terms), dtype=np.float32)
+    basis[:, 0, 0] = 1.0
+    basis[:, 0, 1] = x
+    for j in range(2, terms):
+        basis[:, 0, j] = 2.0 * x * basis[:, 0, j - 1] - basis[:, 0, j - 2]
+    return (basis @ coefficients.reshape(len(times), terms, -1)).reshape(len(times), -1, 3)
+
+def save_ephemeris(path, table):
+    """Writes an ephemeris table in the snapshot layout (preamble, JSON header, aligned blocks)."""
+    arrays = {name: np.ascontiguousarray(values) for name, values in table.items() if isinstance(values, np.ndarray)}
+    index = {}
+    offset = 0
+    for name, values in arrays.items():
+        index[name] = {"dtype": values.dtype.str, "shape": list(values.shape), "offset": offset}
+        offset = align_offset(offset + values.nbytes)
+    header = json.dumps({
+        "table": {name: value for name, value in table.items() if name not in arrays},
+        "elements": ORBITAL_ELEMENTS,
+        "arrays": index,
+    }).encode("utf-8")
+    data_start = align_offset(SNAPSHOT_PREAMBLE.size + len(header))
+
+    with open(path, "wb") as f:
+        f.write(SNAPSHOT_PREAMBLE.pack(EPHEMERIS_MAGIC, EPHEMERIS_VERSION, len(header)))
+        f.write(header)
+        for name, values in arrays.items():
+            f.seek(data_start + index[name]["offset"])
+            f.write(values.tobytes())
+    print(f"Saved {table['method']} ephemeris to {path}")
+
+def load_ephemeris(path, mmap=True):
+    """Opens an ephemeris table, memory-mapping its arrays read-only by default.
+
+    Only the pages a lookup touches are read, so a table far larger than
+    the times actually used costs nothing to open.
+    """
+    with open(path, "rb") as f:
+        magic, version, header_length = SNAPSHOT_PREAMBLE.unpack(f.read(SNAPSHOT_PREAMBLE.size))
+        if magic != EPHEMERIS_MAGIC or version != EPHEMERIS_VERSION:
+            raise ValueError(f"{path} is not a version {EPHEMERIS_VERSION} ephemeris table")
+        header = json.loads(f.read(header_length).decode("utf-8"))
+    if header["elements"] != json.loads(json.dumps(ORBITAL_ELEMENTS)):
+        raise ValueError(f"{path} was built for different orbital elements")
+    data_start = align_offset(SNAPSHOT_PREAMBLE.size + header_length)
+
+    table = dict(header["table"])
+    for name, info in header["arrays"].items():
+        dtype = np.dtype(info["dtype"])
+        shape = tuple(info["shape"])
+        if mmap:
+            table[name] = np.memmap(path, dtype=dtype, mode="r", offset=data_start + info["offset"], shape=shape)
+        else:
+            table[name] = np.fromfile(path, dtype=dtype, count=int(np.prod(shape)),
+                                      offset=data_start + info["offset"]).reshape(shape)
+    return table
+
+def body_positions(times, bodies=None):
+    """Planet and moon positions at orbit times, read from the loaded ephemeris when it covers them.
+
+    Falls back to evaluating the closed-form orbits. Returns (T, B, 3).
+    """
+    times = np.atleast_1d(np.asarray(times, dtype=np.float64))
+    if ephemeris is not None and ephemeris["start"] <= times.min() and times.max() <= ephemeris["end"]:
+        return ephemeris_positions(ephemeris, times, bodies)
+    return orbit_states(times, bodies, velocities=False)[0]
+
+# --- N-body Gravity Functions ---
+
+def spread_bits(values):
+    """Spreads the low 10 bits of each integer so two zero bits sit between them."""
+    values = values & 0x3FF
+    values = (values | (values << 16)) & 0x030000FF
+    values = (values | (values << 8)) & 0x0300F00F
+    values = (values | (values << 4)) & 0x030C30C3
+    return (values | (values << 2)) & 0x09249249
+
+def tree_depth(count):
+    """Octree depth that leaves about NBODY_LEAF_PARTICLES particles per leaf."""
+    depth = math.ceil(math.log(max(count / NBODY_LEAF_PARTICLES, 1.0), 4))
+    return max(1, min(NBODY_MAX_TREE_LEVELS, depth))
+
+def expand_ranges(starts, counts):
+    """Concatenates range(start, start + count) for every entry.
+
+    Returns (owners, values): the entry each value came from, and the values.
+    """
+    owners = np.repeat(np.arange(len(counts)), counts)
+    values = np.arange(owners.size) - np.repeat(np.cumsum(counts) - counts, counts) + starts[owners]
+    return owners, values
+
+def build_octree(positions, masses, levels):
+    """Builds a linear Barnes-Hut octree from Morton-sorted particles.
+
+    Returns (tree, order): tree is one node table per level, root first,
+    each with the cells' keys, total mass, centre of mass, radius (the
+    farthest particle from the centre of mass), parent cell and the range
+    of child cells on the next level. order sorts the particles by Morton
+    key; the leaf table also gets each leaf's range of sorted particles
+    ("first", "count") and each sorted particle's leaf ("ids").
+    """
+    lower = positions.min(axis=0)
+    size = float((positions.max(axis=0) - lower).max()) * (1.0 + 1e-9) or 1.0
+    cells = np.clip(((positions - lower) * ((1 << levels) / size)).astype(np.int64), 0, (1 << levels) - 1)
+    keys = spread_bits(cells[:, 0]) | (spread_bits(cells[:, 1]) << 1) | (spread_bits(cells[:, 2]) << 2)
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    positions = positions[order]
+    masses = masses[order]
+    first = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    count = np.diff(np.append(first, len(keys)))
+    
+    # Sum the particles into leaf cells, then each level's cells into their parents
+    keys = keys[first]
+    mass = np.add.reduceat(masses, first)
+    weighted = np.add.reduceat(positions * masses[:, None], first, axis=0)
+    ids = np.repeat(np.arange(len(first)), count)
+    offsets = positions - (weighted / mass[:, None])[ids]
+    radius = np.sqrt(np.maximum.reduceat(np.einsum("ij,ij->i", offsets, offsets), first))
+    tree = [{"keys": keys, "mass": mass, "com": weighted / mass[:, None], "radius": radius,
+             "first": first, "count": count, "ids": ids}]
+    for level in range(levels):
+        children = tree[-1]
+        parent_keys = keys >> 3
+        first = np.flatnonzero(np.concatenate(([True], parent_keys[1:] != parent_keys[:-1])))
+        count = np.diff(np.append(first, len(keys)))
+        keys = parent_keys[first]
+        mass = np.add.reduceat(mass, first)
+        weighted = np.add.reduceat(weighted, first, axis=0)
+        com = weighted / mass[:, None]
+        parent = np.repeat(np.arange(len(first)), count)
+        reach = np.linalg.norm(children["com"] - com[parent], axis=1) + children["radius"]
+        children["parent"] = parent
+        tree.append({"keys": keys, "mass": mass, "com": com, "radius": np.maximum.reduceat(reach, first),
+                     "child_start": first, "child_end": first + count})
+    tree.reverse()
+    return tree, order
+
+def expand_pairs(targets, sources, target_tables, source_tables):
+    """Every (target child, source child) combination of the given cell pairs."""
+    target_start = target_tables["child_start"][targets]
+    source_start = source_tables["child_start"][sources]
+    source_counts = source_tables["child_end"][sources] - source_start
+    counts = (target_tables["child_end"][targets] - target_start) * source_counts
+    owners, local = expand_ranges(np.zeros(len(counts), dtype=np.int64), counts)
+    return target_start[owners] + local // source_counts[owners], source_start[owners] + local % source_counts[owners]
+
+def tree_accelerations(positions, masses, theta=NBODY_THETA, softening=NBODY_SOFTENING, levels=None):
+    """Self-gravity of a particle cloud via a Barnes-Hut octree, O(n log n).
+
+    The tree is walked cell against cell, one level at a time. Two cells
+    far enough apart ((radius + radius) < theta * distance) interact as
+    point masses, expanded to first order (field plus tidal gradient)
+    around the receiving cell's centre of mass; otherwise both are opened
+    into their children. The expansions are then passed down to the
+    leaves and on to the particles, and leaf cells that are still too
+    close at the bottom level are summed particle by particle.
+    """
+    levels = levels or tree_depth(len(positions))
+    tree, order = build_octree(positions, masses, levels)
+    positions = positions[order]
+    masses = masses[order]
+    eps2 = softening * softening
+    
+    # Far-field acceleration at each cell's centre of mass and its gradient
+    fields = [np.zeros((len(table["mass"]), 3)) for table in tree]
+    tidals = [np.zeros((len(table["mass"]), 3, 3)) for table in tree]
+    targets = sources = np.zeros(1, dtype=np.int64)  # The root against itself
+    for level, table in enumerate(tree):
+        delta = table["com"][sources] - table["com"][targets]
+        distance2 = np.einsum("ij,ij->i", delta, delta)
+        reach = table["radius"][targets] + table["radius"][sources]
+        far = reach * reach < theta * theta * distance2
+        
+        delta, target = delta[far], targets[far]
+        distance2 = distance2[far] + eps2
+        weight = table["mass"][sources[far]] / (distance2 * np.sqrt(distance2))
+        count = len(table["mass"])
+        for i in range(3):
+            fields[level][:, i] = np.bincount(target, weights=weight * delta[:, i], minlength=count)
+            for j in range(i, 3):
+                # d(acceleration_i)/dx_j = m (3 d_i d_j / r^5 - delta_ij / r^3)
+                gradient = weight * (3.0 * delta[:, i] * delta[:, j] / distance2 - (i == j))
+                tidals[level][:, i, j] = tidals[level][:, j, i] = np.bincount(target, weights=gradient, minlength=count)
+        
+        targets, sources = targets[~far], sources[~far]
+        if level < levels:
+            targets, sources = expand_pairs(targets, sources, table, table)
+    
+    # Pass each cell's expansion down to its children, shifted to their centres of mass
+    for table, children, level in zip(tree, tree[1:], range(levels)):
+        parent = children["parent"]
+        shift = children["com"] - table["com"][parent]
+        fields[level + 1] += fields[level][parent] + np.einsum("nij,nj->ni", tidals[level][parent], shift)
+        tidals[level + 1] += tidals[level][parent]
+    leaves = tree[-1]
+    shift = positions - leaves["com"][leaves["ids"]]
+    accelerations = fields[-1][leaves["ids"]] + np.einsum("nij,nj->ni", tidals[-1][leaves["ids"]], shift)
+    
+    # Remaining neighbour leaves: direct particle-particle sums, in chunks to bound memory
+    pair_counts = leaves["count"][targets] * leaves["count"][sources]
+    bounds = np.searchsorted(np.cumsum(pair_counts), np.arange(0, pair_counts.sum(), NBODY_DIRECT_CHUNK), side="right")
+    particles = {"child_start": leaves["first"], "child_end": leaves["first"] + leaves["count"]}
+    for begin, end in zip(np.append(0, bounds[1:]), np.append(bounds[1:], len(pair_counts))):
+        receivers, senders = expand_pairs(targets[begin:end], sources[begin:end], particles, particles)
+        delta = positions[senders] - positions[receivers]
+        distance2 = np.einsum("ij,ij->i", delta, delta) + eps2
+        weight = masses[senders] / (distance2 * np.sqrt(distance2))  # A particle's own term is zero
+        for i in range(3):
+            accelerations[:, i] += np.bincount(receivers, weights=weight * delta[:, i], minlength=len(positions))
+    
+    result = np.empty_like(accelerations)
+    result[order] = accelerations
+    return result
+
+def gravity_sources():
+    """Returns (positions, GMs) of the Sun and planets, the bodies everything else feels."""
+    planets = np.flatnonzero(planet_orbits["parents"] < 0)
+    names = [ORBITAL_ELEMENTS[i][0] for i in planets]
+    positions = np.vstack([np.zeros((1, 3)), planet_orbits["positions"][planets]])
+    gms = NBODY_SUN_GM * np.array([1.0] + [NBODY_PLANET_MASS_RATIOS[name] for name in names])
+    return positions, gms
+
+def point_mass_accelerations(positions, source_positions, source_gms, softening=NBODY_SOFTENING):
+    """Direct-sum softened gravity of a few point masses on many particles."""
+    accelerations = np.zeros_like(positions)
+    for source, gm in zip(source_positions, source_gms):
+        delta = source - positions
+        distance2 = np.einsum("ij,ij->i", delta, delta) + softening * softening
+        accelerations += delta * (gm / (distance2 * np.sqrt(distance2)))[:, None]
+    return accelerations
+
+def asteroid_accelerations(positions):
+    """Sun and planets directly, plus the belt's own gravity through the octree."""
+    accelerations = point_mass_accelerations(positions, *gravity_sources())
+    if NBODY_BELT_GM > 0.0 and len(positions) > 1:
+        accelerations += tree_accelerations(positions, nbody["asteroid_gms"])
+    return accelerations
+
+def moon_accelerations(offsets):
+    """Accelerations of the moons relative to their planets.
+
+    At the scene's compressed scale a planet heavy enough to hold its
+    moons would scatter the asteroid belt, so each moon feels its own
+    planet with the mass implied by its orbit, plus the tidal pull
+    (difference between moon and planet) of the Sun and the planets.
+    """
+    moons = nbody["moons"]
+    parent_positions = planet_orbits["positions"][planet_orbits["parents"][moons]]
+    distance2 = np.einsum("ij,ij->i", offsets, offsets)
+    accelerations = -offsets * (nbody["moon_gms"] / (distance2 * np.sqrt(distance2)))[:, None]
+    parents = planet_orbits["parents"][moons]
+    sources, gms = gravity_sources()
+    for source, gm, planet in zip(sources, gms, [-1] + list(np.flatnonzero(planet_orbits["parents"] < 0))):
+        outside = parents != planet  # The own planet is handled above
+        planet_positions = parent_positions[outside]
+        accelerations[outside] += (
+            point_mass_accelerations(planet_positions + offsets[outside], [source], [gm])
+            - point_mass_accelerations(planet_positions, [source], [gm]))
+    return accelerations
+
+def leapfrog_step(positions, velocities, accelerations, acceleration_function, dt):
+    """Kick-drift-kick leapfrog step (symplectic), updating the arrays in place.
+
+    accelerations must hold the values for the current positions and are
+    left holding those for the new ones, so each step costs one force pass.
+    """
+    velocities += accelerations * (0.5 * dt)
+    positions += velocities * dt
+    accelerations[:] = acceleration_function(positions)
+    velocities += accelerations * (0.5 * dt)
+
+def start_nbody():
+    """Switches to N-body gravity, seeding velocities from the current orbits."""
+    global nbody_mode, nbody
+    moons = np.flatnonzero(planet_orbits["parents"] >= 0)
+    semi_major_axes = np.linalg.norm(planet_orbits["p_axes"][moons], axis=1)
+    volumes = asteroids["sizes"].astype(np.float64) ** 3
+    nbody = {
+        "asteroid_positions": asteroids["positions"].astype(np.float64),
+        "asteroid_velocities": orbit_velocities(asteroids).astype(np.float64),
+        "asteroid_gms": NBODY_BELT_GM * volumes / max(volumes.sum(), 1e-12),
+        "moons": moons,
+        "moon_gms": planet_orbits["motions"][moons] ** 2 * semi_major_axes ** 3,
+        "moon_offsets": planet_orbits["offsets"][moons].copy(),
+        "moon_velocities": orbit_velocities(planet_orbits)[moons],
+    }
+    nbody["asteroid_accelerations"] = asteroid_accelerations(nbody["asteroid_positions"])
+    nbody["moon_accelerations"] = moon_accelerations(nbody["moon_offsets"])
+    nbody_mode = True
+
+def stop_nbody():
+    """Returns every body to its Keplerian orbit."""
+    global nbody_mode, nbody
+    nbody_mode = False
+    nbody = {}
+    set_orbit_time(orbit_time)  # Back where their orbits have carried them meanwhile
+
+def circular_velocity(position):
+    """Velocity of a circular orbit around the Sun through position (in the XZ plane)."""
+    x, _, z = position
+    radius = math.hypot(x, z) or 1.0
+    speed = math.sqrt(NBODY_SUN_GM / radius)
+    return [-z / radius * speed, 0.0, x / radius * speed]
+
+def update_nbody(dt):
+    """Advances asteroids and moons one leapfrog step under the Sun's and planets' gravity."""
+    leapfrog_step(nbody["asteroid_positions"], nbody["asteroid_velocities"],
+                  nbody["asteroid_accelerations"], asteroid_accelerations, dt)
+    asteroids["positions"][:] = nbody["asteroid_positions"]
+    leapfrog_step(nbody["moon_offsets"], nbody["moon_velocities"],
+                  nbody["moon_accelerations"], moon_accelerations, dt)
+    moons = nbody["moons"]
+    planet_orbits["offsets"][moons] = nbody["moon_offsets"]
+    planet_orbits["positions"][moons] = (planet_orbits["positions"][planet_orbits["parents"][moons]]
+                                         + nbody["moon_offsets"])
+
+# --- Rocket Dynamics Functions ---
+
+def rocket_derivatives(state, sources, gms, thrust=None):
+    """d/dt of the rocket state [x, y, z, vx, vy, vz] under gravity and thrust."""
+    position, velocity = state[:3], state[3:]
+    delta = sources - position
+    distance2 = np.einsum("ij,ij->i", delta, delta) + ROCKET_SOFTENING * ROCKET_SOFTENING
+    acceleration = (delta * (gms / (distance2 * np.sqrt(distance2)))[:, None]).sum(axis=0)
+    if thrust is not None:
+        acceleration += thrust(position, velocity)
+    return np.concatenate((velocity, acceleration))
+
+def dormand_prince_step(derivatives, state, slope, step):
+    """One Dormand-Prince 5(4) step from state (whose derivative is slope).
+
+    Returns (new state, its derivative, local error estimate). The last
+    stage is evaluated at the new state, so an accepted step hands its
+    derivative to the next one for free (first same as last).
+    """
+    stages = [slope]
+    for node, couplings in zip(DP_NODES[1:], DP_COUPLINGS[1:]):
+        stage_state = state + step * sum(c * k for c, k in zip(couplings, stages) if c)
+        stages.append(derivatives(stage_state))
+    error = step * sum(w * k for w, k in zip(DP_ERROR_WEIGHTS, stages) if w)
+    return stage_state, stages[-1], error
+
+def integrate_rocket(dt, thrust=None):
+    """Advances the rocket dt ticks under the Sun's and planets' gravity.
+
+    The step size adapts to keep the local error within tolerance: it
+    shrinks on close approaches and in hard burns and grows back in quiet
+    cruise (up to a whole tick). The bodies are held where they are for
+    the tick. Work done is left in rocket_integrator_stats.
+    """
+    global rocket_position, rocket_velocity, rocket_step_size
+    sources, gms = gravity_sources()
+    derivatives = lambda state: rocket_derivatives(state, sources, gms, thrust)
+    stats = {"steps": 0, "rejected": 0, "evaluations": 1, "error": 0.0}
+    state = np.array(rocket_position + rocket_velocity, dtype=np.float64)
+    slope = derivatives(state)
+    elapsed = 0.0
+    step = rocket_step_size
+    while elapsed < dt:
+        step = max(ROCKET_MIN_STEP, step)
+        trial = min(step, dt - elapsed)
+        new_state, new_slope, error = dormand_prince_step(derivatives, state, slope, trial)
+        stats["evaluations"] += 6
+        scale = ROCKET_ABSOLUTE_TOLERANCE + ROCKET_RELATIVE_TOLERANCE * np.maximum(np.abs(state), np.abs(new_state))
+        error_norm = float(np.sqrt(np.mean((error / scale) ** 2)))
+        if error_norm <= 1.0 or trial <= ROCKET_MIN_STEP:
+            state, slope = new_state, new_slope
+            elapsed += trial
+            stats["steps"] += 1
+            stats["error"] = max(stats["error"], error_norm)
+            if trial < step:
+                continue  # Clipped to the end of the tick, says nothing about the next step
+        else:
+            stats["rejected"] += 1
+        # Standard controller for a 5th order method with a 4th order error estimate
+        growth = ROCKET_SAFETY * error_norm ** -0.2 if error_norm > 0.0 else ROCKET_MAX_SCALE
+        step = trial * min(ROCKET_MAX_SCALE, max(ROCKET_MIN_SCALE, growth))
+    rocket_step_size = step
+    rocket_position = state[:3].tolist()
+    rocket_velocity = state[3:].tolist()
+    rocket_integrator_stats.update(stats)
+
+def crash_thrust(position, velocity):
+    """Dive thrust: toward the Sun, cancelling any sideways drift.
+
+    Sized so that from the crash start the dive takes about crash_duration.
+    """
+    to_sun = np.asarray(crash_target) - position
+    direction = to_sun / np.linalg.norm(to_sun)
+    sideways = velocity - direction * np.dot(velocity, direction)
+    aim = direction * np.linalg.norm(velocity) - sideways
+    aim_length = np.linalg.norm(aim)
+    if aim_length > 0.0:
+        direction = aim / aim_length
+    dive_distance = length(subtract_vectors(crash_start_position, crash_target)) - SUN_RADIUS
+    dive_ticks = crash_duration / SIM_TICK_SECONDS
+    return direction * (2.0 * max(dive_distance, 0.0) / (dive_ticks * dive_ticks))
+
 # --- Initialization Functions ---
 
 def initialize_stars():
-    """Populates the 'stars' list with random 3D coordinates."""
+    """Populates the 'stars' array with random 3D coordinates."""
     global stars
-    stars = []
-    for _ in range(NUM_STARS):
+    stars = np.zeros((NUM_STARS, 3), dtype=np.float32)
+    for i in range(NUM_STARS):
         # Distribute stars on the surface of a large sphere
-        phi = random.uniform(0, 2 * math.pi)
-        costheta = random.uniform(-1, 1)
+        phi = star_rng.uniform(0, 2 * math.pi)
+        costheta = star_rng.uniform(-1, 1)
         theta = math.acos(costheta)
         x = STARFIELD_RADIUS * math.sin(theta) * math.cos(phi)
         y = STARFIELD_RADIUS * math.sin(theta) * math.sin(phi)
         z = STARFIELD_RADIUS * math.cos(theta)
-        stars.append((x, y, z))
+        stars[i] = (x, y, z)
 
 def generate_stars_mode_1():
     """Generates stars in front of the rocket."""
     global stars_mode_1
     while len(stars_mode_1) < MAX_STARS:
         # Generate random positions in front of the rocket
-        x = rocket_pos[0] + random.uniform(-100, 100)  # Random x offset
-        y = rocket_pos[1] + random.uniform(-100, 100)  # Random y offset
-        z = rocket_pos[2] - random.uniform(0, STAR_SPAWN_DISTANCE)  # Random z offset in front of the rocket
+        x = rocket_pos[0] + star_rng.uniform(-100, 100)  # Random x offset
+        y = rocket_pos[1] + star_rng.uniform(-100, 100)  # Random y offset
+        z = rocket_pos[2] - star_rng.uniform(0, STAR_SPAWN_DISTANCE)  # Random z offset in front of the rocket
         stars_mode_1.append([x, y, z])  # Add the star to the list
 
 def initialize_asteroids():
-    """Populates the 'asteroids' list with positions, sizes, and colors."""
+    """Populates the 'asteroids' arrays with Keplerian orbits, sizes, and colors."""
     global asteroids
-    asteroids = []
-    for _ in range(NUM_ASTEROIDS):
-        angle = random.uniform(0, 2 * math.pi)
-        distance = random.uniform(ASTEROID_BELT_INNER_RADIUS, ASTEROID_BELT_OUTER_RADIUS)
-        height = random.uniform(-ASTEROID_BELT_HEIGHT, ASTEROID_BELT_HEIGHT)  # Deviation from Y=0 plane
-        x = distance * math.cos(angle)
-        z = distance * math.sin(angle)
-        y = height
-        size = random.uniform(ASTEROID_MIN_SIZE, ASTEROID_MAX_SIZE)
-        color_val = random.uniform(0.3, 0.7)  # Grayish colors
-        color = [color_val, color_val, color_val, 1.0]
-        # Store initial angle and distance for rotation in idle()
-        asteroids.append({
-            "x": x, "y": y, "z": z,
-            "size": size, "color": color,
-            "angle": angle, "distance": distance, "height": y  # Store orbital parameters
-        })
-
-def generate_meteors():
-    """Generates meteors randomly ahead of the rocket."""
-    global meteors
-    while len(meteors) < MAX_METEORS:
-        x = rocket_pos[0] + random.uniform(-1000, 1000)  # Random x offset
-        y = rocket_pos[1] + random.uniform(-1000, 1000)  # Random y offset
-        z = rocket_pos[2] - random.uniform(200, METEOR_SPAWN_DISTANCE)  # Random z offset ahead of the rocket
-        meteors.append([x, y, z])
-
-def generate_closer_meteors():
-    """Generates meteors randomly closer to the rocket."""
-    global meteors
-    while len(meteors) < 10:
-        x = rocket_pos[0] + random.uniform(-50, 50)  # Random x offset
-        y = rocket_pos[1] + random.uniform(-50, 50)  # Random y offset
-        z = rocket_pos[2] - random.uniform(200, METEOR_SPAWN_DISTANCE)  # Random z offset ahead of the rocket
-        meteors.append([x, y, z])
+    elements = np.zeros((NUM_ASTEROIDS, 6))  # a, e, i, periapsis, node, mean anomaly
+    colors = np.ones((NUM_ASTEROIDS, 4), dtype=np.float32)
+    sizes = np.zeros(NUM_ASTEROIDS, dtype=np.float32)
+    for i in range(NUM_ASTEROIDS):
+        distance = asteroid_rng.uniform(ASTEROID_BELT_INNER_RADIUS, ASTEROID_BELT_OUTER_RADIUS)
+        height = asteroid_rng.uniform(-ASTEROID_BELT_HEIGHT, ASTEROID_BELT_HEIGHT)  # Max deviation from Y=0 plane
+        elements[i] = (
+            distance,
+            asteroid_rng.uniform(0, ASTEROID_MAX_ECCENTRICITY),
+            math.asin(height / distance),
+            asteroid_rng.uniform(0, 2 * math.pi),
+            asteroid_rng.uniform(0, 2 * math.pi),
+            asteroid_rng.uniform(0, 2 * math.pi),
+        )
+        sizes[i] = asteroid_rng.uniform(ASTEROID_MIN_SIZE, ASTEROID_MAX_SIZE)
+        colors[i, :3] = asteroid_rng.uniform(0.3, 0.7)  # Grayish colors
+    
+    semi_major_axes, eccentricities = elements[:, 0], elements[:, 1]
+    p_axes, q_axes = orbit_axes(semi_major_axes, eccentricities, elements[:, 2], elements[:, 3], elements[:, 4])
+    asteroids = {
+        "positions": np.zeros((NUM_ASTEROIDS, 3), dtype=np.float32),
+        "colors": colors,
+        "sizes": sizes,
+        # float32 orbit arrays keep the per-tick Kepler solve vectorized in SIMD
+        "eccentricities": eccentricities.astype(np.float32),
+        "mean_anomalies": elements[:, 5].copy(),  # float64 so the anomalies don't drift
+        "epoch_anomalies": elements[:, 5].copy(),  # At orbit time 0
+        # Kepler's third law: outer asteroids go round more slowly
+        "motions": ASTEROID_ORBIT_SPEED * (ASTEROID_BELT_INNER_RADIUS / semi_major_axes) ** 1.5,
+        "p_axes": p_axes.astype(np.float32),
+        "q_axes": q_axes.astype(np.float32),
+    }
+    orbit_positions(asteroids, out=asteroids["positions"])
+
+def meteor_chunk_points(seed, index):
+    """Every candidate meteor position (absolute) of one chunk, including those before the field starts.
+
+    Depends only on the seed and the chunk index, so chunks can be
+    generated in any order, on any thread, and regenerated identically.
+    """
+    rng = np.random.default_rng([seed & SEED_MASK, index & SEED_MASK])  # Two's complement for chunks behind the start
+    near = -index * METEOR_CHUNK_LENGTH
+    far = near - METEOR_CHUNK_LENGTH
+    field = rng.uniform([-METEOR_FIELD_HALF_WIDTH, -METEOR_FIELD_HALF_WIDTH, far],
+                        [METEOR_FIELD_HALF_WIDTH, METEOR_FIELD_HALF_WIDTH, near], (METEORS_PER_CHUNK, 3))
+    lane = rng.uniform([-METEOR_LANE_HALF_WIDTH, -METEOR_LANE_HALF_WIDTH, far],
+                       [METEOR_LANE_HALF_WIDTH, METEOR_LANE_HALF_WIDTH, near], (LANE_METEORS_PER_CHUNK, 3))
+    return np.vstack([field, lane])
+
+def generate_meteor_chunk(seed, index):
+    """Absolute meteor positions of one chunk."""
+    points = meteor_chunk_points(seed, index)
+    return points[points[:, 2] < METEOR_FIELD_START_Z]
+
+def request_meteor_chunk(index):
+    """Starts generating a chunk in the background (once) and returns its future."""
+    global meteor_chunk_executor
+    future = meteor_chunk_futures.get(index)
+    if future is None:
+        if meteor_chunk_executor is None:
+            meteor_chunk_executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="meteor-chunks")
+        future = meteor_chunk_futures[index] = meteor_chunk_executor.submit(generate_meteor_chunk, SIM_SEED, index)
+    return future
+
+def meteor_chunk_index(z):
+    """Chunk containing a rocket-mode (local) z coordinate."""
+    return math.floor(-(z + world_origin[2]) / METEOR_CHUNK_LENGTH)
 
 def generate_repair_items():
     """Generates repair items ahead of the rocket"""
     global broken_parts, last_repair_spawn
-    current_time = time.time()
+    current_time = get_sim_time()
     if current_time - last_repair_spawn > REPAIR_SPAWN_INTERVAL:
         last_repair_spawn = current_time
         while len(broken_parts) < MAX_REPAIR_ITEMS:
-            x = rocket_pos[0] + random.uniform(-150, 150)
-            y = rocket_pos[1] + random.uniform(-150, 150)
-            z = rocket_pos[2] - random.uniform(200, 800)
+            x = rocket_pos[0] + repair_rng.uniform(-150, 150)
+            y = rocket_pos[1] + repair_rng.uniform(-150, 150)
+            z = rocket_pos[2] - repair_rng.uniform(200, 800)
             broken_parts.append([x, y, z])
 
-def initialize_scene():
-    """Initializes stars, asteroids, and Saturn's ring quadric."""
+def initialize_scene(snapshot=None):
+    """Initializes stars, asteroids, and Saturn's ring quadric.
+
+    With a snapshot path the scene is loaded from it if it exists,
+    otherwise it is generated and then saved there for the next launch.
+    """
     global ring_quadric
     print("Initializing Scene...")
-    initialize_stars()
-    initialize_asteroids()
+    if snapshot and os.path.exists(snapshot):
+        load_snapshot(snapshot)
+    else:
+        initialize_stars()
+        initialize_asteroids()
+        initialize_orbits()
+        if snapshot:
+            save_snapshot(snapshot)
     # Create quadric for Saturn's rings
     ring_quadric = gluNewQuadric()
     gluQuadricNormals(ring_quadric, GLU_SMOOTH)
@@ -421,27 +1922,163 @@ def initialize_scene():
 # --- Drawing Functions ---
 
 def draw_text(x, y, text, font=GLUT_BITMAP_HELVETICA_18):
-    """Draws text on the screen using bitmap fonts."""
-    viewport = glGetIntegerv(GL_VIEWPORT)
-    win_width, win_height = viewport[2], viewport[3]
-    # Convert to percentage-based positioning if needed
-    x_pos = x
-    y_pos = y
+    """Draws text in HUD coordinates from the font's glyph atlas (one draw per line)."""
+    atlas = get_text_atlas(font)
+    layout = layout_text_slot(x, y, text, font, atlas)
+    if not len(layout["vertices"]):
+        return
     glColor3f(1.0, 1.0, 1.0)  # White text
-    glWindowPos2f(x_pos, y_pos)
-    for ch in text:
-        glutBitmapCharacter(font, ord(ch))
+    glPushAttrib(GL_ENABLE_BIT)
+    glDisable(GL_DEPTH_TEST)  # Bitmap text used to sit in front of everything
+    glEnable(GL_TEXTURE_2D)
+    glEnable(GL_BLEND)
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    glBindTexture(GL_TEXTURE_2D, atlas["texture"])
+    glPushMatrix()
+    glTranslatef(x, y, 0.0)
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+    glVertexPointer(2, GL_FLOAT, 0, layout["vertices"])
+    glTexCoordPointer(2, GL_FLOAT, 0, layout["texcoords"])
+    glDrawArrays(GL_QUADS, 0, len(layout["vertices"]))
+    glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+    glDisableClientState(GL_VERTEX_ARRAY)
+    glPopMatrix()
+    glPopAttrib()
+
+# --- Text Atlas Functions ---
+
+def build_text_atlas(font):
+    """Rasterizes a GLUT bitmap font once into an alpha texture atlas.
+
+    The glyphs are drawn with glutBitmapCharacter into the current color
+    buffer and read back, so call this before the frame is cleared.
+    """
+    codes = range(TEXT_FIRST_CHAR, TEXT_LAST_CHAR + 1)
+    advances = np.array([glutBitmapWidth(font, code) for code in codes], dtype=np.float32)
+    height = glutBitmapHeight(font) if glutBitmapHeight else 0
+    height = height or TEXT_FALLBACK_HEIGHT
+    descent = height // 4
+    cell_w = int(advances.max()) + 2
+    cell_h = height + 2
+    rows = (len(advances) + TEXT_ATLAS_COLUMNS - 1) // TEXT_ATLAS_COLUMNS
+    grid_w, grid_h = TEXT_ATLAS_COLUMNS * cell_w, rows * cell_h
+    atlas_w = 1 << (grid_w - 1).bit_length()  # Power-of-two texture size
+    atlas_h = 1 << (grid_h - 1).bit_length()
+    
+    # Draw every glyph once, white on black, one per grid cell
+    glClearColor(0.0, 0.0, 0.0, 1.0)
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    glColor3f(1.0, 1.0, 1.0)
+    for i, code in enumerate(codes):
+        col, row = i % TEXT_ATLAS_COLUMNS, i // TEXT_ATLAS_COLUMNS
+        glWindowPos2i(col * cell_w + 1, row * cell_h + 1 + descent)
+        glutBitmapCharacter(font, code)
+    glPixelStorei(GL_PACK_ALIGNMENT, 1)
+    pixels = glReadPixels(0, 0, grid_w, grid_h, GL_RED, GL_UNSIGNED_BYTE)
+    glClear(GL_COLOR_BUFFER_BIT)
+    
+    alpha = np.zeros((atlas_h, atlas_w), dtype=np.uint8)
+    alpha[:grid_h, :grid_w] = np.frombuffer(pixels, dtype=np.uint8).reshape(grid_h, grid_w)
+    texture = glGenTextures(1)
+    glBindTexture(GL_TEXTURE_2D, texture)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+    glTexImage2D(GL_TEXTURE_2D, 0, GL_ALPHA, atlas_w, atlas_h, 0, GL_ALPHA, GL_UNSIGNED_BYTE, alpha)
+    
+    # Quad corners relative to the pen position on the baseline
+    offsets = np.array([[-1, -1 - descent], [cell_w - 1, -1 - descent],
+                        [cell_w - 1, cell_h - 1 - descent], [-1, cell_h - 1 - descent]], dtype=np.float32)
+    index = np.arange(len(advances))
+    u0 = (index % TEXT_ATLAS_COLUMNS) * cell_w / atlas_w
+    v0 = (index // TEXT_ATLAS_COLUMNS) * cell_h / atlas_h
+    u1 = u0 + cell_w / atlas_w
+    v1 = v0 + cell_h / atlas_h
+    texcoords = np.stack([np.stack([u0, v0], 1), np.stack([u1, v0], 1),
+                          np.stack([u1, v1], 1), np.stack([u0, v1], 1)], axis=1).astype(np.float32)
+    return {"texture": texture, "advances": advances, "offsets": offsets, "texcoords": texcoords}
+
+def get_text_atlas(font):
+    """Returns the glyph atlas for a font, building it on first use."""
+    atlas = text_atlases.get(font)
+    if atlas is None:
+        atlas = text_atlases[font] = build_text_atlas(font)
+    return atlas
+
+def prepare_text_atlases():
+    """Builds the HUD font atlases up front (they draw into the frame buffer)."""
+    for font in TEXT_FONTS:
+        get_text_atlas(font)
+
+def layout_glyphs(atlas, text, pen):
+    """Lays out glyph quads for text starting at pen. Returns (vertices, texcoords, pens)."""
+    codes = np.frombuffer(text.encode("ascii", "replace"), dtype=np.uint8).astype(np.int64)
+    glyphs = codes - TEXT_FIRST_CHAR
+    glyphs[(glyphs < 0) | (glyphs >= len(atlas["advances"]))] = ord("?") - TEXT_FIRST_CHAR
+    pens = pen + np.concatenate([[0.0], np.cumsum(atlas["advances"][glyphs])])
+    vertices = np.tile(atlas["offsets"], (len(glyphs), 1, 1))
+    vertices[:, :, 0] += pens[:-1, None]
+    return vertices.reshape(-1, 2).astype(np.float32), atlas["texcoords"][glyphs].reshape(-1, 2), pens[1:]
 
+def layout_text_slot(x, y, text, font, atlas):
+    """Returns the cached layout for the string drawn at (x, y).
+
+    Unchanged strings reuse their arrays as-is; when a string changes
+    (e.g. a counter ticking) only the glyphs after the common prefix
+    are laid out again.
+    """
+    key = (x, y, font)
+    slot = text_slots.get(key)
+    if slot is not None and slot["text"] == text:
+        return slot
+    keep = 0
+    if slot is not None:
+        keep = len(os.path.commonprefix([slot["text"], text]))
+    pen = slot["pens"][keep - 1] if keep else 0.0
+    vertices, texcoords, pens = layout_glyphs(atlas, text[keep:], pen)
+    if keep:
+        vertices = np.concatenate([slot["vertices"][:keep * 4], vertices])
+        texcoords = np.concatenate([slot["texcoords"][:keep * 4], texcoords])
+        pens = np.concatenate([slot["pens"][:keep], pens])
+    slot = text_slots[key] = {"text": text, "vertices": vertices, "texcoords": texcoords, "pens": pens}
+    return slot
+
+def translate_to_body(name):
+    """Moves to a planet's position, or a moon's position relative to its planet."""
+    glTranslatef(*planet_orbits["offsets"][BODY_INDEX[name]])
+
+@gl_section
 def draw_earth():
     glPushMatrix()
-    glRotatef(math.degrees(earth_orbit_angle), 0, 1, 0)  # Orbit around Sun
-    glTranslatef(EARTH_ORBIT_RADIUS, 0, 0)
+    translate_to_body("earth")
+    glPushMatrix()
     # Use the separate rotation angle
     glRotatef(earth_rotation_angle, 0, 1, 0)  # Rotates around Earth's axis
     
-    # Smoother day/night effect with more slices
-    slices = 36  # Increased from original 10
-    stacks = 36  # Increased from original 10
+    program = use_shader_program("earth")
+    if program is not None:
+        # Per-pixel day/night shading against the actual sun direction
+        glUniform3fv(program["uniforms"]["day_color"], 1, EARTH_DAY_COLOR)
+        glUniform3fv(program["uniforms"]["night_color"], 1, EARTH_NIGHT_COLOR)
+        glUniform1f(program["uniforms"]["twilight_width"], EARTH_TWILIGHT_WIDTH)
+        glutSolidSphere(EARTH_RADIUS, SPHERE_SLICES * 2, SPHERE_STACKS * 2)
+        use_shader_program("lit")
+    else:
+        draw_earth_day_night()
+    glPopMatrix()  # The Moon's orbit doesn't spin with the Earth
+    
+    # Draw Earth's moon
+    glPushMatrix()
+    glColor4fv(MOON_MATERIAL)
+    translate_to_body("moon")
+    glutSolidSphere(MOON_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
+    glPopMatrix()
+    
+    glPopMatrix()
+
+def draw_earth_day_night():
+    """Fixed-function Earth: day/night colours picked per vertex on the CPU."""
     for i in range(0, 180, 5):  # More frequent latitude bands (5° steps)
         glBegin(GL_QUAD_STRIP)
         for j in range(0, 360, 5):  # More frequent longitude bands (5° steps)
@@ -452,9 +2089,9 @@ def draw_earth():
             
             # Simple day/night based on x position (sun is at 0,0,0)
             if x > 0:  # Day side
-                glColor3f(0.2, 0.4, 0.8)  # Ocean blue
+                glColor3fv(EARTH_DAY_COLOR)
             else:  # Night side
-                glColor3f(0.05, 0.05, 0.1)  # Dark blue
+                glColor3fv(EARTH_NIGHT_COLOR)
             glVertex3f(x, y, z)
             
             # Vertex 2 (next latitude)
@@ -463,31 +2100,23 @@ def draw_earth():
             z = EARTH_RADIUS * math.sin(math.radians(i+5)) * math.sin(math.radians(j))
             
             if x > 0:
-                glColor3f(0.2, 0.4, 0.8)
+                glColor3fv(EARTH_DAY_COLOR)
             else:
-                glColor3f(0.05, 0.05, 0.1)
+                glColor3fv(EARTH_NIGHT_COLOR)
             glVertex3f(x, y, z)
         glEnd()
-    
-    # Draw Earth's moon
-    glPushMatrix()
-    glColor4fv(MOON_MATERIAL)
-    glRotatef(math.degrees(moon_orbit_angle), 0, 1, 0)
-    glTranslatef(MOON_ORBIT_RADIUS, 0, 0)
-    glutSolidSphere(MOON_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
-    glPopMatrix()
-    
-    glPopMatrix()
 
+@gl_section
 def draw_starfield():
-    """Draws the starfield using GL_POINTS."""
+    """Draws the starfield using GL_POINTS from the star position array."""
     glPointSize(2)
-    glBegin(GL_POINTS)
     glColor3f(1.0, 1.0, 1.0)  # White stars
-    for x, y, z in stars:
-        glVertex3f(x, y, z)
-    glEnd()
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glVertexPointer(3, GL_FLOAT, 0, stars)
+    glDrawArrays(GL_POINTS, 0, len(stars))
+    glDisableClientState(GL_VERTEX_ARRAY)
 
+@gl_section
 def draw_stars_mode_1():
     """Draws stars for scene mode 1."""
     glPointSize(2)
@@ -497,40 +2126,66 @@ def draw_stars_mode_1():
         glVertex3f(star[0], star[1], star[2])  # Draw each star
     glEnd()
 
+@gl_section
 def draw_orbit_lines():
-    """Draws circular orbit lines for each planet."""
+    """Draws the elliptical orbit line of each planet from the precomputed array."""
     glLineWidth(1)
     glColor3f(0.3, 0.3, 0.3)  # Dim grey lines
-    orbit_radii = [
-        MERCURY_ORBIT_RADIUS, VENUS_ORBIT_RADIUS, EARTH_ORBIT_RADIUS,
-        MARS_ORBIT_RADIUS, JUPITER_ORBIT_RADIUS, SATURN_ORBIT_RADIUS,
-        URANUS_ORBIT_RADIUS, NEPTUNE_ORBIT_RADIUS
-    ]
-    
-    for radius in orbit_radii:
-        glBegin(GL_LINE_LOOP)
-        for i in range(100):  # 100 segments for a smooth circle
-            angle = i * 2 * math.pi / 100
-            x = radius * math.cos(angle)
-            z = radius * math.sin(angle)
-            glVertex3f(x, 0, z)  # Orbits are on the Y=0 plane
-        glEnd()
+    lines = planet_orbits["orbit_lines"]
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glVertexPointer(3, GL_FLOAT, 0, lines)
+    for first in range(0, len(lines), ORBIT_LINE_SEGMENTS):
+        glDrawArrays(GL_LINE_LOOP, first, ORBIT_LINE_SEGMENTS)
+    glDisableClientState(GL_VERTEX_ARRAY)
+
+def point_sprite_scale():
+    """Pixels per world unit at distance 1 for the current projection (sprite size = size * scale / distance)."""
+    return viewport_height / (2.0 * math.tan(math.radians(FOV_Y) / 2.0))
 
+@gl_section
 def draw_asteroid_belt():
-    """Draws the asteroid belt using GL_POINTS."""
-    glBegin(GL_POINTS)
-    for asteroid in asteroids:
-        glColor3f(asteroid["color"][0], asteroid["color"][1], asteroid["color"][2])
-        glVertex3f(asteroid["x"], asteroid["y"], asteroid["z"])
-    glEnd()
+    """Draws the asteroid belt as distance-attenuated point sprites sized per asteroid.
+
+    Position, color and size arrays go out in one glDrawArrays. Without
+    shader support the fixed-function attenuation scales the mean size.
+    """
+    scale = point_sprite_scale()
+    glPointParameterfv(GL_POINT_DISTANCE_ATTENUATION, ASTEROID_POINT_ATTENUATION)
+    glPointParameterf(GL_POINT_SIZE_MIN, ASTEROID_POINT_MIN_PIXELS)
+    glPointParameterf(GL_POINT_SIZE_MAX, ASTEROID_POINT_MAX_PIXELS)
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glEnableClientState(GL_COLOR_ARRAY)
+    glVertexPointer(3, GL_FLOAT, 0, asteroids["positions"])
+    glColorPointer(4, GL_FLOAT, 0, asteroids["colors"])
+    count = int(len(asteroids["positions"]) * ASTEROID_DRAW_FRACTION)
+    program = use_shader_program("asteroids")
+    if program is not None:
+        size_attribute = program["attributes"]["size"]
+        glUniform1f(program["uniforms"]["point_scale"], scale)
+        glEnable(GL_VERTEX_PROGRAM_POINT_SIZE)
+        glEnable(GL_POINT_SPRITE)
+        glEnableVertexAttribArray(size_attribute)
+        glVertexAttribPointer(size_attribute, 1, GL_FLOAT, GL_FALSE, 0, asteroids["sizes"])
+        glDrawArrays(GL_POINTS, 0, count)
+        glDisableVertexAttribArray(size_attribute)
+        glDisable(GL_POINT_SPRITE)
+        glDisable(GL_VERTEX_PROGRAM_POINT_SIZE)
+        use_shader_program(None)
+    else:
+        glPointSize(0.5 * (ASTEROID_MIN_SIZE + ASTEROID_MAX_SIZE) * scale)
+        glDrawArrays(GL_POINTS, 0, count)
+    glDisableClientState(GL_COLOR_ARRAY)
+    statecache.invalidate("color")  # The color array leaves the current color undefined
+    glDisableClientState(GL_VERTEX_ARRAY)
+    glPointParameterfv(GL_POINT_DISTANCE_ATTENUATION, POINT_NO_ATTENUATION)  # Stars and meteors keep fixed sizes
 
+@gl_section
 def draw_saturn_with_rings():
     """Draws Saturn with its rings."""
     glPushMatrix()  # Push 1 - Saturn's position
     
     # Position Saturn in its orbit
-    glRotatef(math.degrees(saturn_orbit_angle), 0, 1, 0)
-    glTranslatef(SATURN_ORBIT_RADIUS, 0, 0)
+    translate_to_body("saturn")
     
     # Draw Saturn
     glColor4fv(MAT_SATURN)  # Set color directly for visibility
@@ -552,20 +2207,20 @@ def draw_saturn_with_rings():
     # Draw Titan (moon)
     glPushMatrix()  # Push 3 - Moon position
     glColor4fv(TITAN_MATERIAL)  # Set color directly for visibility
-    glRotatef(math.degrees(titan_orbit_angle), 0, 1, 0)
-    glTranslatef(TITAN_ORBIT_RADIUS, 0, 0)
+    translate_to_body("titan")
     glutSolidSphere(TITAN_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
     glPopMatrix()  # Pop 3 - Moon position
     
     glPopMatrix()  # Pop 1 - Saturn's position
 
+@gl_section
 def draw_sun_with_glow():
     """Draws the sun with a soft glowing edge effect."""
     # Draw glow layers (from outer to inner)
     for i in range(SUN_GLOW_LAYERS):
         radius = SUN_GLOW_RADIUS * (1.0 - i/SUN_GLOW_LAYERS)
-        alpha = SUN_GLOW_COLORS[i][3]
-        color = SUN_GLOW_COLORS[i]
+        color = SUN_GLOW_COLORS[i * len(SUN_GLOW_COLORS) // SUN_GLOW_LAYERS]  # Spread fewer layers over the ramp
+        alpha = color[3]
         glPushMatrix()
         glColor4fv(color)  # glColor is used when lighting is off
         glutSolidSphere(radius, SPHERE_SLICES*2, SPHERE_STACKS*2)  # Higher resolution for smooth glow
@@ -577,27 +2232,24 @@ def draw_sun_with_glow():
     glutSolidSphere(SUN_RADIUS, SPHERE_SLICES*2, SPHERE_STACKS*2)
     glPopMatrix()
 
+@gl_section
 def draw_solar_system():
     """Draws the Sun and planets with direct color setting."""
-    global earth_orbit_angle, mars_orbit_angle, jupiter_orbit_angle, saturn_orbit_angle
-    global mercury_orbit_angle, venus_orbit_angle, uranus_orbit_angle, neptune_orbit_angle
-    
     # --- Sun (Source of Light) ---
     draw_sun_with_glow()
+    use_shader_program("lit")  # Everything after the Sun is lit by it
     
     # --- Mercury ---
     glPushMatrix()
     glColor4fv(MAT_MERCURY)
-    glRotatef(math.degrees(mercury_orbit_angle), 0, 1, 0)
-    glTranslatef(MERCURY_ORBIT_RADIUS, 0, 0)
+    translate_to_body("mercury")
     glutSolidSphere(MERCURY_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
     glPopMatrix()
     
     # --- Venus ---
     glPushMatrix()
     glColor4fv(MAT_VENUS)
-    glRotatef(math.degrees(venus_orbit_angle), 0, 1, 0)
-    glTranslatef(VENUS_ORBIT_RADIUS, 0, 0)
+    translate_to_body("venus")
     glutSolidSphere(VENUS_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
     glPopMatrix()
     
@@ -607,23 +2259,20 @@ def draw_solar_system():
     # --- Mars ---
     glPushMatrix()
     glColor4fv(MAT_MARS)
-    glRotatef(math.degrees(mars_orbit_angle), 0, 1, 0)
-    glTranslatef(MARS_ORBIT_RADIUS, 0, 0)
+    translate_to_body("mars")
     glutSolidSphere(MARS_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
     
     # Phobos
     glPushMatrix()
     glColor4fv(PHOBOS_MATERIAL)
-    glRotatef(math.degrees(phobos_orbit_angle), 0, 1, 0)
-    glTranslatef(PHOBOS_ORBIT_RADIUS, 0, 0)
+    translate_to_body("phobos")
     glutSolidSphere(PHOBOS_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
     glPopMatrix()
     
     # Deimos
     glPushMatrix()
     glColor4fv(DEIMOS_MATERIAL)
-    glRotatef(math.degrees(deimos_orbit_angle), 0, 1, 0)
-    glTranslatef(DEIMOS_ORBIT_RADIUS, 0, 0)
+    translate_to_body("deimos")
     glutSolidSphere(DEIMOS_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
     glPopMatrix()
     
@@ -632,39 +2281,34 @@ def draw_solar_system():
     # --- Jupiter ---
     glPushMatrix()
     glColor4fv(MAT_JUPITER)
-    glRotatef(math.degrees(jupiter_orbit_angle), 0, 1, 0)
-    glTranslatef(JUPITER_ORBIT_RADIUS, 0, 0)
+    translate_to_body("jupiter")
     glutSolidSphere(JUPITER_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
     
     # Io
     glPushMatrix()
     glColor4fv(IO_MATERIAL)
-    glRotatef(math.degrees(io_orbit_angle), 0, 1, 0)
-    glTranslatef(IO_ORBIT_RADIUS, 0, 0)
+    translate_to_body("io")
     glutSolidSphere(IO_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
     glPopMatrix()
     
     # Europa
     glPushMatrix()
     glColor4fv(EUROPA_MATERIAL)
-    glRotatef(math.degrees(europa_orbit_angle), 0, 1, 0)
-    glTranslatef(EUROPA_ORBIT_RADIUS, 0, 0)
+    translate_to_body("europa")
     glutSolidSphere(EUROPA_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
     glPopMatrix()
     
     # Ganymede
     glPushMatrix()
     glColor4fv(GANYMEDE_MATERIAL)
-    glRotatef(math.degrees(ganymede_orbit_angle), 0, 1, 0)
-    glTranslatef(GANYMEDE_ORBIT_RADIUS, 0, 0)
+    translate_to_body("ganymede")
     glutSolidSphere(GANYMEDE_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
     glPopMatrix()
     
     # Callisto
     glPushMatrix()
     glColor4fv(CALLISTO_MATERIAL)
-    glRotatef(math.degrees(callisto_orbit_angle), 0, 1, 0)
-    glTranslatef(CALLISTO_ORBIT_RADIUS, 0, 0)
+    translate_to_body("callisto")
     glutSolidSphere(CALLISTO_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
     glPopMatrix()
     
@@ -676,15 +2320,13 @@ def draw_solar_system():
     # --- Uranus ---
     glPushMatrix()
     glColor4fv(MAT_URANUS)
-    glRotatef(math.degrees(uranus_orbit_angle), 0, 1, 0)
-    glTranslatef(URANUS_ORBIT_RADIUS, 0, 0)
+    translate_to_body("uranus")
     glutSolidSphere(URANUS_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
     
     # Titania
     glPushMatrix()
     glColor4fv(TITANIA_MATERIAL)
-    glRotatef(math.degrees(titania_orbit_angle), 0, 1, 0)
-    glTranslatef(TITANIA_ORBIT_RADIUS, 0, 0)
+    translate_to_body("titania")
     glutSolidSphere(TITANIA_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
     glPopMatrix()
     
@@ -693,68 +2335,55 @@ def draw_solar_system():
     # --- Neptune ---
     glPushMatrix()
     glColor4fv(MAT_NEPTUNE)
-    glRotatef(math.degrees(neptune_orbit_angle), 0, 1, 0)
-    glTranslatef(NEPTUNE_ORBIT_RADIUS, 0, 0)
+    translate_to_body("neptune")
     glutSolidSphere(NEPTUNE_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
     
     # Triton
     glPushMatrix()
     glColor4fv(TRITON_MATERIAL)
-    glRotatef(math.degrees(triton_orbit_angle), 0, 1, 0)
-    glTranslatef(TRITON_ORBIT_RADIUS, 0, 0)
+    translate_to_body("triton")
     glutSolidSphere(TRITON_RADIUS, SPHERE_SLICES, SPHERE_STACKS)
     glPopMatrix()
     
     glPopMatrix()  # Neptune
+    use_shader_program(None)
 
 # --- Camera Director Functions ---
 
 def update_rocket_position(delta_time=1.0):
-    """Updates the rocket position based on its current state and orbit."""
-    global rocket_position, rocket_heading, rocket_orbit_angle, rocket_rotation_angle
+    """Updates the rocket position by integrating its free fall around the Sun."""
+    global rocket_heading, rocket_rotation_angle
     
     if is_crashing:
         update_crash_sequence(delta_time)
         return
     
-    # Update orbit angle
-    rocket_orbit_angle = (rocket_orbit_angle + ROCKET_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-    
-    # Calculate rocket position in orbit
-    rocket_position[0] = ROCKET_ORBIT_RADIUS * math.cos(rocket_orbit_angle)
-    rocket_position[2] = ROCKET_ORBIT_RADIUS * math.sin(rocket_orbit_angle)
+    # Coast under the pull of the Sun and planets
+    integrate_rocket(GRAVITY_FACTOR * delta_time)
     
-    # Calculate rocket heading (tangent to orbit)
-    rocket_heading = normalize([-math.sin(rocket_orbit_angle), 0, math.cos(rocket_orbit_angle)])
+    # Point the rocket along its velocity
+    rocket_heading = normalize(rocket_velocity)
     
     # Update rocket's rotation about its axis
     rocket_rotation_angle = (rocket_rotation_angle + ROCKET_ROTATION_SPEED) % 360.0
 
 def update_crash_sequence(delta_time=1.0):
-    """Updates the rocket during a crash sequence."""
-    global rocket_position, rocket_heading, rocket_orientation, crash_progress
+    """Updates the rocket during a crash sequence (a powered dive into the Sun)."""
+    global rocket_heading, rocket_orientation, crash_progress
     
-    # Update crash progress (0.0 to 1.0)
-    current_time = glutGet(GLUT_ELAPSED_TIME) / 1000.0  # Convert to seconds
-    elapsed = current_time - crash_start_time
-    crash_progress = min(1.0, elapsed / crash_duration)
+    # Burn toward the Sun; the integrator takes small steps as the dive speeds up
+    integrate_rocket(GRAVITY_FACTOR * delta_time, crash_thrust)
+    
+    # Update crash progress (0.0 to 1.0) from how much of the way down the rocket is
+    start_distance = length(subtract_vectors(crash_start_position, crash_target)) - SUN_RADIUS
+    distance = length(subtract_vectors(rocket_position, crash_target)) - SUN_RADIUS
+    crash_progress = min(1.0, max(0.0, 1.0 - distance / max(start_distance, 1e-6)))
     
     if crash_progress >= 1.0:
-        # Crash complete - reset
+        # Crash complete (hit the Sun) - reset
         reset_after_crash()
         return
     
-    # Interpolation function with easing for more dramatic effect
-    # Start slow, then accelerate towards the end
-    t = crash_progress * crash_progress * (3.0 - 2.0 * crash_progress)
-    
-    # Linear interpolation between start position and Sun
-    rocket_position = [
-        crash_start_position[0] * (1-t) + crash_target[0] * t,
-        crash_start_position[1] * (1-t) + crash_target[1] * t,
-        crash_start_position[2] * (1-t) + crash_target[2] * t
-    ]
-    
     # Calculate direction vector to Sun for heading
     to_sun = normalize(subtract_vectors(crash_target, rocket_position))
     
@@ -776,7 +2405,7 @@ def start_crash_sequence():
     
     if not is_crashing:
         is_crashing = True
-        crash_start_time = glutGet(GLUT_ELAPSED_TIME) / 1000.0  # Convert to seconds
+        crash_start_time = get_sim_time()
         crash_start_position = rocket_position.copy()
         
         # If we're already in crash camera mode, keep it
@@ -785,14 +2414,14 @@ def start_crash_sequence():
 
 def reset_after_crash():
     """Resets the rocket after a crash sequence completes."""
-    global is_crashing, rocket_position, rocket_orbit_angle, crash_progress
+    global is_crashing, rocket_position, crash_progress, rocket_velocity
     
     is_crashing = False
     crash_progress = 0.0
     
     # Reset position to orbit
-    rocket_orbit_angle = 0.0
     rocket_position = [ROCKET_ORBIT_RADIUS, 0.0, 0.0]
+    rocket_velocity = circular_velocity(rocket_position)
     
     # Reset camera to free mode
     set_camera_mode(CAMERA_MODE_FREE)
@@ -802,10 +2431,43 @@ def set_camera_mode(mode):
     global current_camera_mode
     current_camera_mode = mode
 
+def cycle_camera_focus():
+    """Moves the rocket cameras' focus to the next planet or moon, then back to none."""
+    global camera_focus
+    if camera_focus is None:
+        camera_focus = 0
+    elif camera_focus + 1 < len(BODY_NAMES):
+        camera_focus += 1
+    else:
+        camera_focus = None
+
+def apply_camera_focus(code):
+    """Focuses the cameras on a picked body, or clears the focus and looks back at the Sun."""
+    global camera_focus, camera_target
+    if code == FOCUS_NONE:
+        camera_focus = None
+        if current_camera_mode == CAMERA_MODE_FREE:
+            camera_target = [0.0, 0.0, 0.0]
+    else:
+        camera_focus = code
+
+def camera_focus_position():
+    """Where the focused body is now, as a list.
+
+    Keplerian bodies are looked up in the ephemeris table when one is
+    loaded; under N-body gravity only the live positions are right.
+    """
+    if nbody_mode:
+        return planet_orbits["positions"][camera_focus].tolist()
+    return body_positions(orbit_time, [camera_focus])[0, 0].tolist()
+
 def update_camera():
     """Updates camera position and target based on current mode."""
+    global camera_target
     if current_camera_mode == CAMERA_MODE_FREE:
-        return  # Free camera is controlled by keyboard directly
+        if camera_focus is not None:
+            camera_target = camera_focus_position()  # Keep a clicked body in view
+        return  # Free camera is otherwise controlled by keyboard directly
     elif current_camera_mode == CAMERA_MODE_FIRST_PERSON:
         update_first_person_camera()
     elif current_camera_mode == CAMERA_MODE_THIRD_PERSON:
@@ -824,8 +2486,11 @@ def update_first_person_camera():
     position = add_vectors(rocket_position, scale_vector(rocket_heading, ROCKET_LENGTH * 0.5))
     position = add_vectors(position, offset)  # Add offset for helmet height
     
-    # Look in the direction the rocket is heading
-    target = add_vectors(position, rocket_heading)
+    # Look in the direction the rocket is heading, or at the focused body
+    if camera_focus is None:
+        target = add_vectors(position, rocket_heading)
+    else:
+        target = camera_focus_position()
     
     # Use rocket's up vector
     up = rocket_orientation
@@ -843,12 +2508,18 @@ def update_third_person_camera():
     rocket_back = scale_vector(rocket_heading, -THIRD_PERSON_DISTANCE)
     rocket_up = scale_vector(rocket_orientation, THIRD_PERSON_HEIGHT)
     
-    camera_pos = add_vectors(rocket_position, rocket_back)
-    camera_pos = add_vectors(camera_pos, rocket_up)
-    
     # Camera target is the rocket itself
     camera_target = rocket_position
     
+    # With a focused body, sit on the far side of the rocket from it so both stay in frame
+    if camera_focus is not None:
+        focus = camera_focus_position()
+        rocket_back = scale_vector(normalize(subtract_vectors(rocket_position, focus)), THIRD_PERSON_DISTANCE)
+        camera_target = focus
+    
+    camera_pos = add_vectors(rocket_position, rocket_back)
+    camera_pos = add_vectors(camera_pos, rocket_up)
+    
     # Use rocket's up vector
     camera_up = rocket_orientation
 
@@ -897,10 +2568,39 @@ def start_repair_minigame():
     """Initialize repair game elements"""
     global repair_mode, repair_timer, repair_progress
     repair_mode = True
-    repair_timer = time.time()
+    repair_timer = get_sim_time()
     repair_progress = 0
     broken_parts.clear()  # Start with empty list
 
+def absolute_rocket_position():
+    """Rocket-mode position including the distance already folded into world_origin."""
+    return [local + offset for local, offset in zip(rocket_pos, world_origin)]
+
+def rebase_origin():
+    """Moves the rocket-mode world so the rocket sits at the origin again.
+
+    Far from the origin float32 vertices and gluLookAt lose precision and
+    objects jitter. Every world-space point shifts by the rocket's position
+    in one array operation; world_origin keeps the absolute offset.
+    """
+    global meteors, stars_mode_1, broken_parts, mission_planet_pos
+    shift = rocket_pos[:]
+    point_lists = [meteors, stars_mode_1, broken_parts, [rocket_pos, camera_pos_mode_1, camera_target_mode_1]]
+    if mission_planet_pos is not None:
+        point_lists.append([mission_planet_pos])
+    counts = [len(points) for points in point_lists]
+    shifted = np.array([point for points in point_lists for point in points], dtype=np.float64) - shift
+    meteors, stars_mode_1, broken_parts, anchors, *planet = [
+        points.tolist() for points in np.split(shifted, np.cumsum(counts)[:-1])
+    ]
+    # The rocket and cameras are updated in place (other code holds these lists)
+    for target, values in zip((rocket_pos, camera_pos_mode_1, camera_target_mode_1), anchors):
+        target[:] = values
+    if planet:
+        mission_planet_pos = planet[0][0]
+    for axis in range(3):
+        world_origin[axis] += shift[axis]
+
 def update_stars_mode_1():
     """Updates the stars for scene mode 1."""
     global stars_mode_1
@@ -910,13 +2610,30 @@ def update_stars_mode_1():
     generate_stars_mode_1()
 
 def update_meteors():
-    """Updates the meteors and removes those behind the rocket."""
-    global meteors
-    # Remove meteors that are behind the rocket
-    meteors = [meteor for meteor in meteors if meteor[2] < rocket_pos[2] - STAR_DESPAWN_DISTANCE]
-    # Generate new meteors to maintain the count
-    generate_meteors()
-    generate_closer_meteors()
+    """Streams meteor chunks: loads those entering the window ahead, releases those left behind.
+
+    Chunks beyond the window are generated on a background thread, so
+    they are normally ready before the rocket reaches them; a chunk that
+    isn't waits for its result, which keeps the field deterministic.
+    """
+    global meteors, meteor_chunks_loaded
+    current = meteor_chunk_index(rocket_pos[2])
+    first, last = current - METEOR_CHUNKS_BEHIND, current + METEOR_CHUNKS_AHEAD
+    for index in range(last + 1, last + 1 + METEOR_CHUNKS_PREFETCH):
+        request_meteor_chunk(index)
+    if meteor_chunks_loaded == [first, last]:
+        return
+    
+    # Meteors already destroyed stay gone while their chunk remains loaded
+    loaded = range(meteor_chunks_loaded[0], meteor_chunks_loaded[1] + 1) if meteor_chunks_loaded else range(0)
+    kept = [meteor for meteor in meteors if first <= meteor_chunk_index(meteor[2]) <= last]
+    for index in range(first, last + 1):
+        if index not in loaded:
+            kept.extend((request_meteor_chunk(index).result() - world_origin).tolist())
+    for index in [index for index in meteor_chunk_futures if index <= last]:
+        del meteor_chunk_futures[index]  # Loaded now, or left behind
+    meteors = kept
+    meteor_chunks_loaded = [first, last]
 
 def update_repair_items():
     """Updates repair items and removes old ones"""
@@ -926,39 +2643,56 @@ def update_repair_items():
     # Generate new items
     generate_repair_items()
 
-def check_collisions():
-    """Checks for collisions between the rocket and meteors."""
-    global rocket_health, game_over, repair_mode
-    for meteor in meteors[:]:  # Use a copy of the list to safely remove items
-        distance = math.sqrt(
-            (rocket_pos[0] - meteor[0])**2 +
-            (rocket_pos[1] - meteor[1])**2 +
-            (rocket_pos[2] - meteor[2])**2
-        )
+def swept_sphere_hits(start, end, centers, radius):
+    """Tests the rocket's path from start to end against spheres, all at once.
+
+    A point moving along the segment hits a sphere if the segment passes
+    within radius of its center, so nothing is missed however far the
+    rocket moves in one tick. Returns the indices of the spheres hit, in
+    the order the rocket reaches them.
+    """
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+    start = np.asarray(start, dtype=np.float64)
+    path = np.asarray(end, dtype=np.float64) - start
+    path_length2 = float(np.dot(path, path))
+    to_centers = centers - start
+    # Closest point on the segment to each center, as a fraction of the path
+    if path_length2 > 0.0:
+        along = np.clip(to_centers @ path / path_length2, 0.0, 1.0)
+    else:
+        along = np.zeros(len(centers))
+    offsets = to_centers - along[:, None] * path
+    hits = np.flatnonzero(np.einsum("ij,ij->i", offsets, offsets) < radius * radius)
+    return hits[np.argsort(along[hits], kind="stable")]
+
+def check_collisions(previous_pos=None):
+    """Checks for collisions between the rocket's path this tick and the meteors."""
+    global rocket_health, game_over, repair_mode, meteors
+    if not meteors:
+        return
+    hit_meteors = set()
+    for index in swept_sphere_hits(previous_pos or rocket_pos, rocket_pos, meteors, METEOR_RADIUS):
+        rocket_health -= 1
+        hit_meteors.add(index)  # Remove the meteor after collision
         
-        if distance < METEOR_RADIUS:  # Collision threshold
-            rocket_health -= 1
-            meteors.remove(meteor)  # Remove the meteor after collision
-            
-            if rocket_health <= -1:
-                game_over = True
-                break
-            
-            if rocket_health <= 3 and not repair_mode and not game_over:
-                start_repair_minigame()
+        if rocket_health <= -1:
+            game_over = True
+            break
+        
+        if rocket_health <= 3 and not repair_mode and not game_over:
+            start_repair_minigame()
+    if hit_meteors:
+        meteors = [meteor for i, meteor in enumerate(meteors) if i not in hit_meteors]
 
-def check_repair_collision():
-    """Meteor-style collision detection for repair items"""
+def check_repair_collision(previous_pos=None):
+    """Meteor-style (swept) collision detection for repair items"""
     global repair_progress, broken_parts
-    for part in broken_parts[:]:
-        dx = rocket_pos[0] - part[0]
-        dy = rocket_pos[1] - part[1]
-        dz = rocket_pos[2] - part[2]
-        distance = math.sqrt(dx*dx + dy*dy + dz*dz)
-        
-        if distance < REPAIR_ITEM_RADIUS + 15:  # Similar collision range to meteors
-            repair_progress += 1
-            broken_parts.remove(part)
+    if not broken_parts:
+        return
+    # Similar collision range to meteors
+    collected = set(swept_sphere_hits(previous_pos or rocket_pos, rocket_pos, broken_parts, REPAIR_ITEM_RADIUS + 15))
+    repair_progress += len(collected)
+    broken_parts = [part for i, part in enumerate(broken_parts) if i not in collected]
 
 def check_mission_completion():
     """Checks if the rocket has reached the mission planet."""
@@ -973,10 +2707,10 @@ def check_mission_completion():
         if distance < MISSION_PLANET_RADIUS:  # Rocket has reached the planet
             mission_complete = True
             print("Mission Complete!")  # Debug message
-            glutPostRedisplay()
 
 # --- Drawing Functions for Gameplay ---
 
+@gl_section
 def draw_meteors():
     """Draws the meteors."""
     glColor3f(0.3, 0.1, 0.1)  # Red color for meteors
@@ -986,6 +2720,7 @@ def draw_meteors():
         glutSolidSphere(METEOR_RADIUS, 20, 20)
         glPopMatrix()
 
+@gl_section
 def draw_mission_planet():
     """Draws the mission planet."""
     global mission_planet_pos
@@ -996,9 +2731,10 @@ def draw_mission_planet():
         glutSolidSphere(MISSION_PLANET_RADIUS, 32, 32)  # Render the planet
         glPopMatrix()
 
+@gl_section
 def draw_repair_items():
     """Draw complex animated repair items with multiple components"""
-    current_time = time.time()
+    current_time = get_sim_time()
     for part in broken_parts:
         glPushMatrix()
         glTranslatef(*part)
@@ -1008,7 +2744,7 @@ def draw_repair_items():
         glPushMatrix()
         glScalef(pulse, pulse, pulse)
         glColor3f(0.0, 1.0, 0.2)  # Bright green core
-        glutSolidSphere(REPAIR_ITEM_RADIUS * 0.8, 32, 32)
+        glutSolidSphere(REPAIR_ITEM_RADIUS * 0.8, SPHERE_SLICES, SPHERE_STACKS)
         glPopMatrix()
         
         # Rotating inner cube
@@ -1031,8 +2767,8 @@ def draw_repair_items():
         glPointSize(3)
         glBegin(GL_POINTS)
         glColor3f(0.4, 1.0, 0.4)  # Bright green particles
-        for i in range(20):
-            angle = math.radians(i * 18 + current_time * 180)
+        for i in range(REPAIR_PARTICLES):
+            angle = math.radians(i * 360.0 / REPAIR_PARTICLES + current_time * 180)
             radius = REPAIR_ITEM_RADIUS * 1.5
             x = radius * math.cos(angle) * math.sin(current_time * 4)
             y = radius * math.sin(angle) * math.sin(current_time * 4)
@@ -1045,7 +2781,7 @@ def draw_repair_items():
 def draw_repair_hud():
     """Show repair progress and timer"""
     # Timer bar
-    elapsed = time.time() - repair_timer
+    elapsed = get_sim_time() - repair_timer
     time_left = REPAIR_TIME - elapsed
     progress_width = (time_left/REPAIR_TIME) * 200
     
@@ -1065,30 +2801,17 @@ def draw_game_over():
     draw_text(WINDOW_WIDTH // 2 - 100, WINDOW_HEIGHT // 2, "GAME OVER", font=GLUT_BITMAP_HELVETICA_18)
     draw_text(WINDOW_WIDTH // 2 - 150, WINDOW_HEIGHT // 2 - 30, "Press ESC to Exit", font=GLUT_BITMAP_HELVETICA_18)
 
+@gl_section
 def draw_rocket():
     """Draws the rocket at its current position with correct orientation."""
     if scene_mode == 0:  # Camera Director rocket
         glPushMatrix()
-        
-        # Position at rocket location
-        glTranslatef(rocket_position[0], rocket_position[1], rocket_position[2])
-        
-        # Orient the rocket to face the direction of travel
-        # Calculate the angle between the rocket's heading and the x-axis
-        angle = math.degrees(math.atan2(rocket_heading[2], rocket_heading[0]))
-        glRotatef(-angle, 0, 1, 0)  # Rotate around Y axis to face direction of travel
-        
-        # Add tumbling/spinning during crash
-        if is_crashing:
-            tumble_angle = crash_progress * crash_spin_speed * 720.0
-            glRotatef(tumble_angle, 1, 0, 0)  # Roll
-            glRotatef(tumble_angle * 0.7, 0, 0, 1)  # Yaw
-        
-        # Apply rocket's self-rotation
-        glRotatef(rocket_rotation_angle, 0, 0, 1)
+        apply_rocket_transform()
         
         # Draw the rocket body (cylinder + cone)
+        use_shader_program("lit")
         draw_rocket_body()
+        use_shader_program(None)
         
         # Draw rocket engine thrust (if not crashing or at beginning of crash)
         if not is_crashing or crash_progress < 0.3:
@@ -1102,97 +2825,182 @@ def draw_rocket():
         # Rotate entire rocket model to face along Z-axis
         glRotatef(185, 1, 0, 0)  # Pivot model from Y-up to Z-forward
         
-        # Main body (cylinder along Z-axis)
-        glPushMatrix()
-        glColor3f(0.7, 0.7, 0.7)
-        glutSolidCylinder(2.5, 30.0, 32, 32)  # Height along Z-axis
-        glPopMatrix()
-        
-        # Nose cone (front of rocket)
-        glPushMatrix()
-        glTranslatef(0.0, 0.0, 30.0)  # Move to tip along Z-axis
-        glColor3f(1.0, 0.0, 0.0)
-        glutSolidCone(2.5, 8.0, 32, 32)
-        glPopMatrix()
-        
-        # Engine nozzle (base of rocket)
-        glPushMatrix()
-        glTranslatef(0.0, 0.0, -2.0)  # Behind main body
-        glColor3f(0.3, 0.3, 0.3)
-        glutSolidCylinder(3.0, 2.0, 32, 32)
-        glPopMatrix()
-        
-        # Fins (radial placement around Z-axis)
-        glColor3f(0.0, 0.5, 0.0)
-        for i in range(3):
-            glPushMatrix()
-            glRotatef(i * 120, 0, 0, 1)  # Rotate around Z-axis
-            glTranslatef(2.5, 0.0, 0.0)  # Offset from center
-            glBegin(GL_TRIANGLES)
-            glVertex3f(0, 0, 0)
-            glVertex3f(5, 0, 0)
-            glVertex3f(0, 0, 8)
-            glEnd()
-            glPopMatrix()
-        
-        # Window (mid-body)
-        glPushMatrix()
-        glTranslatef(0.0, 0.0, 22.0)  # Position along Z-axis
-        glColor3f(0.0, 0.0, 1.0)
-        glutSolidSphere(1.5, 32, 32)
-        glPopMatrix()
-        
-        # Decorative stripes
-        glColor3f(1.0, 0.5, 0.0)
-        for z in [5.0, 15.0, 25.0]:  # Positions along Z-axis
-            glPushMatrix()
-            glTranslatef(0.0, 0.0, z)
-            glutSolidTorus(0.2, 2.6, 16, 16)
-            glPopMatrix()
+        # Body, nose, nozzle, fins, window and stripes in one draw
+        draw_mesh(get_rocket_mesh(1))
         
         glPopMatrix()
 
-def draw_rocket_body():
-    """Draws the rocket body components."""
-    # Rocket Body (main cylinder)
-    glPushMatrix()
-    
-    # Set color for rocket body
-    glColor3f(0.8, 0.8, 0.9)  # Light metallic blue-grey
+def apply_rocket_transform():
+    """Moves to the Camera Director rocket and turns to its heading, tumble and spin."""
+    # Position at rocket location
+    glTranslatef(rocket_position[0], rocket_position[1], rocket_position[2])
     
-    # Create the quadric for the cylinder and cone
-    quadric = gluNewQuadric()
-    gluQuadricNormals(quadric, GLU_SMOOTH)
+    # Orient the rocket to face the direction of travel
+    # Calculate the angle between the rocket's heading and the x-axis
+    angle = math.degrees(math.atan2(rocket_heading[2], rocket_heading[0]))
+    glRotatef(-angle, 0, 1, 0)  # Rotate around Y axis to face direction of travel
     
-    # Main body cylinder
-    gluCylinder(quadric, ROCKET_RADIUS, ROCKET_RADIUS, ROCKET_LENGTH * 0.7, 20, 5)
-    
-    # Nose cone
-    glPushMatrix()
-    glTranslatef(0, 0, ROCKET_LENGTH * 0.7)
-    gluCylinder(quadric, ROCKET_RADIUS, 0, ROCKET_LENGTH * 0.3, 20, 5)
-    glPopMatrix()
-    
-    # Base cap (optional)
-    gluDisk(quadric, 0, ROCKET_RADIUS, 20, 5)
-    
-    # Fins (4 triangular fins at the base)
-    glPushMatrix()
-    glColor3f(0.7, 0.2, 0.2)  # Reddish fins
-    for i in range(4):
-        glRotatef(90, 0, 0, 1)  # Rotate 90 degrees for each fin
-        glBegin(GL_TRIANGLES)
-        glNormal3f(0, 1, 0)  # Simple normal for lighting
-        glVertex3f(0, 0, 0)  # Base of fin at rocket base
-        glVertex3f(0, 0, ROCKET_LENGTH * 0.3)  # Fin extends along rocket
-        glVertex3f(0, ROCKET_RADIUS * 1.5, 0)  # Fin extends outward
-        glEnd()
-    glPopMatrix()
+    # Add tumbling/spinning during crash
+    if is_crashing:
+        tumble_angle = crash_progress * crash_spin_speed * 720.0
+        glRotatef(tumble_angle, 1, 0, 0)  # Roll
+        glRotatef(tumble_angle * 0.7, 0, 0, 1)  # Yaw
     
-    # Cleanup
-    gluDeleteQuadric(quadric)
+    # Apply rocket's self-rotation
+    glRotatef(rocket_rotation_angle, 0, 0, 1)
+
+def draw_rocket_body():
+    """Draws the rocket body components (cylinder, nose cone, base cap and fins)."""
+    draw_mesh(get_rocket_mesh(0))
+
+# --- Rocket Mesh Functions ---
+
+def grid_indices(rows, cols):
+    """Triangle indices for a (rows + 1) x (cols + 1) vertex grid."""
+    r, c = np.meshgrid(np.arange(rows), np.arange(cols), indexing="ij")
+    a = (r * (cols + 1) + c).ravel()
+    b = a + cols + 1
+    return np.stack([a, b, a + 1, a + 1, b, b + 1], axis=1).ravel()
+
+def mesh_part(positions, normals, indices, color):
+    """Bundles one mesh part with a single flat color."""
+    colors = np.tile(np.asarray(color, dtype=np.float32), (len(positions), 1))
+    return positions.astype(np.float32), normals.astype(np.float32), colors, indices
+
+def cylinder_part(base_radius, top_radius, height, slices, stacks, color, z=0.0):
+    """Side of a (possibly tapered) cylinder along +Z, like gluCylinder."""
+    theta = np.linspace(0.0, 2 * math.pi, slices + 1)
+    t = np.linspace(0.0, 1.0, stacks + 1)
+    tt, th = np.meshgrid(t, theta, indexing="ij")
+    radius = base_radius + (top_radius - base_radius) * tt
+    positions = np.stack([radius * np.cos(th), radius * np.sin(th), z + height * tt], axis=-1).reshape(-1, 3)
+    slope = (base_radius - top_radius) / height
+    normals = np.stack([np.cos(th), np.sin(th), np.full_like(th, slope)], axis=-1).reshape(-1, 3)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    return mesh_part(positions, normals, grid_indices(stacks, slices), color)
+
+def disk_part(radius, slices, color, z=0.0, facing=1.0):
+    """Flat disk in the XY plane at height z, like gluDisk."""
+    theta = np.linspace(0.0, 2 * math.pi, slices + 1)
+    ring = np.stack([radius * np.cos(theta), radius * np.sin(theta), np.full_like(theta, z)], axis=1)
+    positions = np.vstack([[0.0, 0.0, z], ring])
+    normals = np.tile([0.0, 0.0, facing], (len(positions), 1))
+    i = np.arange(1, slices + 1)
+    indices = np.stack([np.zeros_like(i), i, i + 1], axis=1).ravel()
+    return mesh_part(positions, normals, indices, color)
+
+def sphere_part(radius, slices, stacks, color, center=(0.0, 0.0, 0.0)):
+    """Sphere around center, like glutSolidSphere."""
+    phi = np.linspace(0.0, math.pi, stacks + 1)
+    theta = np.linspace(0.0, 2 * math.pi, slices + 1)
+    ph, th = np.meshgrid(phi, theta, indexing="ij")
+    normals = np.stack([np.sin(ph) * np.cos(th), np.sin(ph) * np.sin(th), np.cos(ph)], axis=-1).reshape(-1, 3)
+    return mesh_part(normals * radius + center, normals, grid_indices(stacks, slices), color)
+
+def torus_part(inner_radius, outer_radius, sides, rings, color, z=0.0):
+    """Torus around the Z axis, like glutSolidTorus."""
+    phi = np.linspace(0.0, 2 * math.pi, sides + 1)
+    theta = np.linspace(0.0, 2 * math.pi, rings + 1)
+    th, ph = np.meshgrid(theta, phi, indexing="ij")
+    normals = np.stack([np.cos(ph) * np.cos(th), np.cos(ph) * np.sin(th), np.sin(ph)], axis=-1).reshape(-1, 3)
+    centers = np.stack([outer_radius * np.cos(th), outer_radius * np.sin(th), np.zeros_like(th)], axis=-1).reshape(-1, 3)
+    positions = centers + normals * inner_radius + [0.0, 0.0, z]
+    return mesh_part(positions, normals, grid_indices(rings, sides), color)
+
+def triangle_part(a, b, c, color):
+    """A single flat triangle (used for fins)."""
+    positions = np.array([a, b, c], dtype=np.float64)
+    normal = np.cross(positions[1] - positions[0], positions[2] - positions[0])
+    normal /= np.linalg.norm(normal)
+    return mesh_part(positions, np.tile(normal, (3, 1)), np.arange(3), color)
+
+def rotate_z(points, degrees):
+    """Rotates (N, 3) points about the Z axis."""
+    angle = math.radians(degrees)
+    c, s = math.cos(angle), math.sin(angle)
+    return points @ np.array([[c, s, 0.0], [-s, c, 0.0], [0.0, 0.0, 1.0]])
+
+def build_rocket_parts(mode):
+    """Model-space parts of the rocket for a scene mode (same shapes as the old per-frame code)."""
+    if mode == 0:  # Camera Director rocket
+        body_color = [0.8, 0.8, 0.9]  # Light metallic blue-grey
+        parts = [
+            cylinder_part(ROCKET_RADIUS, ROCKET_RADIUS, ROCKET_LENGTH * 0.7, 20, 5, body_color),  # Main body
+            cylinder_part(ROCKET_RADIUS, 0.0, ROCKET_LENGTH * 0.3, 20, 5, body_color, z=ROCKET_LENGTH * 0.7),  # Nose
+            disk_part(ROCKET_RADIUS, 20, body_color),  # Base cap
+        ]
+        fin = np.array([[0, 0, 0], [0, 0, ROCKET_LENGTH * 0.3], [0, ROCKET_RADIUS * 1.5, 0]], dtype=np.float64)
+        for i in range(4):  # 4 triangular fins, 90 degrees apart
+            parts.append(triangle_part(*rotate_z(fin, 90 * (i + 1)), [0.7, 0.2, 0.2]))
+        return parts
     
-    glPopMatrix()
+    # Gameplay Designer rocket (built along +Z, the draw call pivots it)
+    parts = [
+        cylinder_part(2.5, 2.5, 30.0, 32, 32, [0.7, 0.7, 0.7]),  # Main body
+        disk_part(2.5, 32, [0.7, 0.7, 0.7], z=0.0, facing=-1.0),
+        disk_part(2.5, 32, [0.7, 0.7, 0.7], z=30.0),
+        cylinder_part(2.5, 0.0, 8.0, 32, 32, [1.0, 0.0, 0.0], z=30.0),  # Nose cone
+        disk_part(2.5, 32, [1.0, 0.0, 0.0], z=30.0, facing=-1.0),
+        cylinder_part(3.0, 3.0, 2.0, 32, 32, [0.3, 0.3, 0.3], z=-2.0),  # Engine nozzle
+        disk_part(3.0, 32, [0.3, 0.3, 0.3], z=-2.0, facing=-1.0),
+        disk_part(3.0, 32, [0.3, 0.3, 0.3], z=0.0),
+        sphere_part(1.5, 32, 32, [0.0, 0.0, 1.0], center=(0.0, 0.0, 22.0)),  # Window
+    ]
+    fin = np.array([[2.5, 0, 0], [7.5, 0, 0], [2.5, 0, 8]], dtype=np.float64)
+    for i in range(3):  # Fins, radial placement around Z-axis
+        parts.append(triangle_part(*rotate_z(fin, i * 120), [0.0, 0.5, 0.0]))
+    for z in [5.0, 15.0, 25.0]:  # Decorative stripes
+        parts.append(torus_part(0.2, 2.6, 16, 16, [1.0, 0.5, 0.0], z=z))
+    return parts
+
+def build_mesh(parts):
+    """Merges parts into one interleaved vertex array and one index array."""
+    vertices = []
+    indices = []
+    base = 0
+    for positions, normals, colors, part_indices in parts:
+        vertices.append(np.hstack([positions, normals, colors]))
+        indices.append(np.asarray(part_indices, dtype=np.uint32) + base)
+        base += len(positions)
+    return np.ascontiguousarray(np.vstack(vertices), dtype=np.float32), np.concatenate(indices)
+
+def get_rocket_mesh(mode):
+    """Returns the uploaded rocket mesh for a scene mode, building it on first use."""
+    mesh = rocket_meshes.get(mode)
+    if mesh is None:
+        vertices, indices = build_mesh(build_rocket_parts(mode))
+        mesh = {
+            "vertices": vbo.VBO(vertices),
+            "indices": vbo.VBO(indices, target=GL_ELEMENT_ARRAY_BUFFER),
+            "count": len(indices),
+        }
+        rocket_meshes[mode] = mesh
+    return mesh
+
+def draw_mesh(mesh, colors=True):
+    """Draws an uploaded mesh with a single glDrawElements call.
+
+    With colors=False the current color is used (the picking pass).
+    """
+    vertices = mesh["vertices"]
+    indices = mesh["indices"]
+    vertices.bind()
+    indices.bind()
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glEnableClientState(GL_NORMAL_ARRAY)
+    glVertexPointer(3, GL_FLOAT, ROCKET_MESH_STRIDE, vertices)
+    glNormalPointer(GL_FLOAT, ROCKET_MESH_STRIDE, vertices + 12)
+    if colors:
+        glEnableClientState(GL_COLOR_ARRAY)
+        glColorPointer(3, GL_FLOAT, ROCKET_MESH_STRIDE, vertices + 24)
+    glDrawElements(GL_TRIANGLES, mesh["count"], GL_UNSIGNED_INT, indices)
+    if colors:
+        glDisableClientState(GL_COLOR_ARRAY)
+        statecache.invalidate("color")  # The color array leaves the current color undefined
+    glDisableClientState(GL_NORMAL_ARRAY)
+    glDisableClientState(GL_VERTEX_ARRAY)
+    indices.unbind()
+    vertices.unbind()
 
 def draw_rocket_thrust():
     """Draws the rocket engine thrust flame."""
@@ -1249,11 +3057,341 @@ def draw_rocket_thrust():
     
     glPopMatrix()
 
+# --- Motion Trail Functions ---
+
+def reset_trails():
+    """Empties the trail history: one (bodies, TRAIL_LENGTH, 3) ring for the planets, moons and rocket."""
+    global trails
+    trails = {
+        "positions": np.zeros((len(BODY_NAMES) + 1, TRAIL_LENGTH, 3), dtype=np.float32),
+        "samples": np.zeros(1, dtype=np.int64),  # Positions recorded so far (sample n is in slot n % TRAIL_LENGTH)
+    }
+
+def record_trails():
+    """Writes every body's current world position into the next ring slot."""
+    samples = trails["samples"]
+    slot = samples[0] % TRAIL_LENGTH
+    trails["positions"][:-1, slot] = planet_orbits["positions"]
+    trails["positions"][-1, slot] = rocket_position
+    samples[0] += 1
+
+def trail_segments(first, last):
+    """Line segment vertices from sample n - 1 to n for n in first..last-1, for every body.
+
+    Returns (last - first, bodies, 2, TRAIL_VERTEX_FLOATS) float32; each
+    vertex carries its sample number, from which the shader fades it.
+    """
+    numbers = np.arange(first, last)
+    positions = trails["positions"]
+    vertices = np.empty((len(numbers), len(positions), 2, TRAIL_VERTEX_FLOATS), dtype=np.float32)
+    for end, sample_numbers in enumerate((numbers - 1, numbers)):
+        vertices[:, :, end, :3] = positions[:, sample_numbers % TRAIL_LENGTH].transpose(1, 0, 2)
+        vertices[:, :, end, 6] = (sample_numbers % TRAIL_SAMPLE_PERIOD)[:, None]
+    vertices[:, :, :, 3:6] = TRAIL_COLORS[:, None, :]
+    return vertices
+
+def update_trail_buffer():
+    """Uploads the trail segments recorded since the last frame.
+
+    The GPU keeps a ring of segments: the segment ending at sample n
+    sits in slot n % TRAIL_LENGTH, so each new sample overwrites one
+    contiguous block (one glBufferSubData) and the history already
+    uploaded is never sent again. Only a reset refills the buffer.
+    """
+    global trail_buffer
+    samples = int(trails["samples"][0])
+    if trail_buffer is None or samples < trail_buffer["uploaded"]:
+        vertices = np.zeros((TRAIL_LENGTH, len(TRAIL_COLORS), 2, TRAIL_VERTEX_FLOATS), dtype=np.float32)
+        vertices[..., 6] = TRAIL_SAMPLE_PERIOD // 2  # Unwritten slots look far too old to draw
+        if trail_buffer is not None:
+            trail_buffer["vbo"].delete()
+        trail_buffer = {"vbo": vbo.VBO(vertices), "uploaded": 0}
+    first = max(1, trail_buffer["uploaded"], samples - TRAIL_LENGTH + 1)
+    while first < samples:
+        slot = first % TRAIL_LENGTH
+        last = min(samples, first + TRAIL_LENGTH - slot)  # Up to the end of the ring
+        trail_buffer["vbo"][slot:slot + last - first] = trail_segments(first, last)
+        first = last
+    trail_buffer["uploaded"] = samples
+
+@gl_section
+def draw_trails():
+    """Draws the fading trails of every planet, moon and the rocket in one glDrawArrays.
+
+    Without shader support the trails are drawn without fading.
+    """
+    samples = int(trails["samples"][0])
+    if samples < 2:
+        return
+    update_trail_buffer()
+    buffer = trail_buffer["vbo"]
+    glPushAttrib(GL_ENABLE_BIT)
+    glEnable(GL_BLEND)
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    glLineWidth(1)
+    buffer.bind()
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glEnableClientState(GL_COLOR_ARRAY)
+    glVertexPointer(3, GL_FLOAT, TRAIL_VERTEX_STRIDE, buffer)
+    glColorPointer(3, GL_FLOAT, TRAIL_VERTEX_STRIDE, buffer + 12)
+    count = TRAIL_LENGTH * len(TRAIL_COLORS) * 2
+    program = use_shader_program("trails")
+    if program is not None:
+        sample_attribute = program["attributes"]["sample_number"]
+        glUniform1f(program["uniforms"]["newest_sample"], (samples - 1) % TRAIL_SAMPLE_PERIOD)
+        glUniform1f(program["uniforms"]["sample_period"], TRAIL_SAMPLE_PERIOD)
+        glUniform1f(program["uniforms"]["trail_length"], TRAIL_LENGTH)
+        glEnableVertexAttribArray(sample_attribute)
+        glVertexAttribPointer(sample_attribute, 1, GL_FLOAT, GL_FALSE, TRAIL_VERTEX_STRIDE, buffer + 24)
+        glDrawArrays(GL_LINES, 0, count)
+        glDisableVertexAttribArray(sample_attribute)
+        use_shader_program(None)
+    else:
+        glDrawArrays(GL_LINES, 0, count)
+    glDisableClientState(GL_COLOR_ARRAY)
+    statecache.invalidate("color")  # The color array leaves the current color undefined
+    glDisableClientState(GL_VERTEX_ARRAY)
+    buffer.unbind()
+    glPopAttrib()
+
+# --- Picking Functions ---
+
+def get_pick_framebuffer():
+    """Creates the small color + depth framebuffer the ID pass renders into (once per context)."""
+    global pick_framebuffer
+    if pick_framebuffer is None:
+        framebuffer = framebufferobjects.glGenFramebuffers(1)
+        color, depth = framebufferobjects.glGenRenderbuffers(2)
+        framebufferobjects.glBindFramebuffer(GL_FRAMEBUFFER, framebuffer)
+        for renderbuffer, storage, attachment in ((color, GL_RGBA8, GL_COLOR_ATTACHMENT0),
+                                                  (depth, GL_DEPTH_COMPONENT24, GL_DEPTH_ATTACHMENT)):
+            framebufferobjects.glBindRenderbuffer(GL_RENDERBUFFER, renderbuffer)
+            framebufferobjects.glRenderbufferStorage(GL_RENDERBUFFER, storage, PICK_SIZE, PICK_SIZE)
+            framebufferobjects.glFramebufferRenderbuffer(GL_FRAMEBUFFER, attachment, GL_RENDERBUFFER, renderbuffer)
+        framebufferobjects.checkFramebufferStatus()
+        framebufferobjects.glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        framebufferobjects.glBindRenderbuffer(GL_RENDERBUFFER, 0)
+        pick_framebuffer = {"framebuffer": framebuffer, "asteroid_colors": None}
+    return pick_framebuffer
+
+def pick_colors(first, count):
+    """(count, 3) uint8 colours encoding the IDs first .. first + count - 1 (red is the low byte)."""
+    ids = np.arange(first, first + count, dtype=np.uint32)
+    return (ids[:, None] >> np.array([0, 8, 16], dtype=np.uint32)).astype(np.uint8)
+
+def set_pick_color(pick_id):
+    """Sets the current colour to an object ID."""
+    glColor3ub(pick_id & 0xFF, (pick_id >> 8) & 0xFF, (pick_id >> 16) & 0xFF)
+
+def draw_pick_ids(target):
+    """Draws every pickable object of the solar system in its flat ID colour."""
+    set_pick_color(PICK_SUN)
+    glutSolidSphere(SUN_RADIUS, PICK_SPHERE_SLICES, PICK_SPHERE_STACKS)
+    for body, position in enumerate(planet_orbits["positions"]):
+        glPushMatrix()
+        glTranslatef(*position)
+        set_pick_color(PICK_BODIES + body)
+        glutSolidSphere(BODY_RADII[body], PICK_SPHERE_SLICES, PICK_SPHERE_STACKS)
+        glPopMatrix()
+    
+    glPushMatrix()
+    apply_rocket_transform()
+    set_pick_color(PICK_ROCKET)
+    draw_mesh(get_rocket_mesh(0), colors=False)
+    glPopMatrix()
+    
+    # The belt as fixed-function points, sized like the no-shader path but never too small to hit
+    count = int(len(asteroids["positions"]) * ASTEROID_DRAW_FRACTION)
+    if target["asteroid_colors"] is None or len(target["asteroid_colors"]) != count:
+        target["asteroid_colors"] = pick_colors(PICK_ASTEROIDS, count)
+    glPointParameterfv(GL_POINT_DISTANCE_ATTENUATION, ASTEROID_POINT_ATTENUATION)
+    glPointParameterf(GL_POINT_SIZE_MIN, PICK_ASTEROID_MIN_PIXELS)
+    glPointParameterf(GL_POINT_SIZE_MAX, ASTEROID_POINT_MAX_PIXELS)
+    glPointSize(0.5 * (ASTEROID_MIN_SIZE + ASTEROID_MAX_SIZE) * point_sprite_scale())
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glEnableClientState(GL_COLOR_ARRAY)
+    glVertexPointer(3, GL_FLOAT, 0, asteroids["positions"])
+    glColorPointer(3, GL_UNSIGNED_BYTE, 0, target["asteroid_colors"])
+    glDrawArrays(GL_POINTS, 0, count)
+    glDisableClientState(GL_COLOR_ARRAY)
+    glDisableClientState(GL_VERTEX_ARRAY)
+    glPointParameterfv(GL_POINT_DISTANCE_ATTENUATION, POINT_NO_ATTENUATION)
+
+def pick_object(x, y):
+    """Returns (kind, index) of the object under window pixel (x, y), or None.
+
+    Renders object IDs as colours into a PICK_SIZE square framebuffer that
+    gluPickMatrix fits around the cursor, then reads back those few pixels.
+    The centre pixel wins, otherwise the nearest covered one, so the cost
+    of mapping a click to an object doesn't grow with the scene.
+    """
+    target = get_pick_framebuffer()
+    viewport = glGetIntegerv(GL_VIEWPORT)
+    window_y = glutGet(GLUT_WINDOW_HEIGHT) - 1 - y  # GL counts rows from the bottom
+    
+    setupCamera()
+    glMatrixMode(GL_PROJECTION)
+    projection = glGetDoublev(GL_PROJECTION_MATRIX)
+    glLoadIdentity()
+    gluPickMatrix(x + 0.5, window_y + 0.5, PICK_SIZE, PICK_SIZE, viewport)
+    glMultMatrixd(projection)
+    glMatrixMode(GL_MODELVIEW)
+    
+    framebufferobjects.glBindFramebuffer(GL_FRAMEBUFFER, target["framebuffer"])
+    glPushAttrib(GL_ENABLE_BIT | GL_VIEWPORT_BIT | GL_COLOR_BUFFER_BIT | GL_POINT_BIT | GL_CURRENT_BIT)
+    glViewport(0, 0, PICK_SIZE, PICK_SIZE)
+    glDisable(GL_BLEND)
+    glDisable(GL_DITHER)  # IDs must come back exactly
+    glDisable(GL_TEXTURE_2D)
+    glEnable(GL_DEPTH_TEST)
+    use_shader_program(None)
+    glClearColor(0.0, 0.0, 0.0, 0.0)
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    draw_pick_ids(target)
+    glPixelStorei(GL_PACK_ALIGNMENT, 1)
+    pixels = glReadPixels(0, 0, PICK_SIZE, PICK_SIZE, GL_RGB, GL_UNSIGNED_BYTE)
+    glPopAttrib()
+    statecache.invalidate("color", "pointSize", "clearColor")  # Restored or changed behind the cache
+    framebufferobjects.glBindFramebuffer(GL_FRAMEBUFFER, 0)
+    
+    pixels = np.frombuffer(pixels, dtype=np.uint8).reshape(PICK_SIZE, PICK_SIZE, 3).astype(np.uint32)
+    ids = pixels[..., 0] | (pixels[..., 1] << 8) | (pixels[..., 2] << 16)
+    rows, columns = np.nonzero(ids)
+    if len(rows) == 0:
+        return None
+    centre = PICK_SIZE // 2
+    nearest = np.argmin((rows - centre) ** 2 + (columns - centre) ** 2)
+    return pick_target(int(ids[rows[nearest], columns[nearest]]))
+
+def pick_target(pick_id):
+    """Maps an object ID back to (kind, index) with a few comparisons."""
+    if pick_id == PICK_SUN:
+        return ("sun", 0)
+    if pick_id < PICK_ROCKET:
+        return ("body", pick_id - PICK_BODIES)
+    if pick_id == PICK_ROCKET:
+        return ("rocket", 0)
+    if pick_id - PICK_ASTEROIDS < len(asteroids["positions"]):
+        return ("asteroid", pick_id - PICK_ASTEROIDS)
+    return None
+
+def describe_pick(picked):
+    """Readable name of a picked object."""
+    kind, index = picked
+    if kind == "body":
+        return BODY_NAMES[index].capitalize()
+    if kind == "asteroid":
+        return f"Asteroid #{index}"
+    return kind.capitalize()
+
+# --- Shader Pipeline Functions ---
+
+def shader_cache_path(name):
+    """Cache file for a program, keyed by the driver and the program's sources."""
+    vertex, fragment = SHADER_SOURCES[name][:2]
+    digest = hashlib.sha1()
+    for value in (glGetString(GL_VENDOR), glGetString(GL_RENDERER), glGetString(GL_VERSION)):
+        digest.update(value or b"")
+    digest.update(vertex.encode("utf-8"))
+    digest.update(fragment.encode("utf-8"))
+    return os.path.join(SHADER_CACHE_DIR, f"{name}-{digest.hexdigest()[:16]}.bin")
+
+def program_binaries_supported():
+    """True if the driver can hand linked programs back (GL 4.1 / ARB_get_program_binary)."""
+    try:
+        return (bool(get_program_binary.glInitGetProgramBinaryARB())
+                and glGetIntegerv(get_program_binary.GL_NUM_PROGRAM_BINARY_FORMATS) > 0)
+    except error.Error:
+        return False
+
+def load_cached_program(path):
+    """Creates a program from a cached binary, or returns None if the cache is missing or stale."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) <= SHADER_CACHE_HEADER.size:
+        return None
+    magic, binary_format = SHADER_CACHE_HEADER.unpack_from(data, 0)
+    if magic != SHADER_CACHE_MAGIC:
+        return None
+    program = shaders.ShaderProgram(glCreateProgram())
+    try:
+        # Validation checks against the current GL state, which isn't set up yet
+        return program.load(binary_format, np.frombuffer(data, dtype=np.int8, offset=SHADER_CACHE_HEADER.size),
+                            validate=False)
+    except (shaders.ShaderLinkError, error.Error):
+        glDeleteProgram(program)  # e.g. a driver update invalidated the binary
+        return None
+
+def save_program_binary(program, path):
+    """Writes a linked program's binary to the shader cache."""
+    binary_format, binary = program.retrieve()
+    try:
+        os.makedirs(SHADER_CACHE_DIR, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(SHADER_CACHE_HEADER.pack(SHADER_CACHE_MAGIC, binary_format))
+            f.write(binary.tobytes())
+    except OSError as e:
+        print(f"Could not cache shader program: {e}")
+
+def build_shader_program(name):
+    """Links a named program, from the binary cache when possible.
+
+    Returns the program and its uniform locations, or None when the
+    context has no GLSL support (the scene then stays fixed-function).
+    """
+    vertex, fragment, uniforms, attributes = SHADER_SOURCES[name]
+    cacheable = program_binaries_supported()
+    path = shader_cache_path(name) if cacheable else None
+    program = load_cached_program(path) if cacheable else None
+    try:
+        if program is None:
+            program = shaders.compileProgram(
+                shaders.compileShader(vertex, GL_VERTEX_SHADER),
+                shaders.compileShader(fragment, GL_FRAGMENT_SHADER),
+                retrievable=cacheable,
+                validate=False,
+            )
+            if cacheable:
+                save_program_binary(program, path)
+    except (shaders.ShaderCompilationError, shaders.ShaderLinkError, error.Error) as e:
+        print(f"Shader program '{name}' unavailable, using fixed-function drawing: {e}")
+        return None
+    return {
+        "program": program,
+        "uniforms": {uniform: glGetUniformLocation(program, uniform) for uniform in uniforms},
+        "attributes": {attribute: glGetAttribLocation(program, attribute) for attribute in attributes},
+    }
+
+def get_shader_program(name):
+    """Returns a named program, building it on first use (None if shaders are off or unsupported)."""
+    if not use_shaders:
+        return None
+    if name not in shader_programs:
+        shader_programs[name] = build_shader_program(name)
+    return shader_programs[name]
+
+def prepare_shader_programs():
+    """Links every program up front so the first frame doesn't stall on compilation."""
+    for name in SHADER_SOURCES:
+        get_shader_program(name)
+
+def use_shader_program(name):
+    """Binds a named program (None for fixed function) and returns it, or None if it is unavailable."""
+    global current_shader_program
+    entry = get_shader_program(name) if name else None
+    program = entry["program"] if entry else 0
+    if program != current_shader_program:  # Never touches glUseProgram on a fixed-function context
+        glUseProgram(program)
+        current_shader_program = program
+    return entry
+
 def draw_mode_info():
     """Draws information about the current camera mode."""
-    # Get current viewport dimensions for text positioning
-    viewport = glGetIntegerv(GL_VIEWPORT)
-    win_width, win_height = viewport[2], viewport[3]
+    # HUD coordinates (the HUD ortho projection spans the design window size)
+    win_width, win_height = WINDOW_WIDTH, WINDOW_HEIGHT
     
     # Display camera mode
     mode_text = "Unknown Mode"
@@ -1267,12 +3405,14 @@ def draw_mode_info():
         mode_text = "Crash Camera Mode (3) - Press 'c' to trigger crash sequence"
         if is_crashing:
             mode_text += f" - Crash progress: {int(crash_progress * 100)}%"
+    if camera_focus is not None and current_camera_mode != CAMERA_MODE_CRASH:
+        mode_text += f" - Framing {BODY_NAMES[camera_focus].capitalize()} (f: next, right click: clear)"
     
     # Draw mode text
     draw_text(10, win_height - 40, mode_text)
     
     # Draw key info
-    keys_text = "Keys: 0-3: Camera Modes | c: Crash Sequence | G/H: Gravity | ESC: Exit"
+    keys_text = "Keys: 0-3: Camera Modes | c: Crash Sequence | G/H: Gravity | f: Focus | n: N-body | t: Trails | ESC: Exit"
     draw_text(10, win_height - 60, keys_text)
     
     # Draw scene mode info
@@ -1280,7 +3420,17 @@ def draw_mode_info():
     if scene_mode == 1:
         scene_text = "Scene Mode: Rocket Game (p: toggle to Solar System)"
     draw_text(10, win_height - 80, scene_text)
+    
+    # Draw the rocket integrator's work for the last tick
+    stats = rocket_integrator_stats
+    draw_text(10, win_height - 100, f"Rocket integrator: {stats['steps']} steps, {stats['rejected']} rejected | "
+                                    f"Next step: {rocket_step_size:.3f} ticks | Error: {stats['error']:.2f} x tolerance")
+    
+    # Draw the last clicked object
+    if selected_object is not None:
+        draw_text(10, win_height - 120, "Selected: " + describe_pick(selected_object))
 
+@gl_section
 def setupCamera():
     """Sets up the projection and modelview matrices for the camera."""
     global camera_pos, camera_target, camera_up
@@ -1340,8 +3490,13 @@ def setupCamera():
     gluLookAt(cx, cy, cz, tx, ty, tz, ux, uy, uz)
 
 
+@gl_section
 def setup_lighting():
-    """Configures OpenGL lighting."""
+    """Configures OpenGL lighting (every frame; the state cache drops unchanged values).
+
+    The shader programs read the sun and material through gl_LightSource[0]
+    and gl_FrontMaterial, so this stays the single place to tune them.
+    """
     # Set light properties
     glLightfv(GL_LIGHT0, GL_POSITION, sun_light_position)
     glLightfv(GL_LIGHT0, GL_DIFFUSE, sun_light_diffuse)
@@ -1361,6 +3516,11 @@ def setup_lighting():
 
 def specialKeyListener(key, x, y):
     """Handles special key input (arrows, function keys)."""
+    handle_input_event(key, EVENT_FLAG_DOWN | EVENT_FLAG_SPECIAL)
+    glutPostRedisplay()  # Request redraw
+
+def apply_special_key(key):
+    """Applies a special key press to the simulation state."""
     global camera_pos
     
     if scene_mode == 0:  # Only in solar system mode
@@ -1374,24 +3534,33 @@ def specialKeyListener(key, x, y):
         elif key == GLUT_KEY_RIGHT:
             x_cam += CAMERA_MOVE_SPEED  # Move camera right
         camera_pos = [x_cam, y_cam, z_cam]
-    
-    glutPostRedisplay()  # Request redraw
 
 def mouseListener(button, state, x, y):
     """Handles mouse button clicks."""
-    global camera_pos, camera_target
+    global selected_object
     
+    if scene_mode != 0:
+        return  # Only the solar system has pickable objects
     if button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
-        # Example: Could be used for selecting objects
-        pass
+        # Select the object under the cursor; planets and moons also take the camera focus
+        selected_object = pick_object(x, y)
+        if selected_object is not None:
+            kind, index = selected_object
+            print("Selected: " + describe_pick(selected_object))
+            if kind == "body":
+                handle_input_event(index, EVENT_FLAG_FOCUS)
+            elif kind == "sun":
+                handle_input_event(FOCUS_NONE, EVENT_FLAG_FOCUS)
     elif button == GLUT_RIGHT_BUTTON and state == GLUT_DOWN:
-        # Example: Could reset camera
-        pass
+        # Clear the selection and look back at the Sun
+        selected_object = None
+        handle_input_event(FOCUS_NONE, EVENT_FLAG_FOCUS)
     
     glutPostRedisplay()
 
 def reshape(width, height):
     """Handle window resize while maintaining fixed aspect ratio"""
+    global viewport_height
     # Calculate target aspect ratio (same as initial window)
     target_aspect = float(WINDOW_WIDTH) / float(WINDOW_HEIGHT)
     
@@ -1400,10 +3569,12 @@ def reshape(width, height):
         # Window is wider than target - pillarbox
         new_width = int(height * target_aspect)
         glViewport((width - new_width)//2, 0, new_width, height)
+        viewport_height = height
     else:
         # Window is taller than target - letterbox
         new_height = int(width / target_aspect)
         glViewport(0, (height - new_height)//2, width, new_height)
+        viewport_height = new_height
     
     # Maintain original projection matrix
     glMatrixMode(GL_PROJECTION)
@@ -1411,55 +3582,30 @@ def reshape(width, height):
     gluPerspective(FOV_Y, target_aspect, NEAR_CLIP, FAR_CLIP)
     glMatrixMode(GL_MODELVIEW)
 
-def idle():
-    """Called by GLUT when idle. Updates animation state."""
-    global earth_rotation_angle
-    global earth_orbit_angle, mars_orbit_angle, jupiter_orbit_angle, saturn_orbit_angle
-    global mercury_orbit_angle, venus_orbit_angle, uranus_orbit_angle, neptune_orbit_angle
-    global moon_orbit_angle, phobos_orbit_angle, deimos_orbit_angle
-    global io_orbit_angle, europa_orbit_angle, ganymede_orbit_angle, callisto_orbit_angle
-    global titan_orbit_angle, titania_orbit_angle, triton_orbit_angle
-    global asteroids, scene_mode, rocket_pos, rocket_movement, camera_pos_mode_1, camera_target_mode_1
+def update_simulation():
+    """Advances the simulation by one fixed tick. Needs no GL context."""
+    global sim_tick
+    global scene_mode, rocket_pos, rocket_movement, camera_pos_mode_1, camera_target_mode_1
     global game_over, mission_complete, mission_start_time, mission_planet_pos, repair_mode, rocket_health
     
     if scene_mode == 0:
-        # Update planet orbital angles
-        earth_rotation_angle = (earth_rotation_angle + EARTH_ROTATION_SPEED * GRAVITY_FACTOR) % 360.0
-        mercury_orbit_angle = (mercury_orbit_angle + MERCURY_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        venus_orbit_angle = (venus_orbit_angle + VENUS_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        earth_orbit_angle = (earth_orbit_angle + EARTH_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        mars_orbit_angle = (mars_orbit_angle + MARS_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        jupiter_orbit_angle = (jupiter_orbit_angle + JUPITER_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        saturn_orbit_angle = (saturn_orbit_angle + SATURN_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        uranus_orbit_angle = (uranus_orbit_angle + URANUS_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        neptune_orbit_angle = (neptune_orbit_angle + NEPTUNE_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        
-        # Update moon orbits
-        moon_orbit_angle = (moon_orbit_angle + MOON_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        phobos_orbit_angle = (phobos_orbit_angle + PHOBOS_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        deimos_orbit_angle = (deimos_orbit_angle + DEIMOS_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        io_orbit_angle = (io_orbit_angle + IO_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        europa_orbit_angle = (europa_orbit_angle + EUROPA_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        ganymede_orbit_angle = (ganymede_orbit_angle + GANYMEDE_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        callisto_orbit_angle = (callisto_orbit_angle + CALLISTO_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        titan_orbit_angle = (titan_orbit_angle + TITAN_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        titania_orbit_angle = (titania_orbit_angle + TITANIA_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        triton_orbit_angle = (triton_orbit_angle + TRITON_ORBIT_SPEED * GRAVITY_FACTOR) % (2 * math.pi)
-        
-        # Update asteroid positions
-        for asteroid in asteroids:
-            asteroid["angle"] = (asteroid["angle"] + ASTEROID_ORBIT_SPEED * (ASTEROID_BELT_INNER_RADIUS / asteroid["distance"]) * GRAVITY_FACTOR) % (2 * math.pi)
-            asteroid["x"] = asteroid["distance"] * math.cos(asteroid["angle"])
-            asteroid["z"] = asteroid["distance"] * math.sin(asteroid["angle"])
+        # Update planet, moon and asteroid orbits (Kepler's equation for every body at once)
+        set_orbit_time(orbit_time + GRAVITY_FACTOR * time_warp)
+        if nbody_mode:
+            update_nbody(GRAVITY_FACTOR)  # Asteroids and moons fall freely, the planets stay on their orbits
         
         # Update rocket position
         update_rocket_position()
         
         # Update camera based on mode
         update_camera()
+        
+        if show_trails and sim_tick % TRAIL_SAMPLE_TICKS == 0:
+            record_trails()
     
     elif scene_mode == 1 and not game_over and not mission_complete:
-        # Handle rocket movement
+        # Handle rocket movement (collisions are tested along the whole move)
+        previous_pos = rocket_pos[:]
         if rocket_movement["w"]:
           rocket_pos[1] += movement  # Up (Y+)
         if rocket_movement["s"]:
@@ -1487,12 +3633,12 @@ def idle():
         
         # Initialize mission if needed
         if mission_start_time is None:
-            mission_start_time = time.time()
+            mission_start_time = get_sim_time()
         
         # Check if it's time to spawn the mission planet
         if not mission_complete:
-            elapsed_time = time.time() - mission_start_time
-            if elapsed_time >= 120 and mission_planet_pos is None:  # 2 minutes have passed
+            elapsed_time = get_sim_time() - mission_start_time
+            if elapsed_time >= MISSION_PLANET_DELAY and mission_planet_pos is None:  # 2 minutes have passed
                 mission_planet_pos = [
                     rocket_pos[0],  # Same x-coordinate as the rocket
                     rocket_pos[1],  # Same y-coordinate as the rocket
@@ -1505,17 +3651,18 @@ def idle():
         camera_target_mode_1 = rocket_pos[:]  # Camera looks at the rocket
         camera_pos_mode_1 = [rocket_pos[0], rocket_pos[1] + 20.0, rocket_pos[2] + 70.0]  # Position camera above and behind the rocket
         
-        # Update game elements
+        # Update game elements (hits first, so meteors passed this tick aren't despawned untested)
         update_stars_mode_1()
+        check_collisions(previous_pos)
         update_meteors()
-        check_collisions()
         
         # Handle repair mode
         if repair_mode:
+            check_repair_collision(previous_pos)
             update_repair_items()
             
             # Check timer
-            if time.time() - repair_timer > REPAIR_TIME:
+            if get_sim_time() - repair_timer > REPAIR_TIME:
                 repair_mode = False
                 rocket_health = 0
                 game_over = True
@@ -1524,29 +3671,51 @@ def idle():
             if repair_progress >= REPAIR_ITEMS_NEEDED:
                 repair_mode = False
                 rocket_health += 2
-                if rocket_health > 10:
-                    rocket_health = 10
-            
-            check_repair_collision()
+                if rocket_health > ROCKET_MAX_HEALTH:
+                    rocket_health = ROCKET_MAX_HEALTH
+        
+        # Keep rocket-mode coordinates small enough for float32 vertices
+        if max(abs(value) for value in rocket_pos) > ORIGIN_REBASE_DISTANCE:
+            rebase_origin()
+    
+    sim_tick += 1
+
+def idle():
+    """Called by GLUT when idle (unpaced mode). Runs fixed simulation ticks for elapsed real time."""
+    if simulation_worker is not None:
+        # The worker keeps the clock; redraw whenever it has finished a new frame
+        if receive_simulation_frame(SIM_TICK_SECONDS):
+            glutPostRedisplay()
+        return
     
+    run_due_ticks()
     glutPostRedisplay()  # Request redraw
 
+def run_due_ticks():
+    """Runs the fixed simulation ticks owed for the real time elapsed since the last call."""
+    global sim_time_accumulator, last_idle_time
+    
+    now = time.perf_counter()
+    if last_idle_time is None:
+        last_idle_time = now - SIM_TICK_SECONDS  # Run one tick on the first call
+    sim_time_accumulator += now - last_idle_time
+    last_idle_time = now
+    
+    ticks = 0
+    while sim_time_accumulator >= SIM_TICK_SECONDS and ticks < MAX_TICKS_PER_IDLE:
+        update_simulation()
+        sim_time_accumulator -= SIM_TICK_SECONDS
+        ticks += 1
+    if ticks == MAX_TICKS_PER_IDLE:
+        sim_time_accumulator = 0.0  # Drop the backlog instead of spiralling
 
 
 
 
 
-def display():
-    
-    """The main display function called by GLUT."""
-    # Clear buffers
-    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-    glClearColor(0.0, 0.0, 0.0, 1.0)  # Black background
-    
-    # Set up camera and lighting for this frame
-    setupCamera()
-    setup_lighting()
-    
+
+def draw_world():
+    """Draws the 3D scene for the current scene mode."""
     if scene_mode == 0:
         # Full solar system view
         draw_starfield()
@@ -1554,6 +3723,8 @@ def display():
         draw_asteroid_belt()
         draw_solar_system()
         draw_rocket()  # Draw the rocket in orbit
+        if show_trails:
+            draw_trails()  # Last, so the trails blend over the bodies
     
     elif scene_mode == 1:
         # Rocket gameplay mode
@@ -1564,7 +3735,27 @@ def display():
         
         if repair_mode:
             draw_repair_items()
-    
+
+def draw_gl_stats(stats):
+    """Shows last frame's GL call count, elided state calls, upload estimate and busiest draw functions."""
+    busiest = sorted(stats["sections"].items(), key=lambda item: item[1][0], reverse=True)
+    top = ", ".join(f"{name} {calls}" for name, (calls, _) in busiest[:GL_STATS_TOP_SECTIONS])
+    draw_text(10, 30, f"GL calls: {stats['totalCalls']} | Elided: {last_elided_calls} | "
+                      f"Uploaded: {stats['totalBytes'] / 1024.0:.1f} KB | {top}",
+              font=GLUT_BITMAP_HELVETICA_12)
+
+def draw_frame_stats():
+    """Shows the measured frame rate, frame work against the budget, and the governor's quality level."""
+    pacer = frame_pacer
+    draw_text(10, 50, f"FPS: {pacer['fps']:.0f}/{1.0 / pacer['budget']:.0f} | "
+                      f"Frame work: {pacer['work_average'] * 1000.0:.1f} ms of {pacer['budget'] * 1000.0:.1f} ms | "
+                      f"Quality: {len(QUALITY_SCALES) - pacer['level']}/{len(QUALITY_SCALES)}"
+                      + ("" if pacer["governor"] else " (fixed)"),
+              font=GLUT_BITMAP_HELVETICA_12)
+
+@gl_section
+def draw_hud():
+    """Draws text and HUD elements in an orthographic overlay."""
     # Switch to orthographic projection for HUD/text
     glMatrixMode(GL_PROJECTION)
     glPushMatrix()
@@ -1578,9 +3769,9 @@ def display():
     # Draw text and HUD elements based on current mode
     if scene_mode == 0:
         # Solar system mode text
-        viewport = glGetIntegerv(GL_VIEWPORT)
-        win_width, win_height = viewport[2], viewport[3]
-        draw_text(10, win_height - 20, f"Solar System Simulation - Gravity: {GRAVITY_FACTOR:.1f}x")
+        win_width, win_height = WINDOW_WIDTH, WINDOW_HEIGHT
+        draw_text(10, win_height - 20, f"Solar System Simulation - Gravity: {GRAVITY_FACTOR:.1f}x | "
+                                       f"Time warp: {time_warp:g}x | Orbit time: {orbit_time:.0f}")
         draw_mode_info()
     
     elif scene_mode == 1:
@@ -1598,11 +3789,43 @@ def display():
         # Draw controls info
         draw_text(10, 10, "WASD: Move | P: Toggle Scene | ESC: Exit")
     
+    if frame_pacer is not None:
+        draw_frame_stats()
+    if last_gl_stats is not None:
+        draw_gl_stats(last_gl_stats)
+    
     # Restore matrices
     glMatrixMode(GL_PROJECTION)
     glPopMatrix()
     glMatrixMode(GL_MODELVIEW)
     glPopMatrix()
+
+def display():
+    """The main display function called by GLUT."""
+    global last_gl_stats, last_elided_calls
+    frame_start = time.perf_counter()
+    if callcounts.ACTIVE:
+        # Keep last frame's counts for the HUD, then start counting this frame
+        last_gl_stats = callcounts.snapshot()
+        callcounts.reset()
+        last_elided_calls = statecache.resetElidedCount()
+    
+    prepare_text_atlases()  # Only does work on the first frame
+    
+    # Clear buffers
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    glClearColor(0.0, 0.0, 0.0, 1.0)  # Black background
+    
+    # Set up camera and lighting for this frame
+    setupCamera()
+    setup_lighting()
+    
+    draw_world()
+    draw_hud()
+    
+    if frame_pacer is not None:
+        # Frame work so far (the swap may wait for vsync, which isn't work)
+        end_paced_frame(time.perf_counter() - frame_start)
     
     # Swap buffers to show the rendered frame - ALWAYS DO THIS LAST
     glutSwapBuffers()
@@ -1610,8 +3833,28 @@ def display():
 
 def keyboardListener(key, x, y):
     """Handles standard keyboard input."""
-    global camera_pos, current_camera_mode, GRAVITY_FACTOR, EARTH_ROTATION_SPEED
+    if key == b'\x1b':  # Escape key
+        stop_recording()
+        stop_simulation_worker()
+        glutLeaveMainLoop()  # Exit the application
+        return
+    if key == b'k':  # Save a scene snapshot (not part of the recorded input)
+        if simulation_worker is not None:
+            simulation_worker["connection"].send(("snapshot", snapshot_path))
+        else:
+            save_snapshot(snapshot_path)
+        return
+    
+    handle_input_event(key[0], EVENT_FLAG_DOWN)
+    glutPostRedisplay()  # Request redraw
+
+def apply_key_down(key):
+    """Applies a key press to the simulation state (shared by live input and replay)."""
+    global camera_pos, current_camera_mode, GRAVITY_FACTOR, EARTH_ROTATION_SPEED, earth_rotation_epoch, time_warp
+    global show_trails
     global scene_mode, rocket_movement, rocket_health, repair_mode, game_over, mission_complete, game_over
+    global rocket_pos, mission_start_time, mission_planet_pos, broken_parts, meteors, stars_mode_1, world_origin
+    global meteor_chunks_loaded
     
     # Handle camera mode keys in solar system mode
     if scene_mode == 0:
@@ -1630,6 +3873,20 @@ def keyboardListener(key, x, y):
         elif key == KEY_START_CRASH:
             start_crash_sequence()
             print("Crash Sequence Initiated!")
+        elif key == KEY_TOGGLE_NBODY:
+            if nbody_mode:
+                stop_nbody()
+                print("Gravity: Keplerian orbits")
+            else:
+                start_nbody()
+                print("Gravity: N-body")
+        elif key == KEY_CYCLE_FOCUS:
+            cycle_camera_focus()
+            print("Camera Focus: " + ("heading" if camera_focus is None else BODY_NAMES[camera_focus]))
+        elif key == KEY_TOGGLE_TRAILS:
+            show_trails = not show_trails
+            reset_trails()  # Start from a clean history
+            print("Trails: " + ("on" if show_trails else "off"))
         
         # Free camera movement in solar system mode
         if current_camera_mode == CAMERA_MODE_FREE:
@@ -1686,8 +3943,14 @@ def keyboardListener(key, x, y):
         GRAVITY_FACTOR = max(0.1, GRAVITY_FACTOR - GRAVITY_STEP)
     elif key == b',':  # Slow down rotation
         EARTH_ROTATION_SPEED = max(0.1, EARTH_ROTATION_SPEED - 0.1)
+        earth_rotation_epoch = earth_rotation_angle - EARTH_ROTATION_SPEED * orbit_time  # Continue from here
     elif key == b'.':  # Speed up rotation
         EARTH_ROTATION_SPEED = min(5.0, EARTH_ROTATION_SPEED + 0.1)
+        earth_rotation_epoch = earth_rotation_angle - EARTH_ROTATION_SPEED * orbit_time
+    elif key == b'[':  # Slow down the orbit clock
+        time_warp = TIME_WARP_LEVELS[max(0, TIME_WARP_LEVELS.index(time_warp) - 1)]
+    elif key == b']':  # Speed up the orbit clock
+        time_warp = TIME_WARP_LEVELS[min(len(TIME_WARP_LEVELS) - 1, TIME_WARP_LEVELS.index(time_warp) + 1)]
 
     # Inside keyboardListener function, modify the 'p' key handler:
     elif key == b'p':  # Toggle scene mode
@@ -1702,26 +3965,28 @@ def keyboardListener(key, x, y):
                 mission_complete = False
             
             # Initialize rocket position and camera for gameplay mode
-            rocket_pos = [0.0, 20.0, 175.0]  # Reset position
+            rocket_pos = ROCKET_GAME_START[:]  # Reset position
+            world_origin = [0.0, 0.0, 0.0]  # Undo the previous flight's rebasing
             rocket_health = 10
             repair_mode = False
             mission_start_time = None
             mission_planet_pos = None
             broken_parts = []
             meteors = []
+            meteor_chunks_loaded = None  # Stream the field again from ROCKET_GAME_START
+            meteor_chunk_futures.clear()
             stars_mode_1 = []
-        
-        # Generate initial stars and meteors
-        generate_stars_mode_1()
-        generate_meteors()
-
-    elif key == b'\x1b':  # Escape key
-        glutLeaveMainLoop()  # Exit the application
-    
-    glutPostRedisplay()  # Request redraw
+            
+            # Generate initial stars and meteors
+            generate_stars_mode_1()
+            update_meteors()
 
 def keyboardUpListener(key, x, y):
     """Handles key release events."""
+    handle_input_event(key[0], 0)
+
+def apply_key_up(key):
+    """Applies a key release to the rocket movement state."""
     global rocket_movement
     
     if scene_mode == 1:  # Rocket controls only in scene mode 1
@@ -1747,8 +4012,953 @@ def keyboardUpListener(key, x, y):
         # elif key == b'd':  # Stop moving right
         #     rocket_movement["d"] = False
 
+# --- Frame Pacing Functions ---
+
+def start_frame_pacing(fps=TARGET_FPS, governor=True):
+    """Drives frames from a GLUT timer at fps instead of redrawing from idle().
+
+    Between frames the process sleeps in GLUT rather than spinning. With
+    governor set, the quality knobs are turned down while frames run over
+    budget and back up once there is headroom again, starting from their
+    configured values.
+    """
+    global frame_pacer
+    frame_pacer = {
+        "budget": 1.0 / fps,
+        "next_frame": time.perf_counter(),
+        "tick_work": 0.0,  # Simulation time spent for the frame being prepared
+        "work_average": 0.0,
+        "fps": float(fps),
+        "last_frame": None,
+        "governor": governor,
+        "level": 0,
+        "over": 0,  # Consecutive frames over / under the governor's thresholds
+        "under": 0,
+        "base": {name: globals()[name] for name in QUALITY_KNOB_MINIMUMS},
+    }
+    glutTimerFunc(0, frame_timer, 0)
+
+def frame_timer(value):
+    """GLUT timer: advances the simulation, requests a redraw and schedules the next frame."""
+    pacer = frame_pacer
+    start = time.perf_counter()
+    if simulation_worker is not None:
+        receive_simulation_frame()
+    else:
+        run_due_ticks()
+    glutPostRedisplay()
+    now = time.perf_counter()
+    pacer["tick_work"] = now - start
+    
+    # Next frame one budget later; a late frame moves the schedule instead of bunching frames up
+    pacer["next_frame"] = max(pacer["next_frame"] + pacer["budget"], now)
+    glutTimerFunc(int((pacer["next_frame"] - now) * 1000.0), frame_timer, 0)
+
+def end_paced_frame(render_seconds):
+    """Records one frame's work (simulation plus rendering) and runs the quality governor."""
+    pacer = frame_pacer
+    now = time.perf_counter()
+    if pacer["last_frame"] is not None:
+        interval = now - pacer["last_frame"]
+        pacer["fps"] += FRAME_TIME_SMOOTHING * (1.0 / max(interval, 1e-6) - pacer["fps"])
+    pacer["last_frame"] = now
+    work = pacer["tick_work"] + render_seconds
+    pacer["tick_work"] = 0.0
+    pacer["work_average"] += FRAME_TIME_SMOOTHING * (work - pacer["work_average"])
+    if pacer["governor"]:
+        update_quality_governor(work)
+
+def update_quality_governor(work):
+    """Moves one quality level down after a run of slow frames, or up after a long run of fast ones."""
+    pacer = frame_pacer
+    load = work / pacer["budget"]
+    pacer["over"] = pacer["over"] + 1 if load > QUALITY_DROP_LOAD else 0
+    pacer["under"] = pacer["under"] + 1 if load < QUALITY_RAISE_LOAD else 0
+    if pacer["over"] >= QUALITY_DROP_FRAMES and pacer["level"] < len(QUALITY_SCALES) - 1:
+        apply_quality_level(pacer["level"] + 1)
+    elif pacer["under"] >= QUALITY_RAISE_FRAMES and pacer["level"] > 0:
+        apply_quality_level(pacer["level"] - 1)
+
+def apply_quality_level(level):
+    """Sets every quality knob to its configured value scaled for the governor level."""
+    pacer = frame_pacer
+    pacer["level"] = level
+    pacer["over"] = pacer["under"] = 0
+    scale = QUALITY_SCALES[level]
+    for name, minimum in QUALITY_KNOB_MINIMUMS.items():
+        base = pacer["base"][name]
+        value = max(min(minimum, base), base * scale)
+        globals()[name] = round(value) if isinstance(base, int) else value
+    print(f"Quality level {len(QUALITY_SCALES) - level}/{len(QUALITY_SCALES)}")
+
+# --- Simulation Worker Functions ---
+
+def frame_layout():
+    """Places the FRAME_ARRAYS in one shared memory slot, after its sequence number.
+
+    Returns ({(dict name, key): (offset, shape, dtype)}, slot size in bytes).
+    """
+    layout = {}
+    offset = align_offset(np.dtype(np.int64).itemsize)
+    for dict_name, key in FRAME_ARRAYS:
+        values = globals()[dict_name][key]
+        layout[(dict_name, key)] = (offset, values.shape, values.dtype.str)
+        offset = align_offset(offset + values.nbytes)
+    return layout, offset
+
+def frame_views(buffer, layout):
+    """NumPy views of one slot: (sequence number, {(dict name, key): array})."""
+    sequence = np.ndarray((1,), dtype=np.int64, buffer=buffer)
+    arrays = {name: np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+              for name, (offset, shape, dtype) in layout.items()}
+    return sequence, arrays
+
+def publish_frame(connection, slot, views, sent_lists):
+    """Copies the render state into a frame slot and announces it to the GLUT process.
+
+    The slot's sequence number is odd while it is being written, so a
+    reader can tell a torn copy from a complete one without a lock. A
+    point list is only sent when it differs from the copy in sent_lists
+    (the filters keep the point objects, so the comparison is cheap).
+    """
+    sequence, arrays = views
+    sequence[0] += 1
+    for (dict_name, key), values in arrays.items():
+        np.copyto(values, globals()[dict_name][key])
+    sequence[0] += 1
+    frame_state = {name: globals()[name] for name in FRAME_GLOBALS}
+    for name in SNAPSHOT_POINT_LISTS:
+        points = globals()[name]
+        if points != sent_lists.get(name):
+            sent_lists[name] = points[:]  # Some updates append in place
+            frame_state[name] = points
+    connection.send((slot, int(sequence[0]), frame_state))
+
+def simulation_worker_main(state, connection, slot_names, layout, seed, record_path=None):
+    """Worker process: runs the fixed-tick simulation and publishes every frame.
+
+    Input arrives over the pipe as ("input", code, flags) events (the
+    recording format), ("snapshot", path) saves the scene, None stops.
+    """
+    global SIM_SEED
+    SIM_SEED = seed
+    restore_state(state)
+    if record_path:
+        start_recording(record_path)
+    slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    views = [frame_views(slot.buf, layout) for slot in slots]
+    sent_lists = {}  # The first frame sends every point list
+    next_slot = 0
+    next_tick_time = time.perf_counter()
+    running = True
+    while running:
+        while running and connection.poll():
+            message = connection.recv()
+            if message is None:
+                running = False
+            elif message[0] == "snapshot":
+                save_snapshot(message[1])
+            else:
+                record_input_event(message[1], message[2])
+                dispatch_input_event(message[1], message[2])
+        
+        now = time.perf_counter()
+        ticks = 0
+        while next_tick_time <= now and ticks < MAX_TICKS_PER_IDLE:
+            update_simulation()
+            next_tick_time += SIM_TICK_SECONDS
+            ticks += 1
+        if ticks == MAX_TICKS_PER_IDLE:
+            next_tick_time = now  # Drop the backlog instead of spiralling
+        if ticks:
+            publish_frame(connection, next_slot, views[next_slot], sent_lists)
+            next_slot = (next_slot + 1) % FRAME_SLOTS
+        
+        # Sleep until the next tick is due, waking early for input
+        connection.poll(max(0.0, next_tick_time - time.perf_counter()))
+    
+    stop_recording()
+    del views  # The views must go before the shared memory can be closed
+    for slot in slots:
+        slot.close()
+
+def start_simulation_worker(record_path=None):
+    """Moves the simulation into a worker process; rendering reads its frames.
+
+    The worker starts from this process's current state. While it runs,
+    live input is forwarded to it and idle() applies its latest frame.
+    """
+    global simulation_worker
+    layout, size = frame_layout()
+    slots = [shared_memory.SharedMemory(create=True, size=size) for _ in range(FRAME_SLOTS)]
+    context = multiprocessing.get_context("spawn")
+    connection, worker_connection = context.Pipe()
+    process = context.Process(target=simulation_worker_main, daemon=True, args=(
+        capture_state(), worker_connection, [slot.name for slot in slots], layout, SIM_SEED, record_path))
+    process.start()
+    worker_connection.close()
+    simulation_worker = {
+        "process": process,
+        "connection": connection,
+        "slots": slots,
+        "views": [frame_views(slot.buf, layout) for slot in slots],
+        "pending": {},  # Frame state received but not applied yet
+    }
+    atexit.register(stop_simulation_worker)
+
+def stop_simulation_worker():
+    """Stops the worker (which ends its recording) and frees the frame slots."""
+    global simulation_worker
+    if simulation_worker is None:
+        return
+    worker, simulation_worker = simulation_worker, None
+    try:
+        worker["connection"].send(None)
+    except (BrokenPipeError, OSError):
+        pass  # Already gone
+    worker["process"].join(timeout=5.0)
+    if worker["process"].is_alive():
+        worker["process"].terminate()
+    worker["connection"].close()
+    del worker["views"]
+    for slot in worker["slots"]:
+        slot.close()
+        slot.unlink()
+
+def receive_simulation_frame(timeout=0.0):
+    """Applies the newest complete frame from the worker. Returns True if there was one.
+
+    Waits at most timeout seconds for a frame, and never for the worker's
+    lock: a slot the worker has started to overwrite is skipped, as a
+    newer frame is then already on its way. The state of skipped frames
+    is merged in order, since a point list is only sent when it changes.
+    """
+    connection = simulation_worker["connection"]
+    pending = simulation_worker["pending"]
+    latest = None
+    while connection.poll(timeout if latest is None else 0.0):
+        latest = connection.recv()
+        pending.update(latest[2])
+    if latest is None:
+        return False
+    slot, sequence_number, _ = latest
+    sequence, arrays = simulation_worker["views"][slot]
+    if sequence[0] != sequence_number:
+        return False
+    copies = {name: values.copy() for name, values in arrays.items()}
+    if sequence[0] != sequence_number:
+        return False  # Torn copy
+    globals().update(pending)
+    pending.clear()
+    for (dict_name, key), values in copies.items():
+        np.copyto(globals()[dict_name][key], values)
+    return True
+
+def handle_input_event(code, flags):
+    """Live input: applied here, or forwarded to the simulation worker if one runs."""
+    if simulation_worker is not None:
+        simulation_worker["connection"].send(("input", code, flags))
+        return
+    record_input_event(code, flags)
+    dispatch_input_event(code, flags)
+
+# --- Batched Episode Functions ---
+
+def reset_episodes(seeds):
+    """Starts one rocket-mode flight per seed, all stepped together by step_episodes().
+
+    The batch is a dict of arrays with a leading episode axis: per-episode
+    scalars are (E,), meteors (E, N, 3) slots with an (E, N) alive mask.
+    An episode plays out exactly like the live game seeded with its seed.
+    """
+    seeds = np.asarray(seeds, dtype=np.int64)
+    count = len(seeds)
+    window = METEOR_CHUNKS_BEHIND + METEOR_CHUNKS_AHEAD + 1
+    meteor_slots = window * (METEORS_PER_CHUNK + LANE_METEORS_PER_CHUNK)
+    batch = {
+        "seeds": seeds,
+        "positions": np.tile(np.array(ROCKET_GAME_START), (count, 1)),
+        "active": np.ones(count, dtype=bool),
+        "ticks": np.zeros(count, dtype=np.int64),  # Ticks flown (the episode's clock; stops when it ends)
+        "health": np.full(count, ROCKET_MAX_HEALTH, dtype=np.int64),
+        "game_over": np.zeros(count, dtype=bool),
+        "mission_complete": np.zeros(count, dtype=bool),
+        "has_planet": np.zeros(count, dtype=bool),
+        "planets": np.zeros((count, 3)),
+        "chunk_first": np.full(count, np.iinfo(np.int64).min // 2),  # First loaded chunk (none yet)
+        "meteors": np.zeros((count, meteor_slots, 3)),
+        "meteor_alive": np.zeros((count, meteor_slots), dtype=bool),
+        "repair_mode": np.zeros(count, dtype=bool),
+        "repair_timer": np.zeros(count),
+        "repair_progress": np.zeros(count, dtype=np.int64),
+        "last_repair_spawn": np.zeros(count),
+        "repair_items": np.zeros((count, MAX_REPAIR_ITEMS, 3)),
+        "repair_alive": np.zeros((count, MAX_REPAIR_ITEMS), dtype=bool),
+        "repair_rngs": [random.Random(f"{seed}:repair") for seed in seeds],  # Same stream as seed_simulation()
+        "meteor_hits": np.zeros(count, dtype=np.int64),
+        "repairs_started": np.zeros(count, dtype=np.int64),
+        "repairs_completed": np.zeros(count, dtype=np.int64),
+        "repair_items_collected": np.zeros(count, dtype=np.int64),
+    }
+    load_episode_chunks(batch, np.arange(count))
+    return batch
+
+def restart_episodes(batch, rows, seeds):
+    """Replaces the episodes in rows with fresh ones for seeds; the rest keep running."""
+    fresh = reset_episodes(seeds)
+    for name, values in fresh.items():
+        if name == "repair_rngs":
+            for row, rng in zip(rows, values):
+                batch[name][row] = rng
+        else:
+            batch[name][rows] = values
+
+def load_episode_chunks(batch, rows):
+    """Streams meteor chunks for the episodes whose chunk window moved.
+
+    Chunk c lives in slot block c mod window, so a chunk entering the
+    window overwrites exactly the one that left it.
+    """
+    window = METEOR_CHUNKS_BEHIND + METEOR_CHUNKS_AHEAD + 1
+    per_chunk = METEORS_PER_CHUNK + LANE_METEORS_PER_CHUNK
+    current = np.floor(-batch["positions"][rows, 2] / METEOR_CHUNK_LENGTH).astype(np.int64)
+    first = current - METEOR_CHUNKS_BEHIND
+    moved = first != batch["chunk_first"][rows]
+    for row, new_first in zip(rows[moved], first[moved]):
+        old_first = batch["chunk_first"][row]
+        for index in range(new_first, new_first + window):
+            if old_first <= index < old_first + window:
+                continue  # Still loaded (with its destroyed meteors gone)
+            slots = slice((index % window) * per_chunk, (index % window + 1) * per_chunk)
+            points = meteor_chunk_points(int(batch["seeds"][row]), index)
+            batch["meteors"][row, slots] = points
+            batch["meteor_alive"][row, slots] = points[:, 2] < METEOR_FIELD_START_Z
+        batch["chunk_first"][row] = new_first
+
+def swept_sphere_hits_batch(starts, ends, centers, alive, radius):
+    """swept_sphere_hits() for E paths against E rows of spheres at once.
+
+    Spheres outside the bounding box of their episode's path (grown by
+    the radius) are culled with cheap per-axis comparisons; only the few
+    pairs left get the exact segment test. Returns an (E, N) hit mask.
+    """
+    low = np.minimum(starts, ends) - radius
+    high = np.maximum(starts, ends) + radius
+    near = alive.copy()
+    for axis in (2, 0, 1):  # Flight direction first, it culls the most
+        coordinates = centers[:, :, axis]
+        near &= (coordinates >= low[:, None, axis]) & (coordinates <= high[:, None, axis])
+    rows, columns = np.nonzero(near)
+    hits = np.zeros(alive.shape, dtype=bool)
+    if len(rows):
+        path = ends[rows] - starts[rows]
+        path_length2 = np.einsum("ij,ij->i", path, path)
+        to_centers = centers[rows, columns] - starts[rows]
+        along = np.einsum("ij,ij->i", to_centers, path) / np.where(path_length2 > 0.0, path_length2, 1.0)
+        offsets = to_centers - np.clip(along, 0.0, 1.0)[:, None] * path
+        hit = np.einsum("ij,ij->i", offsets, offsets) < radius * radius
+        hits[rows[hit], columns[hit]] = True
+    return hits
+
+def step_episodes(batch, actions):
+    """Advances every running episode by one tick, following update_simulation() for scene_mode 1.
+
+    actions -- (E, 6) bools in EPISODE_ACTIONS order (the held movement keys)
+    """
+    live = batch["active"].copy()
+    now = batch["ticks"] * SIM_TICK_SECONDS  # Every episode started its mission at its own tick 0
+    actions = np.asarray(actions, dtype=bool) & live[:, None]
+    positions = batch["positions"]
+    previous = positions.copy()
+    positions[:, 1] += movement * actions[:, 0]
+    positions[:, 1] -= movement * actions[:, 1]
+    positions[:, 0] -= movement * actions[:, 2]
+    positions[:, 0] += movement * actions[:, 3]
+    positions[:, 2] -= rocket_speed * actions[:, 4]
+    positions[:, 2] += rocket_speed * actions[:, 5]
+    
+    # Mission planet
+    spawn = live & ~batch["has_planet"] & (now >= MISSION_PLANET_DELAY)
+    batch["planets"][spawn] = positions[spawn] - [0.0, 0.0, MISSION_PLANET_DISTANCE]
+    batch["has_planet"] |= spawn
+    offsets = positions - batch["planets"]
+    reached = live & batch["has_planet"] & (np.sqrt(np.einsum("ij,ij->i", offsets, offsets)) < MISSION_PLANET_RADIUS)
+    batch["mission_complete"] |= reached
+    
+    # Meteors: each hit costs one health; the hit that takes it below zero ends the game
+    health = batch["health"]
+    hits = swept_sphere_hits_batch(previous, positions, batch["meteors"], batch["meteor_alive"] & live[:, None],
+                                   METEOR_RADIUS)
+    hit_counts = hits.sum(axis=1)
+    fatal = hit_counts > health
+    taken = np.where(fatal, health + 1, hit_counts)
+    health -= taken
+    batch["game_over"] |= fatal
+    batch["meteor_alive"] &= ~hits
+    batch["meteor_hits"] += taken
+    # A fatal tick still starts the repair game if an earlier hit left health in 0..3
+    start_repair = live & ~batch["repair_mode"] & np.where(fatal, taken >= 2, (taken > 0) & (health <= 3))
+    batch["repair_mode"] |= start_repair
+    batch["repair_timer"][start_repair] = now[start_repair]
+    batch["repair_progress"][start_repair] = 0
+    batch["repair_alive"][start_repair] = False
+    batch["repairs_started"] += start_repair
+    
+    load_episode_chunks(batch, np.flatnonzero(live))
+    
+    # Repair game: collect parts along the path, respawn them, watch the timer
+    repairing = live & batch["repair_mode"]
+    items = batch["repair_items"]
+    collected = swept_sphere_hits_batch(previous, positions, items, batch["repair_alive"] & repairing[:, None],
+                                        REPAIR_ITEM_RADIUS + 15)
+    batch["repair_progress"] += collected.sum(axis=1)
+    batch["repair_items_collected"] += collected.sum(axis=1)
+    batch["repair_alive"] &= ~collected
+    passed = items[:, :, 2] >= positions[:, None, 2] - STAR_DESPAWN_DISTANCE
+    batch["repair_alive"] &= ~(passed & repairing[:, None])
+    respawn = repairing & (now - batch["last_repair_spawn"] > REPAIR_SPAWN_INTERVAL)
+    batch["last_repair_spawn"][respawn] = now[respawn]
+    for row in np.flatnonzero(respawn):
+        rng = batch["repair_rngs"][row]
+        x, y, z = positions[row]
+        for slot in np.flatnonzero(~batch["repair_alive"][row]):
+            items[row, slot] = (x + rng.uniform(-150, 150), y + rng.uniform(-150, 150), z - rng.uniform(200, 800))
+            batch["repair_alive"][row, slot] = True
+    expired = repairing & (now - batch["repair_timer"] > REPAIR_TIME)
+    batch["repair_mode"][expired] = False
+    health[expired] = 0
+    batch["game_over"] |= expired
+    repaired = repairing & (batch["repair_progress"] >= REPAIR_ITEMS_NEEDED)
+    batch["repair_mode"][repaired] = False
+    health[repaired] = np.minimum(health[repaired] + 2, ROCKET_MAX_HEALTH)
+    batch["repairs_completed"] += repaired
+    
+    batch["ticks"] += live
+    batch["active"] = live & ~batch["game_over"] & ~batch["mission_complete"]
+
+def episode_outcomes(batch):
+    """Per-episode results of a batch as a dict of (E,) arrays."""
+    outcomes = {name: batch[name].copy() for name in (
+        "seeds", "ticks", "health", "game_over", "mission_complete",
+        "meteor_hits", "repairs_started", "repairs_completed", "repair_items_collected",
+    )}
+    outcomes["survival_seconds"] = batch["ticks"] * SIM_TICK_SECONDS
+    outcomes["distance"] = ROCKET_GAME_START[2] - batch["positions"][:, 2]
+    return outcomes
+
+def splitmix64(values):
+    """Hashes uint64 counters to well-mixed uint64s (stateless, so policies are shard-independent)."""
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+def straight_policy(batch):
+    """Flies straight ahead, like the live game with no keys pressed."""
+    actions = np.zeros((len(batch["seeds"]), len(EPISODE_ACTIONS)), dtype=bool)
+    actions[:, EPISODE_ACTIONS.index("q")] = True
+    return actions
+
+def random_policy(batch):
+    """Flies ahead while steering up/down/left/right (or not), re-choosing every POLICY_HOLD_TICKS."""
+    actions = straight_policy(batch)
+    counters = (batch["seeds"].astype(np.uint64) << np.uint64(32)) + (batch["ticks"] // POLICY_HOLD_TICKS).astype(np.uint64)
+    steering = (splitmix64(counters) % np.uint64(5)).astype(np.int64)  # 0: none, 1-4: w, s, a, d
+    rows = np.flatnonzero(steering)
+    actions[rows, steering[rows] - 1] = True
+    return actions
+
+EPISODE_POLICIES = {"straight": straight_policy, "random": random_policy}
+
+def run_episode_batch(seeds, policy=random_policy, ticks=EPISODE_TICKS):
+    """Plays one episode per seed in lockstep (no GL) and returns their outcomes."""
+    batch = reset_episodes(seeds)
+    for _ in range(ticks):
+        if not batch["active"].any():
+            break
+        step_episodes(batch, policy(batch))
+    return episode_outcomes(batch)
+
+def episode_shard(job):
+    """Pool job: plays one shard of episodes with the given module constants overridden."""
+    seeds, policy_name, ticks, knobs = job
+    saved = {name: globals()[name] for name in knobs}
+    globals().update(knobs)
+    try:
+        return run_episode_batch(seeds, EPISODE_POLICIES[policy_name], ticks)
+    finally:
+        globals().update(saved)
+
+def run_episodes(seeds, policy="random", ticks=EPISODE_TICKS, workers=None, knobs=None,
+                 shard_size=EPISODE_SHARD_SIZE):
+    """Plays many headless episodes, sharded across a process pool.
+
+    knobs -- module constants to override while playing, e.g.
+        {"METEOR_RADIUS": 30.0, "REPAIR_TIME": 10}
+    Returns the outcomes of every seed, in seed order.
+    """
+    knobs = knobs or {}
+    for name in knobs:
+        if not name.isupper() or name not in globals():
+            raise ValueError(f"Unknown knob: {name}")
+    seeds = list(seeds)
+    jobs = [(seeds[i:i + shard_size], policy, ticks, knobs) for i in range(0, len(seeds), shard_size)]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        results = [episode_shard(job) for job in jobs]
+    else:
+        with multiprocessing.get_context("spawn").Pool(workers) as pool:
+            results = pool.map(episode_shard, jobs)
+    return {name: np.concatenate([result[name] for result in results]) for name in results[0]}
+
+def summarize_outcomes(outcomes):
+    """Aggregate statistics of run_episodes() results."""
+    return {
+        "episodes": len(outcomes["seeds"]),
+        "mission_rate": float(outcomes["mission_complete"].mean()),
+        "game_over_rate": float(outcomes["game_over"].mean()),
+        "mean_survival_seconds": float(outcomes["survival_seconds"].mean()),
+        "mean_meteor_hits": float(outcomes["meteor_hits"].mean()),
+        "mean_repairs_started": float(outcomes["repairs_started"].mean()),
+        "mean_repairs_completed": float(outcomes["repairs_completed"].mean()),
+        "mean_final_health": float(outcomes["health"].mean()),
+    }
+
+# --- Rocket Environment Functions ---
+
+def meteor_cell_keys(rows, cells):
+    """Packs (episode, cell) pairs into sortable int64 spatial index keys."""
+    mask = (1 << ENV_CELL_BITS) - 1
+    keys = rows.astype(np.int64) << (3 * ENV_CELL_BITS)
+    for axis in range(3):
+        keys |= (cells[:, axis] & mask) << ((2 - axis) * ENV_CELL_BITS)
+    return keys
+
+def build_meteor_index(batch):
+    """Buckets every live meteor of a batch into ENV_SENSOR_RANGE-sized grid cells.
+
+    The meteors are sorted by cell key, so one cell of one episode is a
+    contiguous run found by binary search. The index stays valid until a
+    chunk loads or a meteor is destroyed (see meteor_index()).
+    """
+    rows, slots = np.nonzero(batch["meteor_alive"])
+    positions = batch["meteors"][rows, slots]
+    keys = meteor_cell_keys(rows, np.floor(positions / ENV_SENSOR_RANGE).astype(np.int64))
+    order = np.argsort(keys, kind="stable")
+    return {
+        "keys": keys[order],
+        "positions": positions[order],
+        "chunk_first": batch["chunk_first"].copy(),
+        "meteor_hits": batch["meteor_hits"].copy(),
+    }
+
+def meteor_index(env):
+    """The env's meteor index, rebuilt only when the meteor slots changed."""
+    batch = env["batch"]
+    index = env["meteor_index"]
+    if (index is None or not np.array_equal(index["chunk_first"], batch["chunk_first"])
+            or not np.array_equal(index["meteor_hits"], batch["meteor_hits"])):
+        index = env["meteor_index"] = build_meteor_index(batch)
+    return index
+
+def nearest_meteors(index, positions, count=ENV_NEAREST_METEORS):
+    """Up to count meteors within ENV_SENSOR_RANGE of each episode's rocket, nearest first.
+
+    Only the 27 cells around each rocket are looked up, so the cost
+    depends on the meteors nearby rather than on the whole field.
+    Returns (E, count, 4): offsets / ENV_SENSOR_RANGE and a present flag.
+    """
+    episodes = len(positions)
+    cells = np.floor(positions / ENV_SENSOR_RANGE).astype(np.int64)
+    neighbors = (cells[:, None, :] + ENV_NEIGHBOR_CELLS).reshape(-1, 3)
+    keys = meteor_cell_keys(np.repeat(np.arange(episodes), len(ENV_NEIGHBOR_CELLS)), neighbors)
+    starts = np.searchsorted(index["keys"], keys, side="left")
+    counts = np.searchsorted(index["keys"], keys, side="right") - starts
+    owners, values = expand_ranges(starts, counts)
+    owners //= len(ENV_NEIGHBOR_CELLS)
+    offsets = index["positions"][values] - positions[owners]
+    distances = np.einsum("ij,ij->i", offsets, offsets)
+    seen = distances <= ENV_SENSOR_RANGE * ENV_SENSOR_RANGE
+    owners, offsets, distances = owners[seen], offsets[seen], distances[seen]
+    order = np.lexsort((distances, owners))
+    owners, offsets = owners[order], offsets[order]
+    ranks = np.arange(len(owners)) - np.searchsorted(owners, owners)
+    kept = ranks < count
+    observed = np.zeros((episodes, count, 4))
+    observed[owners[kept], ranks[kept], :3] = offsets[kept] / ENV_SENSOR_RANGE
+    observed[owners[kept], ranks[kept], 3] = 1.0
+    return observed
+
+def env_observations(env):
+    """Builds the observation dict for every episode of an env.
+
+    state -- (E, ENV_OBSERVATION_SIZE) float32, laid out as ENV_OBSERVATION_FIELDS
+    frame -- (E, height, width, 3) uint8 rendered frames (render=True only)
+    """
+    batch = env["batch"]
+    positions = batch["positions"]
+    episodes = len(positions)
+    now = batch["ticks"] * SIM_TICK_SECONDS
+    
+    items = np.zeros((episodes, MAX_REPAIR_ITEMS, 4))
+    item_offsets = batch["repair_items"] - positions[:, None, :]
+    visible = batch["repair_alive"] & batch["repair_mode"][:, None]
+    visible &= np.einsum("ijk,ijk->ij", item_offsets, item_offsets) <= ENV_SENSOR_RANGE * ENV_SENSOR_RANGE
+    items[:, :, :3] = np.where(visible[:, :, None], item_offsets / ENV_SENSOR_RANGE, 0.0)
+    items[:, :, 3] = visible
+    
+    planet = np.zeros((episodes, 4))
+    planet[:, :3] = np.where(batch["has_planet"][:, None],
+                             (batch["planets"] - positions) / MISSION_PLANET_DISTANCE, 0.0)
+    planet[:, 3] = batch["has_planet"]
+    
+    time_left = np.where(batch["repair_mode"], 1.0 - (now - batch["repair_timer"]) / REPAIR_TIME, 0.0)
+    fields = [
+        nearest_meteors(meteor_index(env), positions).reshape(episodes, -1),
+        (batch["health"] / ROCKET_MAX_HEALTH)[:, None],
+        np.stack([batch["repair_mode"], np.clip(time_left, 0.0, 1.0),
+                  batch["repair_progress"] / REPAIR_ITEMS_NEEDED], axis=1),
+        items.reshape(episodes, -1),
+        planet,
+        np.minimum(now / MISSION_PLANET_DELAY, 1.0)[:, None],
+    ]
+    observations = {"state": np.concatenate(fields, axis=1).astype(np.float32)}
+    if env["render"]:
+        width, height = ENV_FRAME_SIZE
+        observations["frame"] = np.stack([
+            np.frombuffer(render_episode_frame(batch, row, width, height), dtype=np.uint8).reshape(height, width, 3)
+            for row in range(episodes)
+        ])
+    return observations
+
+def render_episode_frame(batch, row, width, height):
+    """Renders one episode like the live rocket game (offscreen) and returns its pixels.
+
+    The episode is drawn around its rocket (see rebase_origin()) through
+    the live game's globals, which are put back afterwards.
+    """
+    saved = {name: globals()[name] for name in ENV_RENDER_GLOBALS}
+    origin = batch["positions"][row]
+    planet = (batch["planets"][row] - origin).tolist() if batch["has_planet"][row] else None
+    globals().update({
+        "scene_mode": 1,
+        "rocket_pos": [0.0, 0.0, 0.0],
+        "meteors": (batch["meteors"][row][batch["meteor_alive"][row]] - origin).tolist(),
+        "broken_parts": (batch["repair_items"][row][batch["repair_alive"][row]] - origin).tolist(),
+        "mission_planet_pos": planet,
+        "stars_mode_1": [],
+        "rocket_health": int(batch["health"][row]),
+        "game_over": bool(batch["game_over"][row]),
+        "mission_complete": bool(batch["mission_complete"][row]),
+        "repair_mode": bool(batch["repair_mode"][row]),
+        "repair_timer": float(batch["repair_timer"][row]),
+        "repair_progress": int(batch["repair_progress"][row]),
+        "sim_tick": int(batch["ticks"][row]),
+        "frame_pacer": None,
+        "last_gl_stats": None,
+    })
+    try:
+        return render_offscreen_frame(width, height)
+    finally:
+        globals().update(saved)
+
+def make_rocket_env(seeds, max_ticks=EPISODE_TICKS, render=False, autoreset=True):
+    """Creates a rocket-game environment for env_reset() / env_step().
+
+    seeds -- a list of seeds for a vector env (one lockstep episode each),
+        or a single seed for a plain env whose results have no episode axis
+    max_ticks -- episodes are truncated after this many ticks
+    render -- adds rendered frames to the observations (needs an OSMesa
+        context, created here if there is none)
+    autoreset -- finished episodes of a vector env restart with new seeds
+    """
+    single = np.ndim(seeds) == 0
+    seeds = np.atleast_1d(np.asarray(seeds, dtype=np.int64))
+    if render and offscreen_context is None:
+        export_worker_init(*ENV_FRAME_SIZE, use_shaders)
+    return {
+        "seeds": seeds,
+        "next_seed": int(seeds.max()) + 1,  # Autoreset hands out seeds counting up from here
+        "max_ticks": max_ticks,
+        "render": render,
+        "autoreset": autoreset and not single,
+        "single": single,
+        "batch": None,
+        "meteor_index": None,
+    }
+
+def first_episode(value):
+    """Drops the episode axis from an observation, array or dict of either (plain envs)."""
+    if isinstance(value, dict):
+        return {name: first_episode(item) for name, item in value.items()}
+    return value[0]
+
+def env_reset(env, seeds=None):
+    """Starts new episodes (the env's own seeds by default) and returns their observations."""
+    if seeds is not None:
+        env["seeds"] = np.atleast_1d(np.asarray(seeds, dtype=np.int64))
+    env["batch"] = reset_episodes(env["seeds"])
+    env["meteor_index"] = None
+    observations = env_observations(env)
+    return first_episode(observations) if env["single"] else observations
+
+def env_step(env, actions):
+    """Advances every episode by one tick.
+
+    actions -- an index into ENV_ACTIONS per episode, or (E, 6) held keys
+        in EPISODE_ACTIONS order (one action / six keys for a plain env)
+    Returns (observations, rewards, terminated, truncated, info) like a
+    Gym vector env. With autoreset, the rows that finished already hold
+    the next episode's first observation; info has "final_observations"
+    and "outcomes" (episode_outcomes() of the finished rows) for them.
+    """
+    batch = env["batch"]
+    actions = np.asarray(actions)
+    if env["single"]:
+        actions = actions[None]
+    keys = ENV_ACTION_KEYS[actions] if actions.ndim == 1 else actions
+    counters = ["meteor_hits", "repair_items_collected", "repairs_completed", "game_over", "mission_complete"]
+    before = {name: batch[name].copy() for name in counters}
+    live = batch["active"].copy()
+    
+    step_episodes(batch, keys)
+    
+    rewards = ENV_REWARDS["tick"] * (live & ~batch["game_over"])
+    for name, reward in (("meteor_hits", "meteor_hit"), ("repair_items_collected", "repair_item"),
+                         ("repairs_completed", "repair"), ("game_over", "game_over"),
+                         ("mission_complete", "mission")):
+        rewards = rewards + ENV_REWARDS[reward] * (batch[name].astype(np.int64) - before[name])
+    terminated = live & (batch["game_over"] | batch["mission_complete"])
+    truncated = live & ~terminated & (batch["ticks"] >= env["max_ticks"])
+    batch["active"] &= ~truncated
+    observations = env_observations(env)
+    info = {}
+    
+    finished = np.flatnonzero(terminated | truncated)
+    if env["autoreset"] and len(finished):
+        outcomes = episode_outcomes(batch)
+        info["outcomes"] = {name: values[finished] for name, values in outcomes.items()}
+        info["final_observations"] = {name: values.copy() for name, values in observations.items()}
+        seeds = np.arange(env["next_seed"], env["next_seed"] + len(finished))
+        env["next_seed"] += len(finished)
+        restart_episodes(batch, finished, seeds)
+        env["meteor_index"] = None  # Fresh rows may match the old chunk_first / meteor_hits
+        observations = env_observations(env)
+    if env["single"]:
+        return (first_episode(observations), float(rewards[0]), bool(terminated[0]), bool(truncated[0]), info)
+    return observations, rewards, terminated, truncated, info
+
+# --- Offscreen Rendering ---
+
+def create_offscreen_context(width=WINDOW_WIDTH, height=WINDOW_HEIGHT):
+    """Creates and binds an OSMesa context. Returns (context, color buffer).
+
+    PYOPENGL_PLATFORM=osmesa must be set before OpenGL is first imported.
+    GLUT is still initialised (without a window) because the solid shapes
+    and bitmap fonts come from freeglut.
+    """
+    from OpenGL import osmesa
+    from OpenGL import arrays
+    context = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+    if not context:
+        raise RuntimeError("Could not create an OSMesa context")
+    buffer = arrays.GLubyteArray.zeros((height, width, 4))
+    if not osmesa.OSMesaMakeCurrent(context, buffer, GL_UNSIGNED_BYTE, width, height):
+        raise RuntimeError("Could not make the OSMesa context current")
+    glutInit()
+    glViewport(0, 0, width, height)
+    glEnable(GL_DEPTH_TEST)
+    return context, buffer
+
+def read_frame_pixels(width=WINDOW_WIDTH, height=WINDOW_HEIGHT):
+    """Reads the rendered frame back as top-down RGB bytes."""
+    data = glReadPixels(0, 0, width, height, GL_RGB, GL_UNSIGNED_BYTE)
+    row = width * 3
+    # GL rows start at the bottom, image files start at the top
+    return b"".join(data[i * row:(i + 1) * row] for i in range(height - 1, -1, -1))
+
+def render_offscreen_frame(width=WINDOW_WIDTH, height=WINDOW_HEIGHT):
+    """Renders one frame like display() (without the swap) and returns its pixels."""
+    prepare_text_atlases()
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    glClearColor(0.0, 0.0, 0.0, 1.0)  # Black background
+    setupCamera()
+    setup_lighting()
+    draw_world()
+    draw_hud()
+    glFinish()
+    return read_frame_pixels(width, height)
+
+def export_worker_init(width, height, shaders_enabled=True):
+    """Pool initializer: gives each worker process its own OSMesa context."""
+    global offscreen_context, ring_quadric, use_shaders
+    use_shaders = shaders_enabled  # Spawned workers don't inherit --no-shaders
+    offscreen_context = create_offscreen_context(width, height)
+    ring_quadric = gluNewQuadric()
+    gluQuadricNormals(ring_quadric, GLU_SMOOTH)
+
+def render_frame_shard(job):
+    """Worker job: restores a state snapshot and renders its range of frames."""
+    state, frame_count, ticks_per_frame, events, width, height = job
+    restore_state(state)  # Also sets SIM_SEED: spawned workers start with the default, not the parent's seed
+    frames = []
+    next_event = 0
+    for _ in range(frame_count):
+        frames.append(render_offscreen_frame(width, height))
+        next_event = run_ticks(ticks_per_frame, events, next_event)
+    return frames
+
+def write_ppm(out, pixels, width, height):
+    """Appends one binary PPM image to an open file."""
+    out.write(b"P6\n%d %d\n255\n" % (width, height))
+    out.write(pixels)
+
+def export_frames(path, frame_count, workers=None, recording=None,
+                  ticks_per_frame=EXPORT_TICKS_PER_FRAME, shard_frames=EXPORT_SHARD_FRAMES,
+                  width=WINDOW_WIDTH, height=WINDOW_HEIGHT, epoch=None):
+    """Renders frame_count frames across a process pool into one PPM stream.
+
+    This process only runs the (cheap) simulation and hands each worker a
+    state snapshot for the start of its shard, so no worker replays from
+    t=0. Finished shards wait in a bounded reorder buffer until every
+    earlier shard has been written. The output can be encoded with e.g.
+    ffmpeg -f image2pipe -c:v ppm -i frames.ppm out.mp4
+    """
+    global SIM_TICK_SECONDS
+    events = []
+    if recording:
+        seed, SIM_TICK_SECONDS, events, _ = load_recording(recording)
+        seed_simulation(seed)
+    initialize_stars()
+    initialize_asteroids()
+    initialize_orbits()
+    if epoch is not None:
+        seek_time(epoch)
+    
+    # Spawned workers import OpenGL fresh, so they pick up the OSMesa platform
+    os.environ["PYOPENGL_PLATFORM"] = "osmesa"
+    workers = workers or os.cpu_count() or 1
+    max_pending = 2 * workers  # Reorder buffer bound (in shards)
+    shard_count = (frame_count + shard_frames - 1) // shard_frames
+    
+    start = time.perf_counter()
+    pool_context = multiprocessing.get_context("spawn")
+    with open(path, "wb") as out, pool_context.Pool(workers, export_worker_init, (width, height, use_shaders)) as pool:
+        pending = {}  # shard index -> AsyncResult
+        next_shard = 0
+        next_write = 0
+        next_event = 0
+        while next_write < shard_count:
+            # Keep the pool busy without letting finished shards pile up unbounded
+            while next_shard < shard_count and len(pending) < max_pending:
+                frames = min(shard_frames, frame_count - next_shard * shard_frames)
+                first_tick = sim_tick
+                last_tick = sim_tick + frames * ticks_per_frame
+                shard_events = [e for e in events[next_event:] if e[0] < last_tick]
+                job = (capture_state(), frames, ticks_per_frame, shard_events, width, height)
+                pending[next_shard] = pool.apply_async(render_frame_shard, (job,))
+                next_event = run_ticks(last_tick - first_tick, events, next_event)
+                next_shard += 1
+            
+            for pixels in pending.pop(next_write).get():
+                write_ppm(out, pixels, width, height)
+            next_write += 1
+            print(f"Exported {min(next_write * shard_frames, frame_count)}/{frame_count} frames", file=sys.stderr)
+    
+    elapsed = time.perf_counter() - start
+    print(f"Exported {frame_count} frames with {workers} workers in {elapsed:.2f}s", file=sys.stderr)
+    return elapsed
+
+def parse_knob(text):
+    """Parses a NAME=VALUE knob override (int if possible, otherwise float)."""
+    name, _, value = text.partition("=")
+    try:
+        return name, int(value)
+    except ValueError:
+        return name, float(value)
+
+def parse_args(argv):
+    """Parses the command line options."""
+    parser = argparse.ArgumentParser(description="3D Solar System Simulation")
+    parser.add_argument("--seed", type=int, default=SIM_SEED, help="master seed for all simulation RNGs")
+    parser.add_argument("--record", metavar="FILE", help="record keyboard input to FILE")
+    parser.add_argument("--replay", metavar="FILE", help="replay a recording headlessly at full speed and exit")
+    parser.add_argument("--snapshot", metavar="FILE",
+                        help="load the scene from FILE, or generate it and save it there if missing")
+    parser.add_argument("--asteroids", type=int, default=NUM_ASTEROIDS, help="asteroid belt size when generating")
+    parser.add_argument("--export", metavar="FILE", help="render frames offscreen (OSMesa) into a PPM stream and exit")
+    parser.add_argument("--frames", type=int, default=600, help="number of frames to export")
+    parser.add_argument("--workers", type=int, default=None, help="export worker processes (default: all cores)")
+    parser.add_argument("--ticks-per-frame", type=int, default=EXPORT_TICKS_PER_FRAME,
+                        help="simulation ticks between exported frames")
+    parser.add_argument("--episodes", type=int, default=0,
+                        help="play this many headless rocket-game episodes (seeds from --seed on), print a summary and exit")
+    parser.add_argument("--policy", choices=sorted(EPISODE_POLICIES), default="random", help="autopilot for --episodes")
+    parser.add_argument("--episode-ticks", type=int, default=EPISODE_TICKS, help="maximum length of each episode")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a module constant for --episodes, e.g. METEOR_RADIUS=30")
+    parser.add_argument("--epoch", type=float, default=None,
+                        help="start the solar system at this orbit time (ticks of mean motion), without stepping there")
+    parser.add_argument("--events", type=float, default=0.0, metavar="TICKS",
+                        help="print the alignments, transits and rocket closest approaches in the next TICKS "
+                             "orbit ticks (from --epoch) and exit")
+    parser.add_argument("--fps", type=int, default=TARGET_FPS,
+                        help="frame rate to pace rendering to, sleeping in between (0 = redraw continuously)")
+    parser.add_argument("--fixed-quality", action="store_true",
+                        help="keep the configured quality instead of lowering it when frames run over budget")
+    parser.add_argument("--sim-worker", action="store_true",
+                        help="run the simulation in a worker process, overlapping it with rendering")
+    parser.add_argument("--no-shaders", action="store_true",
+                        help="draw with fixed-function colours instead of the per-pixel lighting shaders")
+    parser.add_argument("--trails", action="store_true", help="start with motion trails shown (toggle with t)")
+    parser.add_argument("--ephemeris", metavar="FILE",
+                        help="look bodies up in the ephemeris table in FILE (memory-mapped), or build one "
+                             "from --epoch and save it there if missing")
+    parser.add_argument("--ephemeris-span", type=float, default=EPHEMERIS_SPAN,
+                        help="orbit ticks covered when building an ephemeris table")
+    parser.add_argument("--ephemeris-method", choices=EPHEMERIS_METHODS, default="hermite",
+                        help="interpolation used when building an ephemeris table")
+    return parser.parse_args(argv)
+
 def main():
     """Initializes GLUT, sets up callbacks, and starts the main loop."""
+    global NUM_ASTEROIDS, snapshot_path, use_shaders, show_trails, ephemeris
+    args = parse_args(sys.argv[1:])
+    NUM_ASTEROIDS = args.asteroids
+    use_shaders = not args.no_shaders
+    show_trails = args.trails
+    if args.episodes:
+        knobs = dict(parse_knob(text) for text in args.set)
+        outcomes = run_episodes(range(args.seed, args.seed + args.episodes), args.policy, args.episode_ticks,
+                                args.workers, knobs)
+        print(json.dumps(summarize_outcomes(outcomes), indent=2))
+        return
+    if args.events:
+        seed_simulation(args.seed)
+        initialize_stars()
+        initialize_asteroids()
+        initialize_orbits()
+        start = args.epoch or 0.0
+        seek_time(start)
+        path = record_rocket_path(int(min(args.events, EVENT_ROCKET_PATH_TICKS)))
+        for event in find_events(start, start + args.events, rocket_path=path):
+            print(format_event(event))
+        return
+    if args.export:
+        if not args.replay:
+            seed_simulation(args.seed)
+        # With --replay the recorded session drives the exported timeline
+        export_frames(args.export, args.frames, args.workers, args.replay, args.ticks_per_frame, epoch=args.epoch)
+        return
+    if args.replay:
+        replay_session(args.replay)
+        return
+    
+    seed_simulation(args.seed)
+    if args.record and not args.sim_worker:  # The worker records the input it applies itself
+        start_recording(args.record)
+        atexit.register(stop_recording)  # Closing the window also ends the session
+    
     glutInit()
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
     glutInitWindowSize(WINDOW_WIDTH, WINDOW_HEIGHT)
@@ -1762,13 +4972,29 @@ def main():
     glutSpecialFunc(specialKeyListener)
     glutMouseFunc(mouseListener)
     glutReshapeFunc(reshape)
-    glutIdleFunc(idle)
+    if args.fps > 0:
+        start_frame_pacing(args.fps, governor=not args.fixed_quality)
+    else:
+        glutIdleFunc(idle)
     
     # Initialize scene data
-    initialize_scene()
+    if args.snapshot:
+        snapshot_path = args.snapshot
+    initialize_scene(args.snapshot)
+    if args.epoch is not None:
+        seek_time(args.epoch)
+    if args.ephemeris:
+        if os.path.exists(args.ephemeris):
+            ephemeris = load_ephemeris(args.ephemeris)
+        else:
+            ephemeris = build_ephemeris(orbit_time, orbit_time + args.ephemeris_span, args.ephemeris_method)
+            save_ephemeris(args.ephemeris, ephemeris)
+    if args.sim_worker:
+        start_simulation_worker(args.record)
     
     # Enable depth testing
     glEnable(GL_DEPTH_TEST)
+    prepare_shader_programs()  # Loads cached program binaries, compiling only on a cache miss
     
     print("Initializing 3D Solar System Simulation...")
     print("Camera Controls:")
@@ -1777,9 +5003,14 @@ def main():
     print(" 2: Third-Person Mode (Behind Rocket)")
     print(" 3: Crash Camera Mode")
     print(" c: Trigger Crash Sequence")
+    print(" f: Cycle the body the cameras frame")
+    print(" Left click: Select an object (planets and moons take the camera focus)")
+    print(" Right click: Clear the selection and focus")
     print(" p: Toggle between Solar System and Rocket Game")
     print(" g/h: Increase/Decrease Gravity")
     print(" ,/.: Slow Down/Speed Up Earth's Rotation")
+    print(" t: Toggle Motion Trails")
+    print(" k: Save Scene Snapshot")
     print(" ESC: Exit")
     print("Starting GLUT Main Loop...")
     
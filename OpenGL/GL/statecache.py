@@ -0,0 +1,166 @@
+"""Client-side cache of fixed-function state to skip redundant calls
+
+Applications that re-issue the same state every frame (lighting setup,
+clear colour, point size, the current colour before every primitive...)
+pay for the Python wrapper, the driver call and the error check each
+time.  The functions here remember the last value set for each piece of
+state in the current context (stored via OpenGL.contextdata) and drop the
+call when it would not change anything:
+
+    from OpenGL.GL import *
+    from OpenGL.GL.statecache import *
+
+The cache only sees calls made through these functions.  Anything that
+changes the same state behind its back -- glPopAttrib, display lists,
+drawing with GL_COLOR_ARRAY enabled (which leaves the current colour
+undefined), or calling the plain OpenGL.GL entry points -- must be
+followed by invalidate( key ) for the affected state, e.g.
+
+    glDrawArrays( GL_POINTS, 0, count ) # with a colour array
+    statecache.invalidate( 'color' )
+
+Light positions and spot directions are transformed by the modelview
+matrix current at call time, so they are always passed through.
+
+elidedCount() reports how many calls were dropped since the last
+resetElidedCount() in the current context.
+"""
+from OpenGL import contextdata
+from OpenGL import GL as _GL
+
+__all__ = (
+    'glClearColor',
+    'glColor3f',
+    'glColor3fv',
+    'glColor4f',
+    'glColor4fv',
+    'glLightModeli',
+    'glLightfv',
+    'glLineWidth',
+    'glMaterialf',
+    'glMaterialfv',
+    'glPointSize',
+    'glShadeModel',
+)
+
+CACHE_KEY = 'PYOPENGL_STATE_CACHE'
+ELIDED_KEY = 'elided'
+
+# lighting parameters that depend on the modelview matrix at call time
+_EYE_SPACE_LIGHT_PARAMETERS = (
+    _GL.GL_POSITION,
+    _GL.GL_SPOT_DIRECTION,
+)
+
+def _cache( context=None ):
+    """Retrieve (creating if necessary) the state dictionary for the context"""
+    cache = contextdata.getValue( CACHE_KEY, context )
+    if cache is None:
+        cache = { ELIDED_KEY: 0 }
+        contextdata.setValue( CACHE_KEY, cache, context )
+    return cache
+
+def _changed( key, value ):
+    """Record value for key, return False (and count) if it was already set"""
+    cache = _cache()
+    if cache.get( key ) == value:
+        cache[ELIDED_KEY] += 1
+        return False
+    cache[key] = value
+    return True
+
+def _floats( values ):
+    return tuple( [float( value ) for value in values] )
+
+def _faces( face ):
+    if face == _GL.GL_FRONT_AND_BACK:
+        return (_GL.GL_FRONT, _GL.GL_BACK)
+    return (face,)
+
+def invalidate( *keys ):
+    """Forget cached values (all of them if no keys are given)
+
+    keys -- 'color', 'clearColor', 'pointSize', 'lineWidth', 'shadeModel',
+        or the (name, ...) tuples used for lights/materials, e.g.
+        ('light', GL_LIGHT0, GL_DIFFUSE)
+    """
+    cache = _cache()
+    if not keys:
+        elided = cache[ELIDED_KEY]
+        cache.clear()
+        cache[ELIDED_KEY] = elided
+        return
+    for key in keys:
+        cache.pop( key, None )
+
+def elidedCount( context=None ):
+    """Number of calls dropped since the last resetElidedCount()"""
+    return _cache( context )[ELIDED_KEY]
+
+def resetElidedCount( context=None ):
+    """Zero the elided-call counter, returns the previous count"""
+    cache = _cache( context )
+    count = cache[ELIDED_KEY]
+    cache[ELIDED_KEY] = 0
+    return count
+
+def glColor3f( red, green, blue ):
+    if _changed( 'color', (float(red),float(green),float(blue),1.0) ):
+        _GL.glColor3f( red, green, blue )
+
+def glColor4f( red, green, blue, alpha ):
+    if _changed( 'color', (float(red),float(green),float(blue),float(alpha)) ):
+        _GL.glColor4f( red, green, blue, alpha )
+
+def glColor3fv( v ):
+    if _changed( 'color', _floats( v ) + (1.0,) ):
+        _GL.glColor3fv( v )
+
+def glColor4fv( v ):
+    if _changed( 'color', _floats( v ) ):
+        _GL.glColor4fv( v )
+
+def glClearColor( red, green, blue, alpha ):
+    if _changed( 'clearColor', (float(red),float(green),float(blue),float(alpha)) ):
+        _GL.glClearColor( red, green, blue, alpha )
+
+def glPointSize( size ):
+    if _changed( 'pointSize', float(size) ):
+        _GL.glPointSize( size )
+
+def glLineWidth( width ):
+    if _changed( 'lineWidth', float(width) ):
+        _GL.glLineWidth( width )
+
+def glShadeModel( mode ):
+    if _changed( 'shadeModel', int(mode) ):
+        _GL.glShadeModel( mode )
+
+def glLightModeli( pname, param ):
+    if _changed( ('lightModel', int(pname)), int(param) ):
+        _GL.glLightModeli( pname, param )
+
+def glLightfv( light, pname, params ):
+    if pname in _EYE_SPACE_LIGHT_PARAMETERS:
+        _GL.glLightfv( light, pname, params )
+    elif _changed( ('light', int(light), int(pname)), _floats( params ) ):
+        _GL.glLightfv( light, pname, params )
+
+def _materialChanged( face, pname, value ):
+    """Like _changed, but GL_FRONT_AND_BACK updates both faces"""
+    keys = [('material', int(single), int(pname)) for single in _faces( face )]
+    cache = _cache()
+    if all( [cache.get( key ) == value for key in keys] ):
+        cache[ELIDED_KEY] += 1
+        return False
+    for key in keys:
+        cache[key] = value
+    return True
+
+def glMaterialfv( face, pname, params ):
+    if _materialChanged( face, pname, _floats( params ) ):
+        _GL.glMaterialfv( face, pname, params )
+
+def glMaterialf( face, pname, param ):
+    if _materialChanged( face, pname, (float(param),) ):
+        _GL.glMaterialf( face, pname, param )
@@ -128,6 +128,15 @@ import occurs the flags should no longer be changed.
 
         Default: False
 
+    CALL_COUNTING -- If True, then wrap functions with a
+        lightweight counter which records the number of calls to
+        each function and an estimate of the bytes transferred by
+        glBufferData, glTexImage*, glReadPixels and friends.  Much
+        cheaper than FULL_LOGGING, see OpenGL.callcounts for the
+        query/reset API.
+
+        Default: False
+
     ALLOW_NUMPY_SCALARS -- if True, we will wrap
         all GLint/GLfloat calls conversions with wrappers
         that allow for passing numpy scalar values.
@@ -205,6 +214,7 @@ USE_ACCELERATE = environ_key("USE_ACCELERATE", True)
 CONTEXT_CHECKING = environ_key("CONTEXT_CHECKING", False)
 
 FULL_LOGGING = environ_key("FULL_LOGGING", False)
+CALL_COUNTING = environ_key("CALL_COUNTING", False)
 ALLOW_NUMPY_SCALARS = environ_key("ALLOW_NUMPY_SCALARS", False)
 UNSIGNED_BYTE_IMAGES_AS_STRING = environ_key("UNSIGNED_BYTE_IMAGES_AS_STRING", True)
 MODULE_ANNOTATIONS = False
@@ -12,6 +12,7 @@ from OpenGL import (
     CONTEXT_CHECKING,
 
     FULL_LOGGING,
+    CALL_COUNTING,
     ALLOW_NUMPY_SCALARS,
     UNSIGNED_BYTE_IMAGES_AS_STRING,
     MODULE_ANNOTATIONS,
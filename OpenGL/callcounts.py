@@ -0,0 +1,183 @@
+"""Lightweight per-function call counting (PYOPENGL_CALL_COUNTING)
+
+When OpenGL.CALL_COUNTING is True every base function is wrapped with
+a proxy that bumps a per-function call counter and, for the data-transfer
+entry points (glBufferData, glTexImage*, glReadPixels...), adds an estimate
+of the bytes moved between client and driver.
+
+Counts accumulate until reset() is called, so an application normally
+calls reset() once per frame and snapshot() to read the previous frame:
+
+    from OpenGL import callcounts
+    stats = callcounts.snapshot()
+    callcounts.reset()
+
+Calls can additionally be attributed to named sections (e.g. the draw
+function that issued them) with setSection( name ).
+"""
+from OpenGL._configflags import CALL_COUNTING
+
+ACTIVE = CALL_COUNTING
+
+# function-name: [calls, bytes] (shared by same-named functions)
+_stats = {}
+# section-name: [calls, bytes]
+_sections = {}
+# stat records modified since the last reset
+_touched = []
+
+class _State( object ):
+    """Holder for the current section's stat record"""
+    sectionName = None
+    section = None
+_state = _State()
+
+_TYPE_SIZES = {
+    0x1400: 1, # GL_BYTE
+    0x1401: 1, # GL_UNSIGNED_BYTE
+    0x1402: 2, # GL_SHORT
+    0x1403: 2, # GL_UNSIGNED_SHORT
+    0x1404: 4, # GL_INT
+    0x1405: 4, # GL_UNSIGNED_INT
+    0x1406: 4, # GL_FLOAT
+    0x140A: 8, # GL_DOUBLE
+    0x140B: 2, # GL_HALF_FLOAT
+}
+
+def pixelBytes( format, type ):
+    """Estimate bytes per pixel for an image format/type pair"""
+    from OpenGL import images
+    base = images.TYPE_TO_ARRAYTYPE.get( type, type )
+    size = _TYPE_SIZES.get( int(base), 1 )
+    if type in images.TIGHT_PACK_FORMATS:
+        return size
+    return images.COMPONENT_COUNTS.get( format, 4 ) * size
+
+def _argument( args, index ):
+    value = args[index]
+    return int( getattr( value, 'value', value ) or 0 )
+
+def _sizeArgument( index ):
+    """Estimator for functions with an explicit byte-size argument"""
+    def estimate( args ):
+        return _argument( args, index )
+    return estimate
+
+def _imageArguments( dimensions, format, pixels ):
+    """Estimator for image functions (dimension indices, format index, pixel index)"""
+    def estimate( args ):
+        if args[pixels] is None:
+            # no client data (allocation only, or a bound pixel buffer)
+            return 0
+        count = 1
+        for index in dimensions:
+            count *= _argument( args, index )
+        return count * pixelBytes( args[format], args[format+1] )
+    return estimate
+
+BYTE_ESTIMATORS = {
+    'glBufferData': _sizeArgument( 1 ),
+    'glBufferDataARB': _sizeArgument( 1 ),
+    'glNamedBufferData': _sizeArgument( 1 ),
+    'glBufferSubData': _sizeArgument( 2 ),
+    'glBufferSubDataARB': _sizeArgument( 2 ),
+    'glTexImage1D': _imageArguments( (3,), 5, 7 ),
+    'glTexImage2D': _imageArguments( (3,4), 6, 8 ),
+    'glTexImage3D': _imageArguments( (3,4,5), 7, 9 ),
+    'glTexSubImage1D': _imageArguments( (3,), 4, 6 ),
+    'glTexSubImage2D': _imageArguments( (4,5), 6, 8 ),
+    'glTexSubImage3D': _imageArguments( (5,6,7), 8, 10 ),
+    'glReadPixels': _imageArguments( (2,3), 4, 6 ),
+    'glDrawPixels': _imageArguments( (0,1), 2, 4 ),
+}
+
+class _CountedFunction( object ):
+    """Proxy that overrides __call__ to count calls (and bytes transferred)"""
+    def __init__( self, base ):
+        name = base.__name__
+        self.__dict__[''] = base
+        self.__dict__['stat'] = _stats.setdefault( name, [0,0] )
+        self.__dict__['estimate'] = BYTE_ESTIMATORS.get( name )
+    def __setattr__( self, key, value ):
+        if key != '':
+            setattr( self.__dict__[''], key, value )
+        else:
+            self.__dict__[''] = value
+    def __getattr__( self, key ):
+        if key == '':
+            return self.__dict__['']
+        else:
+            return getattr( self.__dict__[''], key )
+    def __call__( self, *args, **named ):
+        stat = self.__dict__['stat']
+        if not stat[0]:
+            _touched.append( stat )
+        stat[0] += 1
+        section = _state.section
+        if section is not None:
+            section[0] += 1
+        estimate = self.__dict__['estimate']
+        if estimate is not None:
+            try:
+                size = estimate( args )
+            except (IndexError, TypeError, ValueError):
+                size = 0
+            stat[1] += size
+            if section is not None:
+                section[1] += size
+        return self.__dict__['']( *args, **named )
+
+def countCalls( function ):
+    """Produce call-counted version of function (if CALL_COUNTING is on)"""
+    if ACTIVE:
+        return _CountedFunction( function )
+    return function
+
+def setSection( name ):
+    """Attribute following calls to section name, returns previous section name"""
+    previous = _state.sectionName
+    _state.sectionName = name
+    if name is None:
+        _state.section = None
+    else:
+        section = _sections.get( name )
+        if section is None:
+            section = _sections[name] = [0,0]
+        if not section[0]:
+            _touched.append( section )
+        _state.section = section
+    return previous
+
+def reset( ):
+    """Zero all counters touched since the last reset"""
+    for stat in _touched:
+        stat[0] = stat[1] = 0
+    del _touched[:]
+    if _state.section is not None:
+        # keep the open section registered for the next frame
+        _touched.append( _state.section )
+
+def snapshot( ):
+    """Return dict of non-zero counters
+
+    calls -- {function-name: call count}
+    bytes -- {function-name: estimated bytes transferred}
+    sections -- {section-name: (calls, bytes)}
+    totalCalls, totalBytes -- sums over all functions
+    """
+    calls = {}
+    transferred = {}
+    for name, (count, size) in _stats.items():
+        if count:
+            calls[name] = count
+            if size:
+                transferred[name] = size
+    return {
+        'calls': calls,
+        'bytes': transferred,
+        'sections': dict(
+            (name, tuple(stat)) for name, stat in _sections.items() if stat[0]
+        ),
+        'totalCalls': sum( calls.values() ),
+        'totalBytes': sum( transferred.values() ),
+    }
@@ -124,8 +124,12 @@ class BasePlatform( object ):
             return _CheckContext( func, self.CurrentContextIsValid )
         return func 
     def wrapLogging( self, func ):
-        """Wrap function with logging operations if appropriate"""
-        return logs.logOnFail( func, logs.getLog( 'OpenGL.errors' ))
+        """Wrap function with logging/counting operations if appropriate"""
+        func = logs.logOnFail( func, logs.getLog( 'OpenGL.errors' ))
+        if _configflags.CALL_COUNTING:
+            from OpenGL import callcounts
+            func = callcounts.countCalls( func )
+        return func
     
     def finalArgType( self, typ ):
         """Retrieve a final type for arg-type"""
@@ -0,0 +1,294 @@
+# Headless frame benchmark for Group10_Project.py
+#
+# Runs update_simulation() and the display() phases for a fixed number of
+# ticks in every scene/camera mode on an offscreen OSMesa context and prints
+# per-phase timings as JSON.
+#
+#   python benchmarks/frame_bench.py --ticks 600
+#   python benchmarks/frame_bench.py --sweep NUM_ASTEROIDS=250,2000 --sweep SPHERE_SLICES=15,30
+#   python benchmarks/frame_bench.py --write-thresholds benchmarks/thresholds.json
+#   python benchmarks/frame_bench.py --thresholds benchmarks/thresholds.json
+#   PYOPENGL_CALL_COUNTING=1 python benchmarks/frame_bench.py  (adds GL call/byte counts per draw function)
+#
+# Note: freeglut still has to be initialised for the solid shapes and fonts.
+# An X11 build of freeglut needs a display for that, e.g. run under xvfb-run.
+import os
+os.environ.setdefault("PYOPENGL_PLATFORM", "osmesa")
+
+import sys
+import json
+import math
+import time
+import argparse
+import itertools
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import Group10_Project as game
+from OpenGL import callcounts
+from OpenGL.GL import statecache
+
+# --- Constants ---
+SCENARIOS = ["solar_free", "solar_first_person", "solar_third_person", "solar_crash", "solar_nbody", "rocket"]
+PHASES = ["update", "world", "hud", "finish", "frame"]
+DEFAULT_TICKS = 600
+DEFAULT_MARGIN = 1.25  # Headroom added to p95 when writing thresholds
+
+SCENARIO_CAMERA_MODES = {
+    "solar_free": game.CAMERA_MODE_FREE,
+    "solar_first_person": game.CAMERA_MODE_FIRST_PERSON,
+    "solar_third_person": game.CAMERA_MODE_THIRD_PERSON,
+    "solar_crash": game.CAMERA_MODE_CRASH,
+    "solar_nbody": game.CAMERA_MODE_FREE,
+}
+
+BASELINE_STATE = game.capture_state()  # Module defaults, restored before every run
+
+# --- Helper Functions ---
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(math.ceil(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+def summarize(samples):
+    """Turns a list of seconds into millisecond statistics."""
+    return {
+        "mean_ms": 1000.0 * sum(samples) / len(samples),
+        "p50_ms": 1000.0 * percentile(samples, 50),
+        "p95_ms": 1000.0 * percentile(samples, 95),
+        "max_ms": 1000.0 * max(samples),
+    }
+
+def parse_value(text):
+    """Parses a sweep value as int if possible, otherwise float."""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+def parse_sweeps(sweeps):
+    """Expands NAME=v1,v2 options into a list of knob dictionaries."""
+    names = []
+    choices = []
+    for sweep in sweeps:
+        name, _, values = sweep.partition("=")
+        if not name.isupper() or not hasattr(game, name):
+            raise SystemExit(f"Unknown sweep knob: {name}")
+        names.append(name)
+        choices.append([parse_value(v) for v in values.split(",")])
+    return [dict(zip(names, combo)) for combo in itertools.product(*choices)]
+
+def result_key(scenario, knobs):
+    """Stable name for one scenario/knob combination (used by threshold files)."""
+    if not knobs:
+        return scenario
+    return scenario + "[" + ",".join(f"{k}={v}" for k, v in sorted(knobs.items())) + "]"
+
+# --- Scenario Scripts ---
+
+def free_camera_path(tick):
+    """Scripted free-camera fly-around of the whole system."""
+    angle = tick * 0.01
+    radius = 450.0 + 150.0 * math.sin(tick * 0.003)
+    game.camera_pos = [radius * math.cos(angle), 80.0 + 60.0 * math.sin(tick * 0.005), radius * math.sin(angle)]
+    game.camera_target = [0.0, 0.0, 0.0]
+
+def rocket_input_script(tick):
+    """Scripted strafing so the rocket sweeps through the meteor field."""
+    phase = (tick // 120) % 4
+    if tick % 120 == 0:
+        for key in (b'a', b'd', b'w', b's'):
+            game.apply_key_up(key)
+        game.apply_key_down((b'a', b'w', b'd', b's')[phase])
+
+def release_rocket_meshes():
+    """Deletes the cached rocket meshes so the next draw rebuilds them (knobs may change their shape)."""
+    for mesh in game.rocket_meshes.values():
+        mesh["vertices"].delete()
+        mesh["indices"].delete()
+    game.rocket_meshes.clear()
+
+def setup_scenario(scenario, knobs, defaults, seed, render):
+    """Resets the game through its own reset paths so every run starts from the same state.
+
+    The module isn't reloaded: that would orphan the cached GL objects
+    (meshes, text atlases, shader programs) in the shared context.
+    """
+    for name, value in dict(defaults, **knobs).items():
+        setattr(game, name, value)
+    game.restore_state(BASELINE_STATE)
+    game.seed_simulation(seed)
+    if render:
+        game.initialize_scene()
+        game.prepare_text_atlases()  # Built outside the timed frames
+        game.prepare_shader_programs()
+    else:
+        game.initialize_stars()
+        game.initialize_asteroids()
+        game.initialize_orbits()
+    if scenario == "rocket":
+        game.apply_key_down(b'p')
+    else:
+        game.set_camera_mode(SCENARIO_CAMERA_MODES[scenario])
+    if scenario == "solar_nbody":
+        game.start_nbody()
+
+def script_tick(scenario, tick):
+    """Applies the scripted input for one tick."""
+    if scenario in ("solar_free", "solar_nbody"):
+        free_camera_path(tick)
+    elif scenario == "solar_crash" and not game.is_crashing:
+        game.set_camera_mode(game.CAMERA_MODE_CRASH)
+        game.start_crash_sequence()
+    elif scenario == "rocket":
+        rocket_input_script(tick)
+
+def run_scenario(scenario, knobs, defaults, ticks, seed, render):
+    """Runs one scenario and returns its per-phase timing summary."""
+    setup_scenario(scenario, knobs, defaults, seed, render)
+    samples = {phase: [] for phase in PHASES}
+    gl_calls = []
+    gl_bytes = []
+    elided = []
+    rocket_steps = []
+    rocket_rejected = []
+    gl_stats = None
+    clock = time.perf_counter
+
+    for tick in range(ticks):
+        script_tick(scenario, tick)
+        callcounts.reset()
+        t0 = clock()
+        game.update_simulation()
+        t1 = clock()
+        if game.scene_mode == 0:
+            rocket_steps.append(game.rocket_integrator_stats["steps"])
+            rocket_rejected.append(game.rocket_integrator_stats["rejected"])
+        if render:
+            game.glClear(game.GL_COLOR_BUFFER_BIT | game.GL_DEPTH_BUFFER_BIT)
+            game.setupCamera()
+            game.setup_lighting()
+            game.draw_world()
+            t2 = clock()
+            game.draw_hud()
+            t3 = clock()
+            game.glFinish()
+            t4 = clock()
+            elided.append(statecache.resetElidedCount())
+        else:
+            t2 = t3 = t4 = t1
+        samples["update"].append(t1 - t0)
+        samples["world"].append(t2 - t1)
+        samples["hud"].append(t3 - t2)
+        samples["finish"].append(t4 - t3)
+        samples["frame"].append(t4 - t0)
+        if callcounts.ACTIVE:
+            gl_stats = callcounts.snapshot()
+            gl_calls.append(gl_stats["totalCalls"])
+            gl_bytes.append(gl_stats["totalBytes"])
+
+    result = {
+        "key": result_key(scenario, knobs),
+        "scenario": scenario,
+        "knobs": knobs,
+        "phases": {phase: summarize(values) for phase, values in samples.items()},
+    }
+    if rocket_steps:
+        # Adaptive rocket integrator work (solar system scenarios)
+        result["rocket_integrator"] = {
+            "steps_per_tick": sum(rocket_steps) / len(rocket_steps),
+            "max_steps_per_tick": max(rocket_steps),
+            "rejected_per_tick": sum(rocket_rejected) / len(rocket_rejected),
+        }
+    if elided:
+        # Redundant state calls dropped by OpenGL.GL.statecache
+        result["elided_calls_per_frame"] = sum(elided) / len(elided)
+    if gl_stats is not None:
+        # Only present with PYOPENGL_CALL_COUNTING=1
+        result["gl"] = {
+            "calls_per_frame": sum(gl_calls) / len(gl_calls),
+            "bytes_per_frame": sum(gl_bytes) / len(gl_bytes),
+            "last_frame_sections": gl_stats["sections"],
+            "last_frame_calls": gl_stats["calls"],
+        }
+    return result
+
+# --- Thresholds ---
+
+def check_thresholds(results, thresholds):
+    """Returns a list of messages for every p95 over its configured limit."""
+    failures = []
+    for result in results:
+        limits = thresholds.get(result["key"], {})
+        for phase, limit_ms in limits.items():
+            p95 = result["phases"][phase]["p95_ms"]
+            if p95 > limit_ms:
+                failures.append(f"{result['key']} {phase}: p95 {p95:.3f} ms > {limit_ms:.3f} ms")
+    return failures
+
+def write_thresholds(path, results, margin):
+    """Writes the current p95 timings (plus margin) as the new baseline."""
+    thresholds = {
+        result["key"]: {phase: round(stats["p95_ms"] * margin, 3) for phase, stats in result["phases"].items()}
+        for result in results
+    }
+    with open(path, "w") as f:
+        json.dump(thresholds, f, indent=2, sort_keys=True)
+
+# --- Main ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless frame benchmark for the solar system simulation")
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS, help="ticks per scenario")
+    parser.add_argument("--seed", type=int, default=game.SIM_SEED, help="simulation seed")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="run only these scenarios")
+    parser.add_argument("--sweep", action="append", default=[], metavar="NAME=V1,V2",
+                        help="sweep a module constant, e.g. NUM_ASTEROIDS=250,2000")
+    parser.add_argument("--no-render", action="store_true", help="time the simulation update only (no GL context)")
+    parser.add_argument("--output", metavar="FILE", help="write the JSON report to FILE instead of stdout")
+    parser.add_argument("--thresholds", metavar="FILE", help="fail if any p95 exceeds the limits in FILE")
+    parser.add_argument("--write-thresholds", metavar="FILE", help="write current p95 timings as limits to FILE")
+    parser.add_argument("--margin", type=float, default=DEFAULT_MARGIN, help="headroom for --write-thresholds")
+    args = parser.parse_args(argv)
+
+    render = not args.no_render
+    if render:
+        game.offscreen_context = game.create_offscreen_context()  # Keeps the colour buffer alive for the run
+
+    sweeps = parse_sweeps(args.sweep)
+    defaults = {name: getattr(game, name) for knobs in sweeps for name in knobs}
+    results = []
+    for knobs in sweeps:
+        if render:
+            release_rocket_meshes()
+        for scenario in args.scenario or SCENARIOS:
+            results.append(run_scenario(scenario, knobs, defaults, args.ticks, args.seed, render))
+
+    report = {
+        "ticks": args.ticks,
+        "seed": args.seed,
+        "render": render,
+        "platform": os.environ.get("PYOPENGL_PLATFORM"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.write_thresholds:
+        write_thresholds(args.write_thresholds, results, args.margin)
+
+    if args.thresholds:
+        with open(args.thresholds) as f:
+            failures = check_thresholds(results, json.load(f))
+        for failure in failures:
+            print("REGRESSION:", failure, file=sys.stderr)
+        if failures:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# Determinism checks for Group10_Project.py
+#
+# A captured state or snapshot must carry on identically in a process
+# started with a different master seed (the meteor chunks are keyed by it).
+#
+#   python -m pytest -q tests
+#
+# Only the export check needs OSMesa; it renders in spawned processes and
+# is skipped when they can't create an offscreen context.
+import os
+import sys
+import importlib
+import subprocess
+import multiprocessing
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+import Group10_Project as game
+
+# --- Constants ---
+SOURCE_SEED = 5
+OTHER_SEED = 10  # The default SIM_SEED, as in a freshly spawned process
+WARMUP_TICKS = 200
+CHECK_TICKS = 3000
+EXPORT_SEED = 7
+EXPORT_FRAMES = 6
+EXPORT_TICKS_PER_FRAME = 60
+EXPORT_SHARD_FRAMES = 2
+EXPORT_SIZE = (160, 120)
+
+# --- Helper Functions ---
+
+def start_game(seed):
+    """Reloads the game module so every run starts from the same seeded state."""
+    importlib.reload(game)
+    game.seed_simulation(seed)
+    game.initialize_stars()
+    game.initialize_asteroids()
+    game.initialize_orbits()
+
+def start_rocket_game(seed):
+    """Starts the game and switches to the rocket game."""
+    start_game(seed)
+    game.apply_key_down(b'p')
+
+def fly(ticks):
+    """Strafes through the meteor field (same script as the frame benchmark)."""
+    for _ in range(ticks):
+        tick = game.sim_tick
+        if tick % 120 == 0:
+            for key in (b'a', b'd', b'w', b's'):
+                game.apply_key_up(key)
+            game.apply_key_down((b'a', b'w', b'd', b's')[(tick // 120) % 4])
+        game.update_simulation()
+
+def outcome():
+    """The parts of the state that depend on the streamed meteor chunks."""
+    return game.rocket_health, game.meteor_chunks_loaded, game.meteors
+
+def shard_outcome(state, ticks):
+    """Runs like an export worker job (restore, then tick), without rendering."""
+    game.restore_state(state)
+    fly(ticks)
+    return outcome()
+
+def record_flight(path, seed, ticks):
+    """Records a session that starts the rocket game and flies ahead."""
+    start_game(seed)
+    game.start_recording(path)
+    game.handle_input_event(ord('p'), game.EVENT_FLAG_DOWN)
+    game.handle_input_event(ord('w'), game.EVENT_FLAG_DOWN)
+    game.run_ticks(ticks)
+    game.stop_recording()
+
+def osmesa_available():
+    """Whether a fresh process can create an OSMesa context (a pool would hang on a failed import)."""
+    probe = "import Group10_Project as game; game.create_offscreen_context(%d, %d)" % EXPORT_SIZE
+    env = dict(os.environ, PYOPENGL_PLATFORM="osmesa")
+    return subprocess.run([sys.executable, "-c", probe], cwd=ROOT, env=env, capture_output=True).returncode == 0
+
+def render_serial(recording):
+    """Spawned-process job: replays a recording in one process, rendering like export_frames()."""
+    game.offscreen_context = game.create_offscreen_context(*EXPORT_SIZE)  # Keeps its buffer alive
+    seed, game.SIM_TICK_SECONDS, events, _ = game.load_recording(recording)
+    game.seed_simulation(seed)
+    game.initialize_stars()
+    game.initialize_asteroids()
+    game.initialize_orbits()
+    frames = []
+    next_event = 0
+    for _ in range(EXPORT_FRAMES):
+        frames.append(bytes(game.render_offscreen_frame(*EXPORT_SIZE)))
+        next_event = game.run_ticks(EXPORT_TICKS_PER_FRAME, events, next_event)
+    return frames
+
+def read_ppm_frames(path):
+    """Splits a PPM stream written by export_frames() into pixel blocks."""
+    with open(path, "rb") as f:
+        data = f.read()
+    header = b"P6\n%d %d\n255\n" % EXPORT_SIZE
+    frame_size = len(header) + EXPORT_SIZE[0] * EXPORT_SIZE[1] * 3
+    frames = [data[start:start + frame_size] for start in range(0, len(data), frame_size)]
+    assert all(frame.startswith(header) for frame in frames)
+    return [frame[len(header):] for frame in frames]
+
+# --- Tests ---
+
+def test_restore_state_keeps_meteor_stream_across_seeds():
+    start_rocket_game(SOURCE_SEED)
+    fly(WARMUP_TICKS)
+    state = game.capture_state()
+    fly(CHECK_TICKS)
+    expected = outcome()
+
+    start_rocket_game(OTHER_SEED)
+    fly(WARMUP_TICKS)  # Leaves chunk futures of the other seed behind
+    game.restore_state(state)
+    assert game.SIM_SEED == SOURCE_SEED
+    fly(CHECK_TICKS)
+    assert outcome() == expected
+
+def test_snapshot_keeps_meteor_stream_across_seeds(tmp_path):
+    path = str(tmp_path / "scene.snap")
+    start_rocket_game(SOURCE_SEED)
+    fly(WARMUP_TICKS)
+    game.save_snapshot(path)
+    fly(CHECK_TICKS)
+    expected = outcome()
+
+    start_rocket_game(OTHER_SEED)
+    fly(WARMUP_TICKS)
+    game.load_snapshot(path)
+    assert game.SIM_SEED == SOURCE_SEED
+    fly(CHECK_TICKS)
+    assert outcome() == expected
+
+def test_spawned_shard_keeps_meteor_stream():
+    start_rocket_game(SOURCE_SEED)
+    fly(WARMUP_TICKS)
+    state = game.capture_state()
+    fly(CHECK_TICKS)
+    expected = outcome()
+
+    # Spawned processes import the module fresh, with the default SIM_SEED
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        assert pool.apply(shard_outcome, (state, CHECK_TICKS)) == expected
+
+def test_export_matches_serial_render_for_non_default_seed(tmp_path, monkeypatch):
+    if not osmesa_available():
+        pytest.skip("needs an OSMesa context")
+    recording = str(tmp_path / "flight.rec")
+    record_flight(recording, EXPORT_SEED, EXPORT_FRAMES * EXPORT_TICKS_PER_FRAME)
+
+    # Serial reference in one spawned process (the platform is picked when it imports OpenGL)
+    monkeypatch.setenv("PYOPENGL_PLATFORM", "osmesa")
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        expected = pool.apply(render_serial, (recording,))
+
+    output = str(tmp_path / "frames.ppm")
+    game.seed_simulation(OTHER_SEED)
+    game.export_frames(output, EXPORT_FRAMES, workers=2, recording=recording,
+                       ticks_per_frame=EXPORT_TICKS_PER_FRAME, shard_frames=EXPORT_SHARD_FRAMES,
+                       width=EXPORT_SIZE[0], height=EXPORT_SIZE[1])
+    assert read_ppm_frames(output) == expected